@@ -1,13 +1,36 @@
 """Bespoken - An AI-powered coding assistant for editing files with interactive confirmations."""
 
-import importlib.metadata
+import importlib
 
-from .__main__ import chat
+# Public names and the modules they live in. They are imported on first use
+# (PEP 562) so that `import bespoken` does not pull in llm, typer and friends.
+_LAZY = {
+    "chat": ".__main__",
+    "batch": "._batch",
+}
 
-# Get version dynamically from package metadata
-try:
-    __version__ = importlib.metadata.version("bespoken")
-except:
-    __version__ = "unknown"
+__all__ = ["chat", "batch", "__version__"]
 
-__all__ = ["chat", "__version__"]
\ No newline at end of file
+
+def _get_version():
+    import importlib.metadata
+    try:
+        return importlib.metadata.version("bespoken")
+    except:
+        return "unknown"
+
+
+def __getattr__(name):
+    if name == "__version__":
+        value = _get_version()
+    elif name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache it, so the lookup only happens once
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
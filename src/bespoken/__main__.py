@@ -1,25 +1,34 @@
 from pathlib import Path
 from typing import Optional, Callable
+import asyncio
+import dataclasses
+import functools
+import inspect
 import json
+import sys
+import threading
+import time
 import uuid
 
 import llm
 import typer
-from dotenv import load_dotenv
 from rich.console import Console
 from rich.spinner import Spinner
 from rich.live import Live
-from rich.prompt import Prompt
 from rich.columns import Columns
 from rich.text import Text
 
 from . import config
+from .caching import cache_options, cache_usage, with_cache_breakpoints
+from .compaction import CHARS_PER_TOKEN, ContextCompactor, conversation_messages
+from .file_cache import FileCache, set_file_cache
+from .output_budget import OutputBudget
+from .scheduling import ToolLock, ToolScheduler, is_read_only
+from .sessions import SessionStore
+from .telemetry import Telemetry
 from . import ui
 
 
-load_dotenv(".env")
-
-
 # Command result constants
 COMMAND_QUIT = "QUIT"
 COMMAND_HANDLED = "HANDLED"
@@ -37,6 +46,7 @@ def handle_help(user_commands):
     ui.print("  /help   - Show this help message")
     ui.print("  /tools  - Show available tools")
     ui.print("  /debug  - Toggle debug mode")
+    ui.print("  /stats  - Show latency and throughput for this session")
     
     if user_commands:
         ui.print("")
@@ -68,6 +78,36 @@ def handle_tools(tools):
     return COMMAND_HANDLED
 
 
+def handle_stats(telemetry):
+    """Handle /stats command"""
+    if telemetry is None or not telemetry.records:
+        ui.print("[dim]No turns recorded yet[/dim]")
+        ui.print("")
+        return COMMAND_HANDLED
+    
+    def fmt(value, unit):
+        if value is None:
+            return "-"
+        return f"{value:.2f}{unit}" if unit == "s" else f"{value:,.0f}{unit}"
+    
+    rows = [
+        ("Time to first token", "time_to_first_token", "s"),
+        ("Tokens per second", "tokens_per_second", ""),
+        ("Model time", "model_time", "s"),
+        ("Tool call time", "tool_time", "s"),
+        ("Tool output size", "tool_output_chars", " chars"),
+    ]
+    summary = telemetry.summary()
+    ui.print(f"[cyan]Session stats ({len(telemetry.records)} turns):[/cyan]")
+    ui.print(f"  {'':<22}{'p50':>12}{'p95':>12}")
+    for label, key, unit in rows:
+        stats = summary[key]
+        p50, p95 = fmt(stats["p50"], unit), fmt(stats["p95"], unit)
+        ui.print(f"  {label:<22}{p50:>12}{p95:>12}")
+    ui.print("")
+    return COMMAND_HANDLED
+
+
 def toggle_debug():
     """Toggle debug mode on/off"""
     config.DEBUG_MODE = not config.DEBUG_MODE
@@ -107,7 +147,9 @@ def handle_user_command(command, handler):
         return COMMAND_HANDLED
 
 
-def dispatch_slash_command(command, user_commands, model, tools, conversation):
+def dispatch_slash_command(
+    command, user_commands, model, tools, conversation, telemetry=None
+):
     """Dispatch slash command to appropriate handler"""
     if command == "/quit":
         return handle_quit(), conversation
@@ -117,6 +159,8 @@ def dispatch_slash_command(command, user_commands, model, tools, conversation):
         return handle_tools(tools), conversation
     elif command == "/debug":
         return toggle_debug(), conversation
+    elif command == "/stats":
+        return handle_stats(telemetry), conversation
     elif command in user_commands:
         return handle_user_command(command, user_commands[command]), conversation
     else:
@@ -126,24 +170,305 @@ def dispatch_slash_command(command, user_commands, model, tools, conversation):
         return COMMAND_HANDLED, conversation
 
 
-def chat(
-    debug: bool = typer.Option(False, "--debug", "-d", help="Enable debug mode to see LLM interactions"),
-    model_name: str = typer.Option("anthropic/claude-3-5-sonnet-20240620", "--model", "-m", help="LLM model to use"),
-    system_prompt: Optional[str] = typer.Option(None, "--system", "-s", help="System prompt for the assistant"),
+class _ChainStopped(Exception):
+    """Raised on the worker thread of a _ThreadedChain whose consumer went away."""
+
+
+class _ThreadedChain:
+    """Runs a blocking chain on a worker thread, passing its chunks on in order.
+    
+    When the consumer stops early (Ctrl+C cancels it), the worker drops the chain at its
+    next chunk or callback, so the thread ends and asyncio.run can shut down.
+    """
+    
+    _CALL = object()
+    _DONE = object()
+    
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.stopped = False
+        # done events of callbacks the worker is waiting on
+        self.pending = set()
+        self.lock = threading.Lock()
+    
+    def in_order(self, function):
+        """Wrap a worker-thread callback to run on the loop after all earlier chunks."""
+        def wrapper(*args):
+            done = threading.Event()
+            errors = []
+            with self.lock:
+                if self.stopped:
+                    raise _ChainStopped()
+                self.pending.add(done)
+            call = (self._CALL, (function, args, done, errors))
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, call)
+            done.wait()
+            with self.lock:
+                self.pending.discard(done)
+                if self.stopped:
+                    raise _ChainStopped()
+            if errors:
+                raise errors[0]
+        return wrapper
+    
+    def stop(self) -> None:
+        """Abandon the chain and release a worker that waits on a callback."""
+        with self.lock:
+            self.stopped = True
+            for done in self.pending:
+                done.set()
+    
+    async def iterate(self, iterable):
+        """Yield the items of a blocking iterable, consumed on a worker thread."""
+        def put(entry):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, entry)
+        
+        def produce():
+            try:
+                for item in iterable:
+                    if self.stopped:
+                        raise _ChainStopped()
+                    put((item, None))
+            except _ChainStopped:
+                pass
+            except BaseException as e:
+                put((self._DONE, e))
+            else:
+                put((self._DONE, None))
+        
+        worker = self.loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item, extra = await self.queue.get()
+                if item is self._DONE:
+                    await worker
+                    if extra is not None:
+                        raise extra
+                    return
+                if item is self._CALL:
+                    function, args, done, errors = extra
+                    try:
+                        function(*args)
+                    except Exception as e:
+                        errors.append(e)
+                    done.set()
+                    continue
+                yield item
+        finally:
+            self.stop()
+
+
+class _HistoryCursor:
+    """Passes each finished response of a conversation to the history callback once."""
+    
+    def __init__(self, callback: Callable):
+        self.callback = callback
+        self.conversation = None
+        self.position = 0
+    
+    def deliver(self, conversation) -> None:
+        """Send the responses that finished since the last delivery."""
+        if conversation is not self.conversation:
+            # A slash command may have swapped the conversation,
+            # start from its beginning
+            self.conversation = conversation
+            self.position = 0
+        responses = conversation.responses
+        new_responses = responses[self.position:]
+        self.position = len(responses)
+        payload = [
+            e.response_json for e in new_responses if e.response_json is not None
+        ]
+        if payload:
+            self.callback(payload)
+
+
+def _in_thread(function, lock):
+    """Wrap a blocking tool function so it runs on a worker thread, one tool at a time.
+    
+    Read-only tools share a ToolLock instead, llm starts all calls of a response at once
+    so they run side by side.
+    """
+    async def run(**kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(function, **kwargs)
+        if is_read_only(function) and isinstance(lock, ToolLock):
+            async with lock.shared():
+                return await loop.run_in_executor(None, call)
+        async with lock:
+            return await loop.run_in_executor(None, call)
+    # Keep the signature so llm still sees parameters like llm_tool_call
+    run.__signature__ = inspect.signature(function)
+    return run
+
+
+def _expand_tools(tools, budget=None):
+    """Turn toolboxes and plain functions into llm Tools, building their schemas once.
+    
+    With an OutputBudget every tool's output is cut down to fit it.
+    """
+    expanded = []
+    for tool in tools:
+        if isinstance(tool, llm.Toolbox):
+            expanded.extend(tool.tools())
+        elif isinstance(tool, llm.Tool):
+            expanded.append(tool)
+        elif callable(tool):
+            expanded.append(llm.Tool.function(tool))
+        else:
+            expanded.append(tool)
+    if budget:
+        expanded = [
+            dataclasses.replace(tool, implementation=budget.wrap(tool.implementation))
+            if isinstance(tool, llm.Tool) and tool.implementation else tool
+            for tool in expanded
+        ]
+    return expanded
+
+
+def _async_tools(tools, lock, budget=None):
+    """Expand toolboxes into tools whose blocking implementations run off the loop."""
+    wrapped = []
+    for item in _expand_tools(tools, budget):
+        if (
+            not isinstance(item, llm.Tool) or item.implementation is None
+            or inspect.iscoroutinefunction(item.implementation)
+        ):
+            wrapped.append(item)
+        else:
+            implementation = _in_thread(item.implementation, lock)
+            wrapped.append(dataclasses.replace(item, implementation=implementation))
+    return wrapped
+
+
+def _load_model(model_name: str):
+    """Load the async version of a model, or the sync one. Returns (model, is_async)."""
+    from dotenv import load_dotenv
+    # API keys may live in a .env file, read it only once a model is needed
+    load_dotenv(".env")
+    try:
+        return llm.get_async_model(model_name), True
+    except llm.UnknownModelError:
+        return llm.get_model(model_name), False
+
+
+def _warm_up(
+    model_name: str, tools, lock, response_cache=None, scheduler=None, budget=None
+):
+    """Get a conversation ready: resolve the model and its key, build the tool schemas.
+    
+    Runs on a worker thread while the banner is shown. Returns (model, is_async,
+    conversation).
+    """
+    model, is_async = _load_model(model_name)
+    if getattr(model, "needs_key", None):
+        try:
+            model.get_key()
+        except Exception:
+            # A missing key is reported by the first request, like before
+            pass
+    if response_cache:
+        from .response_cache import ResponseCache, cached_model
+        path = None if response_cache is True else response_cache
+        model = cached_model(model, ResponseCache(path))
+    if tools:
+        if is_async:
+            tools = _async_tools(tools, lock, budget)
+        else:
+            tools = _expand_tools(tools, budget)
+            if scheduler:
+                tools = scheduler.wrap(tools)
+    return model, is_async, model.conversation(tools=tools)
+
+
+def _say_goodbye():
+    ui.print("")  # Add newlines
+    ui.print("[cyan]Thanks for using Bespoken. Goodbye![/cyan]")
+    ui.print("")  # Add final newline
+
+
+async def chat_async(
+    debug: bool = False,
+    model_name: str = "anthropic/claude-3-5-sonnet-20240620",
+    system_prompt: Optional[str] = None,
     tools: list = None,
     slash_commands: dict = None,
     history_callback: Optional[Callable] = None,
     first_message: Optional[str] = None,
     show_banner: bool = True,
+    stream_fps: Optional[float] = 30,
+    markdown: bool = False,
+    plain: Optional[bool] = None,
+    context_budget: Optional[int] = None,
+    keep_turns: int = 4,
+    prompt_cache: bool = False,
+    resume: Optional[str] = None,
+    session_db: Optional[str] = None,
+    save_session: bool = False,
+    history_file: Optional[str] = None,
+    telemetry_file: Optional[str] = None,
+    response_cache=False,
+    tool_output_budget: Optional[int] = 10_000,
+    turn_output_budget: Optional[int] = 40_000,
 ):
-    """Run the bespoken chat assistant."""
+    """Run the bespoken chat assistant on an asyncio event loop.
+    
+    Models with an async API are streamed natively; other models run their chain on a
+    worker thread. Blocking tools and slash commands also run on worker threads, so the
+    event loop stays free while they work.
+    
+    With a context_budget (in tokens) the history is compacted before a turn that would
+    exceed it, keeping the last keep_turns turns verbatim.
+    
+    With prompt_cache the system prompt, tool schemas and earlier turns are marked as
+    cacheable for providers that support it, and the cache hits are reported per turn.
+    
+    With save_session each turn is saved to a SQLite session store (session_db, by
+    default ~/.bespoken/sessions.db). Pass a session id as resume to continue a saved
+    session, its new turns are saved as well.
+    
+    Input history is kept in memory, or in history_file when one is given.
+    
+    Latency and throughput of every turn are recorded for the /stats command, and
+    appended to telemetry_file (JSONL) when one is given.
+    
+    With response_cache (True, or the path of a cache database) identical requests are
+    answered from an on-disk cache instead of the API. Meant for development and demos.
+    
+    Tool output is capped at tool_output_budget tokens per call and turn_output_budget
+    tokens per turn, the middle of longer output is left out (None removes a cap).
+    """
     # Set debug mode globally
     config.DEBUG_MODE = debug
     
+    # Cap how often streamed text is written to the terminal (None or 0 disables)
+    ui.set_stream_fps(stream_fps)
+    
+    # Plain text output skips Rich rendering
+    # (None picks it when stdout isn't a terminal)
+    ui.set_plain_output(plain)
+    
+    if history_file:
+        ui.set_history_file(history_file)
+    
     # Initialize user slash commands
     user_commands = slash_commands or {}
     
     console = Console()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    
+    # Load the model and build the tool schemas in the background while the banner is up
+    # Read-only tool calls of a sync model's response run side by side on this pool
+    scheduler = ToolScheduler()
+    budget = OutputBudget(tool_output_budget, turn_output_budget)
+    # Files the model has seen this session are not sent again while they are unchanged
+    max_chars = tool_output_budget * CHARS_PER_TOKEN if tool_output_budget else None
+    file_cache = FileCache(max_chars)
+    warm_up = loop.run_in_executor(
+        None, _warm_up, model_name, tools, ToolLock(), response_cache, scheduler, budget
+    )
 
     # Show the banner
     if show_banner:
@@ -157,35 +482,90 @@ def chat(
         ui.print("[magenta]Debug mode enabled[/magenta]")
         ui.print("")
     
+    history = _HistoryCursor(history_callback) if history_callback else None
     
-    try:
-        model = llm.get_model(model_name)
-    except Exception as e:
-        ui.print(f"[red]Error loading model '{model_name}': {e}[/red]")
-        raise typer.Exit(1)
+    # Continuing a saved session keeps saving it
+    save_session = save_session or bool(resume)
+    store = SessionStore(session_db) if save_session else None
+    session_id = None
+    if resume:
+        if not store.exists(resume):
+            ui.print(f"[red]No saved session with id '{resume}'[/red]")
+            raise typer.Exit(1)
+        session_id = resume
+        count = store.count(resume)
+        ui.print(f"[dim]Resumed session {resume} ({count} messages)[/dim]")
+    elif store:
+        session_id = store.create(model_name)
+    if save_session and session_id:
+        ui.print(
+            f"[dim]Session {session_id} "
+            f"(continue it later with chat(..., resume=\"{session_id}\"))[/dim]"
+        )
+    compactor = ContextCompactor(context_budget, keep_turns) if context_budget else None
     
-    conversation = model.conversation(tools=tools)
-    history = []
+    model = conversation = None
+    telemetry = Telemetry(telemetry_file)
+    builtin_commands = ["/quit", "/help", "/tools", "/debug", "/stats"]
+    first_prompt = True
+    set_file_cache(file_cache)
     try:
         while True:
-            # Define available commands for completion (builtin + user commands)
-            builtin_commands = ["/quit", "/help", "/tools", "/debug"]
-            user_command_names = list(user_commands.keys())
-            completions = builtin_commands + user_command_names
+            # Commands for completion (builtin + user commands), the prompt session only
+            # updates its completer when these change
+            completions = builtin_commands + list(user_commands.keys())
             
             # Show completion hint on first prompt
             if not hasattr(chat, '_shown_completion_hint'):
-                ui.print("[dim]Tips: TAB for completions • @file.py for file paths • ↑/↓ for history • Ctrl+U to clear[/dim]")
+                ui.print(
+                    "[dim]Tips: TAB for completions • @file.py for file paths • "
+                    "↑/↓ for history • Ctrl+U to clear[/dim]"
+                )
                 chat._shown_completion_hint = True
             
-            out = ui.input("> ", completions=completions).strip()
+            if first_prompt:
+                elapsed = time.perf_counter() - started
+                ui.tool_debug(f"Time to first prompt: {elapsed:.2f}s")
+                first_prompt = False
             
+            if conversation is None:
+                # The first prompt is up while the warm-up runs,
+                # a bad model id ends it before any input is used
+                prompt = asyncio.ensure_future(
+                    ui.input_async("> ", completions=completions)
+                )
+                await asyncio.wait(
+                    {prompt, warm_up}, return_when=asyncio.FIRST_COMPLETED
+                )
+                try:
+                    model, is_async, conversation = await warm_up
+                except Exception as e:
+                    prompt.cancel()
+                    await asyncio.wait({prompt})
+                    ui.print(f"[red]Error loading model '{model_name}': {e}[/red]")
+                    raise typer.Exit(1) from e
+                if resume:
+                    # Messages are only read from the database
+                    # once the next turn needs them
+                    conversation.loaded_messages = store.load(resume)
+                options = cache_options(model) if prompt_cache else {}
+                out = (await prompt).strip()
+            else:
+                out = (await ui.input_async("> ", completions=completions)).strip()
+            submitted = time.perf_counter()
             # Handle slash commands (only if it's a known command)
             if out.startswith("/"):
                 # Check if it's a known command
-                builtin_commands = ["/quit", "/help", "/tools", "/debug"]
                 if out in builtin_commands or out in user_commands:
-                    result, conversation = dispatch_slash_command(out, user_commands, model, tools, conversation)
+                    # Commands may prompt the user themselves,
+                    # which has to happen off the loop
+                    previous = conversation
+                    result, conversation = await loop.run_in_executor(
+                        None, dispatch_slash_command,
+                        out, user_commands, model, tools, conversation, telemetry,
+                    )
+                    if conversation is not previous:
+                        file_cache.clear()
                     
                     if result == COMMAND_QUIT:
                         break
@@ -200,49 +580,220 @@ def chat(
             if not out.strip():
                 continue
             
+            telemetry.start_turn(submitted)
+            budget.start_turn()
+            file_cache.start_turn()
+            streamed_chars = 0
+            
             # Show spinner while getting initial response
             # Create a padded spinner
             spinner_text = Text("Thinking...", style="dim")
-            padded_spinner = Columns([Text(" " * ui.LEFT_PADDING), Spinner("dots"), spinner_text], expand=False)
+            padding = Text(" " * ui.LEFT_PADDING)
+            padded_spinner = Columns(
+                [padding, Spinner("dots"), spinner_text], expand=False
+            )
             response_started = False
 
             with Live(padded_spinner, console=console, refresh_per_second=10, transient=True) as live:
-                if history_callback:
-                    new_id = str(uuid.uuid4()).replace("-", "")[:24]
-                    history_callback([{"id": f"msg_{new_id}", "role": "user", "content": [{"text": out, "type": "text"}]}])
-                for chunk in conversation.chain(out, system=system_prompt):
-                    if not response_started:
-                        # First chunk received, clear and stop the spinner so it disappears
+                def stop_spinner():
+                    # Clear and stop the spinner so it disappears
+                    if live.is_started:
                         try:
                             live.update(Text(""), refresh=True)
                         except Exception:
                             pass
                         live.stop()
+                
+                if history_callback:
+                    new_id = str(uuid.uuid4()).replace("-", "")[:24]
+                    history_callback([{
+                        "id": f"msg_{new_id}",
+                        "role": "user",
+                        "content": [{"text": out, "type": "text"}],
+                    }])
+                
+                # Write out buffered text (and drop the spinner)
+                # before a tool prints its own output
+                writer = ui.StreamWriter(ui.LEFT_PADDING, markdown=markdown)
+                # Bound to this turn's writer and conversation,
+                # the next turn makes new ones
+                def flush_output(writer=writer):
+                    stop_spinner()
+                    writer.flush()
+                
+                def before_call(tool, tool_call, conversation=conversation):
+                    flush_output()
+                    # The response asking for this tool has finished, log it right away
+                    if history:
+                        history.deliver(conversation)
+                    telemetry.tool_started(tool_call.tool_call_id)
+                
+                def after_call(tool, tool_call, tool_result):
+                    # A call the scheduler started ahead of time ran from its
+                    # submission, not from before_call
+                    span = scheduler.span(tool_call.tool_call_id)
+                    telemetry.tool_finished(
+                        tool_call.tool_call_id, tool_call.name, tool_result.output, span
+                    )
+                
+                # Shrink the history first if this turn would go over the budget
+                messages = None
+                if compactor:
+                    current = conversation_messages(conversation)
+                    compacted = compactor.compact(current)
+                    if compacted is not current:
+                        messages = compacted
+                        # Earlier file reads may be stubbed or summarized now
+                        file_cache.clear()
+                        stop_spinner()
+                        saved_tokens = compactor.stats.tokens_saved
+                        ui.print(
+                            f"[dim]Compacted context, {saved_tokens} tokens saved "
+                            "so far[/dim]"
+                        )
+                
+                # Move the cache breakpoint up to the end of the history
+                if prompt_cache:
+                    if messages is None:
+                        messages = conversation_messages(conversation)
+                    messages = with_cache_breakpoints(messages, system_prompt)
+                
+                turn_start = len(conversation.responses)
+                if save_session and store:
+                    if messages is not None:
+                        saved = len(messages)
+                    elif conversation.loaded_messages is not None:
+                        # A resumed session, counted without reading its messages back
+                        saved = len(conversation.loaded_messages)
+                    else:
+                        saved = len(conversation_messages(conversation))
+                if is_async:
+                    chunks = conversation.chain(
+                        out, system=system_prompt, messages=messages, options=options,
+                        before_call=before_call, after_call=after_call,
+                    )
+                else:
+                    threaded = _ThreadedChain()
+                    chain = conversation.chain(
+                        out, system=system_prompt, messages=messages, options=options,
+                        before_call=threaded.in_order(before_call),
+                        after_call=threaded.in_order(after_call),
+                    )
+                    chunks = threaded.iterate(scheduler.stream(
+                        chain, before_prefetch=threaded.in_order(flush_output)
+                    ))
+                
+                async for chunk in chunks:
+                    if not response_started:
+                        # First chunk received
+                        stop_spinner()
                         response_started = True
-                        # Initialize streaming state
-                        ui.start_streaming(ui.LEFT_PADDING)
+                        telemetry.first_token()
                     
                     # Stream each chunk as it arrives
-                    ui.stream_chunk(chunk, ui.LEFT_PADDING)
+                    streamed_chars += len(chunk)
+                    writer.write(chunk)
                 
                 # Finish streaming and print any remaining text
                 if response_started:
-                    ui.end_streaming(ui.LEFT_PADDING)
-                ids = set([e["id"] for e in history])
-                new_responses = [e for e in conversation.responses if e.response_json["id"] not in ids]
-                if history_callback:
-                    history_callback([e.response_json for e in new_responses])
+                    writer.close()
+                if history:
+                    history.deliver(conversation)
+                if save_session and store:
+                    # One append per turn with everything the turn added
+                    added = conversation_messages(conversation)[saved:]
+                    store.append(session_id, added)
+                
+                # Use the token counts the provider reported,
+                # or estimate them from the text
+                turn_responses = conversation.responses[turn_start:]
+                output_tokens = sum(r.output_tokens or 0 for r in turn_responses)
+                output_tokens = output_tokens or streamed_chars // 4
+                record = telemetry.end_turn(output_tokens)
+                
+                if response_started and (config.DEBUG_MODE or prompt_cache):
+                    ui.print("")  # End the response line before the reports below it
+                if response_started:
+                    first_token = record["time_to_first_token"]
+                    ui.tool_debug(f"Time to first token: {first_token:.2f}s")
+                if prompt_cache:
+                    usage = cache_usage(turn_responses)
+                    ui.print(
+                        f"[dim]Prompt cache: {usage.cache_read} tokens read, "
+                        f"{usage.cache_write} written, {usage.input_tokens} input[/dim]"
+                    )
 
             ui.print("")  # Add extra newline after bot response
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        _say_goodbye()
+    finally:
+        set_file_cache(None)
+
+
+def chat(
+    debug: bool = typer.Option(False, "--debug", "-d", help="Enable debug mode to see LLM interactions"),
+    model_name: str = typer.Option("anthropic/claude-3-5-sonnet-20240620", "--model", "-m", help="LLM model to use"),
+    system_prompt: Optional[str] = typer.Option(None, "--system", "-s", help="System prompt for the assistant"),
+    tools: list = None,
+    slash_commands: dict = None,
+    history_callback: Optional[Callable] = None,
+    first_message: Optional[str] = None,
+    show_banner: bool = True,
+    stream_fps: Optional[float] = 30,
+    markdown: bool = False,
+    plain: Optional[bool] = None,
+    context_budget: Optional[int] = None,
+    keep_turns: int = 4,
+    prompt_cache: bool = False,
+    resume: Optional[str] = None,
+    session_db: Optional[str] = None,
+    save_session: bool = False,
+    history_file: Optional[str] = None,
+    telemetry_file: Optional[str] = None,
+    response_cache=False,
+    tool_output_budget: Optional[int] = 10_000,
+    turn_output_budget: Optional[int] = 40_000,
+):
+    """Run the bespoken chat assistant."""
+    try:
+        asyncio.run(chat_async(
+            debug=debug,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            tools=tools,
+            slash_commands=slash_commands,
+            history_callback=history_callback,
+            first_message=first_message,
+            show_banner=show_banner,
+            stream_fps=stream_fps,
+            markdown=markdown,
+            plain=plain,
+            context_budget=context_budget,
+            keep_turns=keep_turns,
+            prompt_cache=prompt_cache,
+            resume=resume,
+            session_db=session_db,
+            save_session=save_session,
+            history_file=history_file,
+            telemetry_file=telemetry_file,
+            response_cache=response_cache,
+            tool_output_budget=tool_output_budget,
+            turn_output_budget=turn_output_budget,
+        ))
     except KeyboardInterrupt:
-        ui.print("")  # Add newlines
-        ui.print("[cyan]Thanks for using Bespoken. Goodbye![/cyan]")
-        ui.print("")  # Add final newline
+        # Interrupted outside of the chat loop, e.g. while the event loop shut down
+        _say_goodbye()
 
 
 def main():
     """Main entry point for the bespoken CLI."""
-    typer.run(chat)
+    if sys.argv[1:2] == ["batch"]:
+        from ._batch import batch_command
+        # Fold the subcommand into the program name so typer sees the batch arguments
+        sys.argv[0:2] = [f"{sys.argv[0]} batch"]
+        typer.run(batch_command)
+    else:
+        typer.run(chat)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""Headless batch mode: run a JSONL file of prompts through separate conversations."""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+import asyncio
+import json
+import time
+import uuid
+
+import typer
+
+from . import ui
+from .__main__ import _ThreadedChain, _async_tools, _expand_tools, _load_model
+from .output_budget import OutputBudget
+from .scheduling import ToolLock
+
+
+def _read_prompts(input_path: Path) -> List[dict]:
+    """Read prompt records from a JSONL file. Each line needs a "prompt" key."""
+    records = []
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            if "prompt" not in record:
+                raise ValueError(
+                    f"Line {line_number} of {input_path} has no 'prompt' key"
+                )
+            record.setdefault("id", str(line_number))
+            records.append(record)
+    return records
+
+
+async def _run_one(
+    model, is_async: bool, record: dict, system_prompt: Optional[str], tools
+) -> dict:
+    """Run one prompt as its own conversation and return the result record."""
+    started = time.perf_counter()
+    conversation_tools = tools() if callable(tools) else tools
+    if is_async and conversation_tools:
+        # Each conversation gets its own lock,
+        # so tools only serialize within a conversation
+        conversation = model.conversation(
+            tools=_async_tools(conversation_tools, ToolLock(), OutputBudget())
+        )
+    elif conversation_tools:
+        conversation = model.conversation(
+            tools=_expand_tools(conversation_tools, OutputBudget())
+        )
+    else:
+        conversation = model.conversation(tools=conversation_tools)
+
+    system = record.get("system", system_prompt)
+    if is_async:
+        chunks = conversation.chain(record["prompt"], system=system)
+    else:
+        threaded = _ThreadedChain()
+        chunks = threaded.iterate(conversation.chain(record["prompt"], system=system))
+
+    output = []
+    async for chunk in chunks:
+        output.append(chunk)
+
+    new_id = str(uuid.uuid4()).replace("-", "")[:24]
+    history = [{
+        "id": f"msg_{new_id}",
+        "role": "user",
+        "content": [{"text": record["prompt"], "type": "text"}],
+    }]
+    history.extend(response.response_json for response in conversation.responses)
+    return {
+        "id": record["id"],
+        "prompt": record["prompt"],
+        "output": "".join(output),
+        "history": history,
+        "error": None,
+        "duration": round(time.perf_counter() - started, 3),
+    }
+
+
+async def batch_async(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    model_name: str = "anthropic/claude-3-5-sonnet-20240620",
+    system_prompt: Optional[str] = None,
+    tools: Union[list, Callable[[], list], None] = None,
+    workers: int = 4,
+) -> int:
+    """Run each prompt in a JSONL file in its own conversation, `workers` at a time.
+
+    Results are appended to `output_path` as JSONL in the order they finish. Pass
+    `tools` as a function returning a fresh list of tools to give each conversation its
+    own (stateful) toolboxes. Returns the number of prompts that failed.
+    """
+    records = _read_prompts(Path(input_path))
+    model, is_async = _load_model(model_name)
+
+    # Sync models and blocking tools run on threads,
+    # so size the pool to the worker count
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max(workers, 1) * 2))
+    semaphore = asyncio.Semaphore(max(workers, 1))
+    failures = 0
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def run(record: dict) -> None:
+            nonlocal failures
+            async with semaphore:
+                try:
+                    result = await _run_one(
+                        model, is_async, record, system_prompt, tools
+                    )
+                except Exception as e:
+                    failures += 1
+                    result = {
+                        "id": record["id"],
+                        "prompt": record["prompt"],
+                        "output": None,
+                        "history": [],
+                        "error": f"{type(e).__name__}: {e}",
+                        "duration": None,
+                    }
+                    ui.tool_error(f"Prompt {record['id']} failed: {e}")
+                else:
+                    duration = result["duration"]
+                    ui.tool_success(f"Prompt {record['id']} done in {duration}s")
+            out.write(json.dumps(result, default=repr) + "\n")
+            out.flush()
+
+        await asyncio.gather(*(run(record) for record in records))
+
+    return failures
+
+
+def batch(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    model_name: str = "anthropic/claude-3-5-sonnet-20240620",
+    system_prompt: Optional[str] = None,
+    tools: Union[list, Callable[[], list], None] = None,
+    workers: int = 4,
+    auto_approve: bool = True,
+) -> int:
+    """Run a JSONL file of prompts headlessly, approving tool confirmations."""
+    ui.set_auto_approve(auto_approve)
+    try:
+        return asyncio.run(batch_async(
+            input_path,
+            output_path,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            tools=tools,
+            workers=workers,
+        ))
+    finally:
+        ui.set_auto_approve(False)
+
+
+def batch_command(
+    input_path: Path = typer.Argument(
+        ..., help="JSONL file with one {\"prompt\": ...} object per line"
+    ),
+    output_path: Path = typer.Option(
+        Path("results.jsonl"), "--output", "-o", help="JSONL file to append results to"
+    ),
+    model_name: str = typer.Option(
+        "anthropic/claude-3-5-sonnet-20240620", "--model", "-m", help="LLM model to use"
+    ),
+    system_prompt: Optional[str] = typer.Option(
+        None, "--system", "-s", help="System prompt for every conversation"
+    ),
+    workers: int = typer.Option(
+        4, "--workers", "-w", help="Number of conversations to run at the same time"
+    ),
+):
+    """Run a JSONL file of prompts through independent conversations."""
+    failures = batch(
+        input_path,
+        output_path,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        workers=workers,
+    )
+    if failures:
+        raise typer.Exit(1)
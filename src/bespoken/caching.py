@@ -0,0 +1,110 @@
+"""Provider prompt caching for chat sessions.
+
+The system prompt, the tool schemas and all earlier turns are the same on every
+request of a session, so providers that support prompt caching can reuse them. This
+module marks that stable prefix as cacheable, moves the cache breakpoint forward as
+the conversation grows, and reads the cache hit/miss counts back from the usage that
+providers report.
+"""
+
+import dataclasses
+from typing import List, Optional
+
+from llm.parts import Message, TextPart
+
+
+# Providers that need explicit breakpoints read them from the part metadata
+CACHE_CONTROL = {"anthropic": {"cache_control": {"type": "ephemeral"}}}
+
+# Usage keys for tokens read from the cache, and written to it, across providers
+CACHE_READ_KEYS = ("cache_read_input_tokens", "cached_tokens")
+CACHE_WRITE_KEYS = ("cache_creation_input_tokens", "cache_write_tokens")
+
+
+def cache_options(model) -> dict:
+    """Model options that switch on prompt caching, for models that have one."""
+    fields = getattr(getattr(model, "Options", None), "model_fields", {})
+    return {"cache": True} if "cache" in fields else {}
+
+
+def _strip_marker(metadata: Optional[dict]) -> Optional[dict]:
+    if not metadata or "anthropic" not in metadata:
+        return metadata
+    provider = {k: v for k, v in metadata["anthropic"].items() if k != "cache_control"}
+    metadata = {k: v for k, v in metadata.items() if k != "anthropic"}
+    if provider:
+        metadata["anthropic"] = provider
+    return metadata or None
+
+
+def _mark(message: Message, marked: bool) -> Message:
+    parts = list(message.parts)
+    for i, part in enumerate(parts):
+        metadata = _strip_marker(part.provider_metadata)
+        if marked and i == len(parts) - 1:
+            metadata = {**(metadata or {}), **CACHE_CONTROL}
+        if metadata != part.provider_metadata:
+            parts[i] = dataclasses.replace(part, provider_metadata=metadata)
+    return dataclasses.replace(message, parts=parts)
+
+
+def with_cache_breakpoints(
+    messages: List[Message], system: Optional[str] = None
+) -> List[Message]:
+    """Mark the stable prefix of a chain as cacheable.
+
+    The breakpoints sit at the end of the system prompt (which also covers the tool
+    schemas) and at the end of the history, just before the new turn. Breakpoints
+    from earlier turns are removed, providers only allow a few of them.
+    """
+    if not messages and system:
+        messages = [Message(role="system", parts=[TextPart(text=system)])]
+    last_system = max(
+        (i for i, m in enumerate(messages) if m.role == "system"), default=None
+    )
+    last = len(messages) - 1
+    return [
+        _mark(message, marked=i in (last_system, last) and bool(message.parts))
+        for i, message in enumerate(messages)
+    ]
+
+
+def _find(details, keys) -> int:
+    """Add up the values of the given keys anywhere in a (nested) usage dict."""
+    if not isinstance(details, dict):
+        return 0
+    total = 0
+    for key, value in details.items():
+        if key in keys and isinstance(value, int):
+            total += value
+        else:
+            total += _find(value, keys)
+    return total
+
+
+class CacheUsage:
+    """Cache hit/miss token counts for one or more responses."""
+
+    def __init__(
+        self, cache_read: int = 0, cache_write: int = 0, input_tokens: int = 0
+    ):
+        self.cache_read = cache_read
+        self.cache_write = cache_write
+        self.input_tokens = input_tokens
+
+    def __repr__(self):
+        return (
+            f"CacheUsage(cache_read={self.cache_read}, cache_write={self.cache_write}, "
+            f"input_tokens={self.input_tokens})"
+        )
+
+
+def cache_usage(responses) -> CacheUsage:
+    """Sum the cache hit/miss counts reported for finished responses."""
+    usage = CacheUsage()
+    for response in responses:
+        details = getattr(response, "token_details", None)
+        usage.cache_read += _find(details, CACHE_READ_KEYS)
+        usage.cache_write += _find(details, CACHE_WRITE_KEYS)
+        usage.input_tokens += getattr(response, "input_tokens", None) or 0
+    return usage
@@ -0,0 +1,180 @@
+"""Context compaction for long chat sessions.
+
+Every turn and tool result stays in the conversation, so long sessions get slower and
+more expensive until they no longer fit in the model's context window. A
+ContextCompactor keeps the message chain under a token budget: old tool outputs are
+replaced by short stubs first, and if that is not enough the older turns are folded
+into a single summary. The most recent turns are always kept verbatim.
+"""
+
+import dataclasses
+import json
+from typing import Callable, List, Optional
+
+from llm.parts import Message, ReasoningPart, TextPart, ToolCallPart, ToolResultPart
+
+
+# Rough size of a token, good enough to decide when to compact
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+SUMMARY_ACK = "Understood, I will continue from this summary."
+
+
+def estimate_tokens(messages: List[Message]) -> int:
+    """Estimate how many tokens a list of messages takes up."""
+    chars = 0
+    for message in messages:
+        for part in message.parts:
+            if isinstance(part, (TextPart, ReasoningPart)):
+                chars += len(part.text or "")
+            elif isinstance(part, ToolCallPart):
+                chars += len(part.name) + len(json.dumps(part.arguments, default=str))
+            elif isinstance(part, ToolResultPart):
+                chars += len(part.name) + len(str(part.output or ""))
+    return chars // CHARS_PER_TOKEN
+
+
+def conversation_messages(conversation) -> List[Message]:
+    """The message chain the next turn of a conversation builds on."""
+    if not conversation.responses:
+        # A resumed session starts from the history read back from storage
+        return list(conversation.loaded_messages or [])
+    last = conversation.responses[-1]
+    return list(last.prompt.messages) + list(last._messages_now())
+
+
+def _text(message: Message) -> str:
+    return "".join(part.text for part in message.parts if isinstance(part, TextPart))
+
+
+def _starts_turn(message: Message) -> bool:
+    """A turn starts with a message the user typed, tool results don't count."""
+    if message.role != "user":
+        return False
+    return any(isinstance(part, TextPart) for part in message.parts)
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+def summarize_turns(messages: List[Message]) -> str:
+    """Default summarizer: the start of each request and reply, plus the tools used."""
+    lines = []
+    tools_used = []
+    for message in messages:
+        text = _text(message)
+        if text.startswith(SUMMARY_PREFIX):
+            # An earlier summary is already short, carry it over as is
+            lines.append(text[len(SUMMARY_PREFIX):].strip())
+            continue
+        if message.role == "user" and text:
+            if tools_used:
+                lines.append(f"Tools used: {', '.join(tools_used)}")
+                tools_used = []
+            lines.append(f"User: {_shorten(text, 200)}")
+        elif message.role == "assistant":
+            if text.strip() and text != SUMMARY_ACK:
+                lines.append(f"Assistant: {_shorten(text, 200)}")
+            tools_used.extend(
+                part.name for part in message.parts if isinstance(part, ToolCallPart)
+            )
+    if tools_used:
+        lines.append(f"Tools used: {', '.join(tools_used)}")
+    return "\n".join(lines)
+
+
+class CompactionStats:
+    """Running totals of what compaction removed from the context."""
+
+    def __init__(self):
+        self.compactions = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def __repr__(self):
+        return (
+            f"CompactionStats(compactions={self.compactions}, "
+            f"tokens_before={self.tokens_before}, tokens_after={self.tokens_after}, "
+            f"tokens_saved={self.tokens_saved})"
+        )
+
+
+class ContextCompactor:
+    """Keeps a conversation's message chain under a token budget.
+
+    Args:
+        budget: Token budget for the history sent with each turn.
+        keep_turns: Number of most recent turns that are never touched.
+        summarizer: Callable that turns a list of messages into summary text.
+            Defaults to summarize_turns, which needs no model call.
+        stub_chars: Tool outputs shorter than this are left alone.
+    """
+
+    def __init__(
+        self,
+        budget: int = 100_000,
+        keep_turns: int = 4,
+        summarizer: Optional[Callable[[List[Message]], str]] = None,
+        stub_chars: int = 200,
+    ):
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self.summarizer = summarizer or summarize_turns
+        self.stub_chars = stub_chars
+        self.stats = CompactionStats()
+
+    def _stub(self, message: Message) -> Message:
+        parts = []
+        for part in message.parts:
+            output = str(part.output or "") if isinstance(part, ToolResultPart) else ""
+            if len(output) > self.stub_chars:
+                stub = (
+                    f"[Output of {part.name} removed to save context "
+                    f"({len(output)} characters)]"
+                )
+                part = dataclasses.replace(part, output=stub, attachments=[])
+            parts.append(part)
+        return dataclasses.replace(message, parts=parts)
+
+    def compact(self, messages: List[Message]) -> List[Message]:
+        """Return a chain that fits the budget, or the same list if it already does."""
+        before = estimate_tokens(messages)
+        if before <= self.budget:
+            return messages
+
+        head = 0
+        while head < len(messages) and messages[head].role == "system":
+            head += 1
+        system, rest = messages[:head], messages[head:]
+
+        # Everything before the last few turns may be compacted
+        starts = [i for i, message in enumerate(rest) if _starts_turn(message)]
+        if len(starts) <= self.keep_turns:
+            return messages
+        cut = starts[-self.keep_turns] if self.keep_turns > 0 else len(rest)
+        older, recent = rest[:cut], rest[cut:]
+
+        # First try dropping bulky tool outputs from the older turns
+        compacted = system + [self._stub(message) for message in older] + recent
+        if estimate_tokens(compacted) > self.budget:
+            summary = self.summarizer(older)
+            text = f"{SUMMARY_PREFIX}\n{summary}"
+            compacted = system + [
+                Message(role="user", parts=[TextPart(text=text)]),
+                Message(role="assistant", parts=[TextPart(text=SUMMARY_ACK)]),
+            ] + recent
+
+        after = estimate_tokens(compacted)
+        if after >= before:
+            return messages
+        self.stats.compactions += 1
+        self.stats.tokens_before += before
+        self.stats.tokens_after += after
+        return compacted
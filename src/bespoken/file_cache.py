@@ -0,0 +1,133 @@
+"""Session cache of file contents the model has already seen.
+
+Models re-read the same files over and over during an edit session, and every read
+sends the whole file again. While a FileCache is active, a whole-file read of a file
+the model has seen since (same mtime and size, or the same content hash when only the
+mtime changed) returns a short "unchanged" marker instead of the content. Writes and
+accepted replacements update the cache, since the model knows what it wrote.
+
+chat() activates a cache for its session, starts a turn for every prompt and clears the
+cache whenever earlier tool results may have left the context (compaction, /new).
+Outside of chat no cache is active and the tools always read the file.
+
+A read only counts as seen once the model got all of it. The output budget cuts tool
+output after the tool returned, so it records the reads of a call with track_reads and
+forgets them when it had to shorten the output.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+
+class FileCache:
+    """What the model last saw of each file: a stat key, a content hash and the turn.
+
+    Files longer than max_chars are never replaced by a marker, their earlier read may
+    have been cut down by the tool output budget.
+    """
+
+    def __init__(self, max_chars: Optional[int] = 40_000):
+        self.max_chars = max_chars
+        self.turn = 0
+        self.entries = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def start_turn(self) -> None:
+        self.turn += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def forget(self, path: Union[str, Path], entry: Optional[dict] = None) -> None:
+        """Drop what is known of path, or only entry if it is still the current one."""
+        path = Path(path)
+        with self.lock:
+            if entry is None or self.entries.get(path) is entry:
+                self.entries.pop(path, None)
+
+    def read(self, path: Union[str, Path], read_text: Callable[[], str]) -> str:
+        """The content of path, or a marker when the model has seen this version."""
+        path = Path(path)
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry and entry["key"] == key:
+            return self._unchanged(path, entry)
+        content = read_text()
+        digest = _digest(content)
+        if entry and entry["digest"] == digest:
+            # Touched but not changed
+            entry["key"] = key
+            return self._unchanged(path, entry)
+        self._remember(path, key, digest, content, "read")
+        return content
+
+    def update(self, path: Union[str, Path], content: str) -> None:
+        """Record content that was just written to path."""
+        path = Path(path)
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        self._remember(path, key, _digest(content), content, "wrote")
+
+    def _remember(
+        self, path: Path, key, digest: str, content: str, action: str
+    ) -> None:
+        with self.lock:
+            if self.max_chars is not None and len(content) > self.max_chars:
+                self.entries.pop(path, None)
+                return
+            entry = self.entries[path] = {
+                "key": key, "digest": digest, "turn": self.turn, "action": action,
+            }
+        reads = _reads.get()
+        if action == "read" and reads is not None:
+            reads.append((self, path, entry))
+
+    def _unchanged(self, path: Path, entry: dict) -> str:
+        self.hits += 1
+        if entry["turn"] == self.turn:
+            when = "earlier in this turn"
+        else:
+            when = f"in turn {entry['turn']}"
+        return (
+            f"[{path.name} is unchanged since you {entry['action']} it {when}, "
+            "use that content.]"
+        )
+
+
+def _digest(content: str) -> str:
+    data = content.encode("utf-8", errors="replace")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+_active: Optional[FileCache] = None
+
+_reads = contextvars.ContextVar("bespoken_file_cache_reads", default=None)
+
+
+@contextlib.contextmanager
+def track_reads():
+    """Collect the (cache, path, entry) of every read recorded inside the block."""
+    reads = []
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+def set_file_cache(cache: Optional[FileCache]) -> None:
+    """Make cache the one the file tools use, None turns caching off."""
+    global _active
+    _active = cache
+
+
+def get_file_cache() -> Optional[FileCache]:
+    return _active
@@ -1,18 +1,45 @@
 """File path completion for @ references in bespoken."""
 
-import os
 from pathlib import Path
 from typing import Iterable, List
 
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.document import Document
 
+from .workspace_index import get_workspace_index
+
+
+# Fuzzy matches from anywhere in the tree, offered after the directory's own entries
+MAX_FUZZY_COMPLETIONS = 20
+
 
 class FilePathCompleter(Completer):
     """Completer for file paths after @ symbol."""
     
     def __init__(self, base_path: str = "."):
         self.base_path = Path(base_path).resolve()
+        self._index = None
+    
+    @property
+    def index(self):
+        """The workspace index, shared with the file tools.
+        
+        Its walk starts at the first @ completion.
+        """
+        if self._index is None:
+            self._index = get_workspace_index(self.base_path)
+        return self._index
+    
+    def _list_dir(self, directory: Path) -> List[tuple]:
+        """Return the visible (name, is_dir) entries of a directory."""
+        relative = directory.relative_to(self.base_path).as_posix()
+        listing = self.index.list_dir("" if relative == "." else relative)
+        if listing is None:
+            return []
+        subdirs, files = listing
+        entries = [(name, True) for name in subdirs] + [(name, False) for name in files]
+        # Skip hidden files
+        return [(name, is_dir) for name, is_dir in entries if not name.startswith('.')]
     
     def get_completions(self, document: Document, complete_event) -> Iterable[Completion]:
         """Generate file path completions after @ symbol."""
@@ -63,11 +90,8 @@ class FilePathCompleter(Completer):
             # Get all files and directories in the search directory
             items = []
             try:
-                for item in search_dir.iterdir():
-                    if item.name.startswith('.'):
-                        continue  # Skip hidden files
-                    
-                    relative_path = item.relative_to(self.base_path)
+                for name, is_dir in self._list_dir(search_dir):
+                    relative_path = (search_dir / name).relative_to(self.base_path)
                     completion_text = str(relative_path)
                     
                     # Only include items that start with our current path part
@@ -82,7 +106,7 @@ class FilePathCompleter(Completer):
                     
                     # Add / for directories
                     display_text = completion_text
-                    if item.is_dir():
+                    if is_dir:
                         display_text += "/"
                         if not insert_text.endswith("/"):
                             insert_text += "/"
@@ -99,6 +123,21 @@ class FilePathCompleter(Completer):
                         display=display_text,
                         start_position=0
                     )
+                
+                # Then files anywhere in the tree whose name fuzzily matches,
+                # replacing what was typed
+                if path_part and not path_part.endswith("/"):
+                    offered = {display_text for _, display_text in items}
+                    for file in self.index.fuzzy(path_part, MAX_FUZZY_COMPLETIONS):
+                        if file.path in offered:
+                            continue
+                        if any(part.startswith('.') for part in file.path.split("/")):
+                            continue
+                        yield Completion(
+                            text=file.path,
+                            display=file.path,
+                            start_position=-len(path_part)
+                        )
                     
             except PermissionError:
                 # Skip directories we can't read
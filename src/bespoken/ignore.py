@@ -0,0 +1,173 @@
+""".gitignore and .ignore rules for walking a working directory.
+
+Covers the parts of the gitignore format that matter for listing and searching files:
+comments, negation with ``!``, directory-only patterns ending in ``/``, patterns
+anchored with a slash, and the ``*``, ``?``, ``[...]`` and ``**`` wildcards. Every
+directory's ignore files apply to the paths below it, later rules win.
+"""
+
+import os
+import re
+from typing import Iterator, List, Tuple
+
+
+IGNORE_FILES = (".gitignore", ".ignore")
+
+# Never worth walking into, whatever the ignore files say
+ALWAYS_IGNORED = frozenset({".git", ".hg", ".svn"})
+
+
+def translate(pattern: str, lines: bool = False) -> str:
+    """Turn a gitignore glob into a regex for a slash separated path.
+
+    With lines=True no wildcard matches a newline, so the regex can run over many
+    paths joined by newlines.
+    """
+    newline = "\\n" if lines else ""
+    anything = "[^\\n]*" if lines else ".*"
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append(f"(?:{anything}/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(anything)
+            i += 2
+            continue
+        if c == "*":
+            out.append(f"[^/{newline}]*")
+        elif c == "?":
+            out.append(f"[^/{newline}]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace(chr(92), chr(92) * 2)
+                if body.startswith("!"):
+                    body = "^" + newline + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class Rule:
+    """One line of an ignore file, relative to the directory holding it."""
+
+    __slots__ = ("base", "regex", "negate", "dir_only", "basename")
+
+    def __init__(self, base: str, pattern: str):
+        self.base = base
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Without a slash a pattern matches a name at any depth
+        self.basename = "/" not in pattern
+        self.regex = re.compile(translate(pattern.lstrip("/")) + r"\Z")
+
+    def match(self, path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not path.startswith(self.base + "/"):
+                return False
+            path = path[len(self.base) + 1:]
+        return self.regex.match(name if self.basename else path) is not None
+
+
+def parse(base: str, text: str) -> List[Rule]:
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("\\"):
+            line = line[1:]
+        rules.append(Rule(base, line))
+    return rules
+
+
+class IgnoreRules:
+    """The ignore rules in effect in one directory of a walk.
+
+    Paths are relative to the root of the walk, with forward slashes.
+    """
+
+    __slots__ = ("rules",)
+
+    def __init__(self, rules: Tuple[Rule, ...] = ()):
+        self.rules = rules
+
+    def enter(self, directory: str, relative: str) -> "IgnoreRules":
+        """The rules for a subdirectory (or the root), adding its own ignore files."""
+        added = []
+        for name in IGNORE_FILES:
+            try:
+                path = os.path.join(directory, name)
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    added.extend(parse(relative, f.read()))
+            except OSError:
+                continue
+        return IgnoreRules(self.rules + tuple(added)) if added else self
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        name = path.rsplit("/", 1)[-1]
+        if is_dir and name in ALWAYS_IGNORED:
+            return True
+        # The last matching rule decides
+        for rule in reversed(self.rules):
+            if rule.match(path, name, is_dir):
+                return not rule.negate
+        return False
+
+
+def load(root: str, relative: str = "") -> IgnoreRules:
+    """The rules in effect in root/relative, with the ignore files of its parents."""
+    rules = IgnoreRules().enter(root, "")
+    parts = [part for part in relative.split("/") if part]
+    for i in range(len(parts)):
+        rules = rules.enter(os.path.join(root, *parts[:i + 1]), "/".join(parts[:i + 1]))
+    return rules
+
+
+def walk(
+    root: str, relative: str = "", rules: IgnoreRules = None
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield (path relative to root, DirEntry) for the files under root/relative.
+
+    Files come in name order. Skips whatever the ignore rules exclude and does not
+    follow symlinked directories.
+    """
+    if rules is None:
+        rules = load(root, relative)
+    stack = [(os.path.join(root, relative) if relative else root, relative, rules)]
+    while stack:
+        directory, prefix, rules = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            path = f"{prefix}/{entry.name}" if prefix else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if rules.ignored(path, is_dir):
+                continue
+            if is_dir:
+                subdirectories.append((entry.path, path))
+            elif entry.is_file():
+                yield path, entry
+        # Reversed onto the stack so directories come out in name order
+        for directory, path in reversed(subdirectories):
+            stack.append((directory, path, rules.enter(directory, path)))
@@ -0,0 +1,59 @@
+"""Input history for the chat prompt."""
+
+import json
+from pathlib import Path
+from typing import Iterable, Union
+
+from prompt_toolkit.history import History
+
+
+class BoundedHistory(History):
+    """History that keeps the most recent entries only, optionally saved to a file.
+
+    The file holds one JSON string per line, so multi-line input survives. It is
+    rewritten with just the last max_entries entries once it grows to twice that.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, max_entries: int = 1000):
+        super().__init__()
+        self.path = Path(path).expanduser() if path else None
+        self.max_entries = max_entries
+        self._file_lines = None
+
+    def _read_lines(self) -> list:
+        if self.path is None or not self.path.exists():
+            return []
+        return self.path.read_text(encoding="utf-8").splitlines()
+
+    def load_history_strings(self) -> Iterable[str]:
+        lines = self._read_lines()
+        self._file_lines = len(lines)
+        strings = []
+        for line in lines[-self.max_entries:]:
+            try:
+                strings.append(json.loads(line))
+            except ValueError:
+                continue
+        # Newest first
+        return list(reversed(strings))
+
+    def append_string(self, string: str) -> None:
+        super().append_string(string)
+        del self._loaded_strings[self.max_entries:]
+
+    def store_string(self, string: str) -> None:
+        if self.path is None:
+            return
+        if self._file_lines is None:
+            self._file_lines = len(self._read_lines())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._file_lines >= 2 * self.max_entries:
+            # Compact the file down to what is kept in memory
+            entries = self._loaded_strings[::-1]
+            text = "".join(json.dumps(s) + "\n" for s in entries)
+            self.path.write_text(text, encoding="utf-8")
+            self._file_lines = len(entries)
+        else:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(string) + "\n")
+            self._file_lines += 1
@@ -0,0 +1,146 @@
+"""Ranged reads of large files through mmap and a sparse line index.
+
+Reading a line range should not mean decoding the whole file. A LineIndex keeps the
+number of newlines before every 64KB block of a file, counted on demand as far as a read
+needs. Finding the start of line n is then a binary search plus a scan of at most one
+block. Indexes are cached per path and rebuilt once the file's mtime or size changes.
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+
+BLOCK = 1 << 16
+
+MAX_INDEXES = 32
+
+
+class LineIndex:
+    """Newline counts per block of one version of a file."""
+
+    def __init__(self, stat: os.stat_result):
+        self.key = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        # newlines[i] is the number of newlines before byte i * BLOCK
+        self.newlines = array("Q", [0])
+        self.lock = threading.Lock()
+
+    @property
+    def scanned(self) -> bool:
+        return (len(self.newlines) - 1) * BLOCK >= self.size
+
+    def _extend(self, mm, newlines: int) -> None:
+        """Count blocks until `newlines` newlines are covered or the file ends."""
+        counts = self.newlines
+        while counts[-1] < newlines and not self.scanned:
+            start = (len(counts) - 1) * BLOCK
+            counts.append(counts[-1] + mm[start:start + BLOCK].count(b"\n"))
+
+    def line_offset(self, mm, line: int) -> Optional[int]:
+        """Byte offset where 0-based `line` starts, None past the end of the file."""
+        if line == 0:
+            return 0
+        with self.lock:
+            self._extend(mm, line)
+            counts = self.newlines
+            if counts[-1] < line:
+                return None
+            block = bisect_left(counts, line) - 1
+        position, remaining = block * BLOCK, line - counts[block]
+        while remaining:
+            position = mm.find(b"\n", position) + 1
+            remaining -= 1
+        return position
+
+    def line_count(self, mm) -> int:
+        """Number of lines in the file, scanning whatever is left of it."""
+        with self.lock:
+            self._extend(mm, self.size + 1)
+        count = self.newlines[-1]
+        if self.size and mm[self.size - 1:self.size] != b"\n":
+            count += 1
+        return count
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(path: Path, stat: os.stat_result) -> LineIndex:
+    """The cached index of path, or a new one when the file changed since."""
+    key = str(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None or index.key != (stat.st_mtime_ns, stat.st_size):
+            index = _indexes[key] = LineIndex(stat)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def read_lines(
+    path: Union[str, Path],
+    start: int = 1,
+    end: Optional[int] = None,
+    max_bytes: int = 1_000_000,
+) -> Tuple[str, int, bool]:
+    """Read lines start to end (1-based, inclusive, None for the rest of the file).
+
+    Stops early at max_bytes, on a line boundary unless a single line is longer. Returns
+    (text, last line read, whether more lines follow).
+    """
+    path = Path(path)
+    stat = path.stat()
+    if stat.st_size == 0:
+        return "", 0, False
+    start = max(start, 1)
+    if end is not None and end < start:
+        return "", start - 1, False
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = get_index(path, stat)
+        begin = index.line_offset(mm, start - 1)
+        if begin is None or begin >= stat.st_size:
+            return "", start - 1, False
+        stop = index.line_offset(mm, end) if end is not None else None
+        stop = stat.st_size if stop is None else stop
+        if stop - begin > max_bytes:
+            cut = mm.rfind(b"\n", begin, begin + max_bytes)
+            stop = cut + 1 if cut != -1 else begin + max_bytes
+        data = mm[begin:stop]
+        last = start - 1 + data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+        return data.decode("utf-8", errors="replace"), last, stop < stat.st_size
+
+
+def read_bytes(
+    path: Union[str, Path], offset: int = 0, length: int = 100_000
+) -> Tuple[str, int, bool]:
+    """Read length bytes from offset.
+
+    Returns (text, offset after the last byte read, whether more bytes follow). The end
+    offset counts the bytes in the file, decoding may have replaced some of them.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    offset = max(offset, 0)
+    with path.open("rb") as f:
+        f.seek(offset)
+        data = f.read(max(length, 0))
+    end = offset + len(data)
+    return data.decode("utf-8", errors="replace"), end, end < size
+
+
+def line_count(path: Union[str, Path]) -> int:
+    """Number of lines in a file, using (and filling) its cached index."""
+    path = Path(path)
+    stat = path.stat()
+    if stat.st_size == 0:
+        return 0
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return get_index(path, stat).line_count(mm)
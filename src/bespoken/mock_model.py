@@ -0,0 +1,214 @@
+"""An offline llm model, to run whole chat sessions without an API key or network.
+
+The ``bespoken-mock`` model is registered through bespoken's llm plugin entry point. It
+either replays a recorded session or streams synthetic text:
+
+* With a recording (a JSONL file, one model response per line) the nth response of a
+  conversation replays line n: its text chunks, its tool calls and its usage. Past the
+  end of the recording it streams synthetic text.
+* Without one it streams ``tokens`` words of made up text, ``chunk_size`` words per
+  chunk.
+
+``tokens_per_second`` paces both, 0 streams as fast as possible. The settings are model
+options (``llm -m bespoken-mock -o tokens_per_second 50``) and default to the
+``BESPOKEN_MOCK_*`` environment variables, so ``chat(model_name="bespoken-mock")`` can
+be configured from the outside.
+
+Record a real session with ``cached_model(model, Recording("session.jsonl"))``, the
+lines it writes are what the mock model replays.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Union
+
+import llm
+from pydantic import Field
+
+from .compaction import CHARS_PER_TOKEN
+from .response_cache import _decode_chunk
+
+
+MODEL_ID = "bespoken-mock"
+
+_WORDS = (
+    "the a model tool file read write line code test run loop token stream chunk "
+    "session cache context turn reply prompt user output input value result error "
+    "change edit check list search quick small large first next last fast slow"
+).split()
+
+
+class Recording:
+    """Appends each response of a wrapped model to a JSONL file, as they finish.
+
+    Has the get/put interface of ResponseCache, so
+    ``cached_model(model, Recording(path))`` records a session that never hits.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> None:
+        return None
+
+    def put(self, key: str, entry: dict) -> None:
+        with self.lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+def load_recording(path: Union[str, Path]) -> list:
+    """Read a recorded session, one response entry per non-empty line."""
+    lines = Path(path).expanduser().read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def synthetic_chunks(tokens: int, chunk_size: int = 1, seed: int = 0) -> list:
+    """Made up text of `tokens` words, split into chunks of `chunk_size` words."""
+    rng = random.Random(seed)
+    words = [rng.choice(_WORDS) + " " for _ in range(tokens)]
+    chunk_size = max(chunk_size, 1)
+    return ["".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+
+
+def _count_words(chunks) -> int:
+    return sum(len(chunk.split()) for chunk in chunks if isinstance(chunk, str))
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class _MockModelMixin:
+    model_id = MODEL_ID
+    can_stream = True
+    supports_tools = True
+
+    class Options(llm.Options):
+        recording: Optional[str] = Field(
+            default=None, description="JSONL file with recorded responses to replay"
+        )
+        tokens_per_second: Optional[float] = Field(
+            default=None, description="Streaming rate, 0 streams as fast as possible"
+        )
+        chunk_size: Optional[int] = Field(
+            default=None, description="Words per chunk of synthetic text"
+        )
+        tokens: Optional[int] = Field(
+            default=None, description="Length of a synthetic reply in words"
+        )
+
+    def __init__(
+        self, recording=None, tokens_per_second=None, chunk_size=None, tokens=None
+    ):
+        self.recording = recording or os.environ.get("BESPOKEN_MOCK_RECORDING")
+        if tokens_per_second is None:
+            tokens_per_second = _env_float("BESPOKEN_MOCK_TPS", 0)
+        self.tokens_per_second = tokens_per_second
+        self.chunk_size = chunk_size or int(_env_float("BESPOKEN_MOCK_CHUNK_SIZE", 1))
+        self.tokens = tokens or int(_env_float("BESPOKEN_MOCK_TOKENS", 200))
+        self._recordings = {}
+
+    def _entry(self, prompt) -> Optional[dict]:
+        """The recorded response for this point of the conversation, if there is one."""
+        path = prompt.options.recording or self.recording
+        if not path:
+            return None
+        if path not in self._recordings:
+            self._recordings[path] = load_recording(path)
+        entries = self._recordings[path]
+        # Every earlier response of the conversation left one assistant message behind
+        index = sum(1 for message in prompt.messages if message.role == "assistant")
+        return entries[index] if index < len(entries) else None
+
+    def _plan(self, prompt):
+        """Returns (entry, chunks, rate) for the response to stream."""
+        options = prompt.options
+        rate = options.tokens_per_second
+        if rate is None:
+            rate = self.tokens_per_second
+        entry = self._entry(prompt)
+        if entry is not None:
+            chunks = [_decode_chunk(chunk) for chunk in entry.get("chunks", [])]
+            return entry, chunks, rate
+        index = sum(1 for message in prompt.messages if message.role == "assistant")
+        chunks = synthetic_chunks(
+            options.tokens or self.tokens,
+            options.chunk_size or self.chunk_size,
+            seed=index,
+        )
+        return None, chunks, rate
+
+    def _finish(self, prompt, response, entry, chunks) -> None:
+        text = "".join(chunk for chunk in chunks if isinstance(chunk, str))
+        # Shaped like the messages chat() hands to its history callback
+        response.response_json = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "role": "assistant",
+            "content": [{"text": text, "type": "text"}],
+        }
+        if entry is not None:
+            for call in entry.get("tool_calls", []):
+                response.add_tool_call(llm.ToolCall(**call))
+            if entry.get("response_json") is not None:
+                response.response_json = entry["response_json"]
+            if entry.get("usage"):
+                response.set_usage(**entry["usage"])
+                return
+        prompt_chars = sum(len(str(message.to_dict())) for message in prompt.messages)
+        response.set_usage(
+            input=prompt_chars // CHARS_PER_TOKEN, output=_count_words(chunks)
+        )
+
+    @staticmethod
+    def _delays(chunks, rate):
+        """Seconds from the start of the response at which each chunk is due."""
+        due, tokens = [], 0
+        for chunk in chunks:
+            # The mock model counts a word as a token
+            tokens += _count_words([chunk])
+            due.append(tokens / rate if rate else 0)
+        return due
+
+
+class MockModel(_MockModelMixin, llm.Model):
+    """A sync model that replays recordings or streams synthetic text."""
+
+    def execute(self, prompt, stream, response, conversation):
+        entry, chunks, rate = self._plan(prompt)
+        started = time.perf_counter()
+        for chunk, due in zip(chunks, self._delays(chunks, rate)):
+            # Sleep until the chunk is due,
+            # so slow consumers don't slow the rate down further
+            wait = started + due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield chunk
+        self._finish(prompt, response, entry, chunks)
+
+
+class MockAsyncModel(_MockModelMixin, llm.AsyncModel):
+    """An async model that replays recordings or streams synthetic text."""
+
+    async def execute(self, prompt, stream, response, conversation):
+        entry, chunks, rate = self._plan(prompt)
+        started = time.perf_counter()
+        for chunk, due in zip(chunks, self._delays(chunks, rate)):
+            wait = started + due - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield chunk
+        self._finish(prompt, response, entry, chunks)
+
+
+@llm.hookimpl
+def register_models(register):
+    register(MockModel(), MockAsyncModel())
@@ -0,0 +1,139 @@
+"""Token budgets for tool output.
+
+A single tool call can return a whole log file or web page, and everything it returns
+is sent to the model again on every later turn. An OutputBudget caps what a tool call
+can return (per_tool) and what all tool calls of one turn can return together
+(per_turn). Output over the cap keeps its head and tail, and the lines in between are
+replaced by a marker that says how much was left out and how to ask for it.
+
+Every tool handed to chat() goes through the budget (see ``_expand_tools`` in
+``__main__``). Tools say how the model can get the elided part with @output_hint.
+Tools that read whole files or pages also elide their output to TOOL_MAX_TOKENS
+themselves, so they stay bounded when they are used with llm directly.
+"""
+
+import functools
+import inspect
+import threading
+from typing import Callable, Optional
+
+import llm
+
+from .compaction import CHARS_PER_TOKEN
+from .file_cache import track_reads
+
+
+OUTPUT_HINT = "_bespoken_output_hint"
+
+DEFAULT_HINT = "Ask for a smaller, more specific part to see them."
+
+# Even an exhausted turn budget leaves room for the head, tail and the marker
+MIN_TOKENS = 200
+
+# What tools that read files or pages return at most on their own, outside of a chat
+# too (the 50,000 characters they always cut at)
+TOOL_MAX_TOKENS = 12_500
+
+
+def output_hint(hint: str) -> Callable:
+    """Tell the model how to get the part of this tool's output that was left out."""
+    def decorate(function: Callable) -> Callable:
+        setattr(function, OUTPUT_HINT, hint)
+        return function
+    return decorate
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def elide(text: str, max_tokens: int, hint: str = DEFAULT_HINT) -> str:
+    """Keep the head and tail of text within max_tokens, marking the cut out middle."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head_end = max_chars * 2 // 3
+    tail_start = len(text) - (max_chars - head_end)
+    # Cut at line breaks when there is one close by, so no line is shown half
+    newline = text.rfind("\n", head_end // 2, head_end)
+    if newline != -1:
+        head_end = newline + 1
+    newline = text.find("\n", tail_start, tail_start + (len(text) - tail_start) // 2)
+    if newline != -1:
+        tail_start = newline + 1
+    lines = text.count("\n", head_end, tail_start)
+    tokens = estimate_tokens(text[head_end:tail_start])
+    marker = f"[... {lines:,} lines (~{tokens:,} tokens) left out. {hint} ...]\n"
+    if not text[:head_end].endswith("\n"):
+        marker = "\n" + marker
+    return text[:head_end] + marker + text[tail_start:]
+
+
+class OutputBudget:
+    """Per tool call and per turn token caps on tool output. None turns a cap off."""
+
+    def __init__(
+        self, per_tool: Optional[int] = 10_000, per_turn: Optional[int] = 40_000
+    ):
+        self.per_tool = per_tool
+        self.per_turn = per_turn
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def start_turn(self) -> None:
+        with self.lock:
+            self.used = 0
+
+    def fit(self, text: str, hint: str = DEFAULT_HINT) -> str:
+        """Cut text down to what this call may still return, and count it."""
+        with self.lock:
+            limit = self.per_tool
+            if self.per_turn is not None:
+                left = max(self.per_turn - self.used, MIN_TOKENS)
+                # Only earlier calls of the turn make the cut
+                # tighter than a call gets on its own
+                if left < (self.per_turn if limit is None else limit):
+                    hint = f"Little of this turn's tool output budget is left. {hint}"
+                if limit is None or left < limit:
+                    limit = left
+            if limit is not None:
+                text = elide(text, limit, hint)
+            self.used += estimate_tokens(text)
+        return text
+
+    def wrap(self, function: Callable) -> Callable:
+        """Make a tool implementation return output that fits the budget."""
+        hint = getattr(function, OUTPUT_HINT, DEFAULT_HINT)
+
+        def fit(result, reads):
+            if isinstance(result, llm.ToolOutput):
+                output = self.fit(result.output, hint)
+                shortened = output != result.output
+                result = llm.ToolOutput(output=output, attachments=result.attachments)
+            elif isinstance(result, str):
+                output = self.fit(result, hint)
+                shortened = output != result
+                result = output
+            else:
+                return result
+            if shortened:
+                # The model never saw these files whole,
+                # the next read has to send them again
+                for cache, path, entry in reads:
+                    cache.forget(path, entry)
+            return result
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def run_async(*args, **kwargs):
+                with track_reads() as reads:
+                    result = await function(*args, **kwargs)
+                return fit(result, reads)
+            return run_async
+
+        @functools.wraps(function)
+        def run(*args, **kwargs):
+            with track_reads() as reads:
+                result = function(*args, **kwargs)
+            return fit(result, reads)
+        return run
@@ -0,0 +1,223 @@
+"""On-disk cache of model responses, for fast and free development loops.
+
+A cached model wraps a real llm model. Every request is keyed on the model id, the
+system prompt, the tool schemas, the options and the full message history. On a hit
+the recorded chunks, tool calls and usage are replayed without calling the API, on a
+miss the real model is called and its response is recorded. Entries are evicted least
+recently used first once the cache grows past its size cap.
+"""
+
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import llm
+from llm.parts import StreamEvent
+
+
+DEFAULT_CACHE = Path.home() / ".bespoken" / "response_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+class ResponseCache:
+    """SQLite store of recorded responses with LRU eviction past max_bytes."""
+
+    def __init__(
+        self, path: Union[str, Path, None] = None, max_bytes: int = 100_000_000
+    ):
+        self.path = Path(path).expanduser() if path else DEFAULT_CACHE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, entry: dict) -> None:
+        value = json.dumps(entry, default=str)
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Evict the least recently used entries until the cache fits again
+            evict = []
+            rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_used")
+            for old_key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evict.append((old_key,))
+                total -= size
+            self.db.executemany("DELETE FROM entries WHERE key = ?", evict)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def cache_key(model_id: str, prompt) -> str:
+    """Hash everything that determines what the model will answer."""
+    tools = [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.input_schema,
+        }
+        for tool in (prompt.tools or [])
+        if isinstance(tool, llm.Tool)
+    ]
+    payload = {
+        "model": model_id,
+        "system": prompt.system,
+        "tools": tools,
+        "options": (
+            prompt.options.model_dump(exclude_none=True) if prompt.options else {}
+        ),
+        "messages": [message.to_dict() for message in prompt.messages],
+        "schema": prompt.schema,
+    }
+    data = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _encode_chunk(chunk):
+    if isinstance(chunk, StreamEvent):
+        return {"event": dataclasses.asdict(chunk)}
+    return chunk
+
+
+def _decode_chunk(chunk):
+    if isinstance(chunk, dict):
+        return StreamEvent(**chunk["event"])
+    return chunk
+
+
+def _record(chunks, response) -> dict:
+    return {
+        "chunks": [_encode_chunk(chunk) for chunk in chunks],
+        "tool_calls": [
+            {
+                "name": call.name,
+                "arguments": call.arguments,
+                "tool_call_id": call.tool_call_id,
+            }
+            for call in response._tool_calls
+        ],
+        "usage": {
+            "input": response.input_tokens,
+            "output": response.output_tokens,
+            "details": response.token_details,
+        },
+        "response_json": response.response_json,
+    }
+
+
+def _replay_calls(entry: dict, response) -> None:
+    for call in entry["tool_calls"]:
+        response.add_tool_call(llm.ToolCall(**call))
+    response.set_usage(**entry["usage"])
+    response.response_json = entry["response_json"]
+
+
+class _CachedModelMixin:
+    def __init__(self, model, cache: ResponseCache):
+        self.model = model
+        self.cache = cache
+        self.model_id = model.model_id
+        self.can_stream = model.can_stream
+        self.attachment_types = model.attachment_types
+        self.supports_schema = model.supports_schema
+        self.supports_tools = model.supports_tools
+        self.Options = model.Options
+
+    def __getattr__(self, name):
+        # Anything else (e.g. provider specific settings) comes from the real model
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _inner_execute(self, prompt, stream, response, conversation):
+        if isinstance(self.model, (llm.KeyModel, llm.AsyncKeyModel)):
+            return self.model.execute(
+                prompt, stream, response, conversation, key=self.model.get_key()
+            )
+        return self.model.execute(prompt, stream, response, conversation)
+
+
+class CachedModel(_CachedModelMixin, llm.Model):
+    """A sync model that answers from the response cache when it can."""
+
+    def execute(self, prompt, stream, response, conversation):
+        key = cache_key(self.model_id, prompt)
+        entry = self.cache.get(key)
+        if entry is not None:
+            for chunk in entry["chunks"]:
+                yield _decode_chunk(chunk)
+            _replay_calls(entry, response)
+            return
+        chunks = []
+        for chunk in self._inner_execute(prompt, stream, response, conversation):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, _record(chunks, response))
+
+
+class CachedAsyncModel(_CachedModelMixin, llm.AsyncModel):
+    """An async model that answers from the response cache when it can."""
+
+    async def execute(self, prompt, stream, response, conversation):
+        key = cache_key(self.model_id, prompt)
+        entry = self.cache.get(key)
+        if entry is not None:
+            for chunk in entry["chunks"]:
+                yield _decode_chunk(chunk)
+            _replay_calls(entry, response)
+            return
+        chunks = []
+        async for chunk in self._inner_execute(prompt, stream, response, conversation):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, _record(chunks, response))
+
+
+def cached_model(model, cache: ResponseCache):
+    """Wrap a sync or async llm model so its responses go through the cache."""
+    if isinstance(model, (llm.AsyncModel, llm.AsyncKeyModel)):
+        return CachedAsyncModel(model, cache)
+    return CachedModel(model, cache)
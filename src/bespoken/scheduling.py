@@ -0,0 +1,209 @@
+"""Run the independent tool calls of one model response at the same time.
+
+Tools marked with @read_only neither change anything nor ask the user anything, so
+several of them can run side by side on a thread pool. Everything else, and with that
+every tool that may ask for confirmation, keeps running one call at a time.
+
+Async models already start all tool calls of a response together, so read-only tools
+only have to share the ToolLock instead of taking it (see ``_in_thread`` in
+``__main__``). Sync models run tool calls one after another, so ToolScheduler starts the
+leading read-only calls of a response on its pool as soon as the response has finished,
+and each call picks up its result when llm gets to it. Either way a read-only call never
+overlaps a call that came before it and changes something, and results stay in the order
+the model asked.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple
+
+import llm
+
+
+READ_ONLY = "_bespoken_read_only"
+
+
+def read_only(function: Callable) -> Callable:
+    """Mark a tool as safe to run alongside other calls: no side effects, no prompts."""
+    setattr(function, READ_ONLY, True)
+    return function
+
+
+def is_read_only(function) -> bool:
+    # Bound methods pass attribute lookups on to their function
+    return bool(getattr(function, READ_ONLY, False))
+
+
+class ToolLock:
+    """An asyncio lock that read-only tool calls can share, handed out in arrival order.
+    
+    ``async with lock`` takes it exclusively, like an asyncio.Lock. ``lock.shared()``
+    lets any number of read-only calls in, but not past an exclusive holder that arrived
+    first, and an exclusive holder waits for the readers that arrived before it.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.readers = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    @contextlib.asynccontextmanager
+    async def shared(self):
+        async with self.lock:
+            self.readers += 1
+            self.idle.clear()
+        try:
+            yield
+        finally:
+            self.readers -= 1
+            if not self.readers:
+                self.idle.set()
+
+    async def __aenter__(self):
+        await self.lock.acquire()
+        try:
+            await self.idle.wait()
+        except BaseException:
+            self.lock.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.lock.release()
+
+
+class ToolScheduler:
+    """Runs the read-only tool calls of a sync model's response concurrently."""
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="bespoken-tool"
+        )
+        self.pending = {}
+        # (submitted, finished) perf_counter times of the calls started ahead of time
+        self.spans = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, tools: list) -> list:
+        """Let the read-only tools pick up results that were started ahead of time."""
+        wrapped = []
+        for tool in tools:
+            if (
+                isinstance(tool, llm.Tool) and tool.implementation
+                and is_read_only(tool.implementation)
+            ):
+                tool = dataclasses.replace(
+                    tool, implementation=self._prefetched(tool.implementation)
+                )
+            wrapped.append(tool)
+        return wrapped
+
+    def _prefetched(self, function):
+        signature = inspect.signature(function)
+        wants_tool_call = "llm_tool_call" in signature.parameters
+
+        @functools.wraps(function)
+        def run(llm_tool_call=None, **kwargs):
+            with self.lock:
+                future = None
+                if llm_tool_call:
+                    future = self.pending.pop(llm_tool_call.tool_call_id, None)
+            if future is not None:
+                return future.result()
+            if wants_tool_call:
+                kwargs["llm_tool_call"] = llm_tool_call
+            return function(**kwargs)
+
+        run.scheduler = self
+        # llm only passes the ToolCall to implementations that name it
+        if not wants_tool_call:
+            parameters = list(signature.parameters.values())
+            parameters.append(inspect.Parameter(
+                "llm_tool_call", inspect.Parameter.KEYWORD_ONLY, default=None
+            ))
+            run.__signature__ = signature.replace(parameters=parameters)
+        return run
+
+    def prefetch(self, response, before: Optional[Callable] = None) -> None:
+        """Start the read-only calls at the front of a finished response on the pool."""
+        # Only tools wrapped by this scheduler pick their results up,
+        # others would run twice
+        ours = {
+            tool.name: tool.implementation.__wrapped__
+            for tool in response.prompt.tools
+            if isinstance(tool, llm.Tool)
+            and getattr(tool.implementation, "scheduler", None) is self
+        }
+        calls = []
+        for call in response.tool_calls():
+            # Calls after one that may change something have to wait for it
+            if not call.tool_call_id or call.name not in ours:
+                break
+            calls.append(call)
+        # A single call gains nothing from running ahead
+        if len(calls) < 2:
+            return
+        if before:
+            before()
+        for call in calls:
+            function = ours[call.name]
+            arguments = dict(call.arguments)
+            if "llm_tool_call" in inspect.signature(function).parameters:
+                arguments["llm_tool_call"] = call
+            with self.lock:
+                self.spans[call.tool_call_id] = [time.perf_counter(), None]
+                self.pending[call.tool_call_id] = self.executor.submit(
+                    self._timed, call.tool_call_id, function, arguments
+                )
+
+    def _timed(self, tool_call_id, function, arguments):
+        try:
+            return function(**arguments)
+        finally:
+            with self.lock:
+                span = self.spans.get(tool_call_id)
+                if span is not None:
+                    span[1] = time.perf_counter()
+
+    def span(self, tool_call_id) -> Optional[Tuple[float, float]]:
+        """(submitted, finished) of a finished call that was started ahead of time."""
+        with self.lock:
+            span = self.spans.get(tool_call_id)
+        return tuple(span) if span and span[1] is not None else None
+
+    def stream(
+        self, chain, before_prefetch: Optional[Callable] = None
+    ) -> Iterator[str]:
+        """Iterate a sync chain like llm does, prefetching calls after each response.
+        
+        before_prefetch runs before any calls are started, e.g. to finish the text.
+        """
+        last_char = ""
+        try:
+            for response in chain.responses():
+                first_chunk = True
+                for chunk in response:
+                    if not chunk:
+                        continue
+                    # Keep consecutive responses apart, as llm's own chain iterator does
+                    if (
+                        first_chunk and last_char
+                        and not last_char.isspace() and not chunk[0].isspace()
+                    ):
+                        yield " "
+                    first_chunk = False
+                    yield chunk
+                    last_char = chunk[-1]
+                self.prefetch(response, before_prefetch)
+        finally:
+            # Calls that llm never got to (cancelled, or the chain failed) are dropped
+            with self.lock:
+                self.pending.clear()
+                self.spans.clear()
@@ -0,0 +1,262 @@
+"""Search file contents for a pattern, in parallel across threads.
+
+The files to search come from a walk that honors the ignore rules (see ``ignore.walk``).
+They are cut into batches of roughly equal size, and the batches of a big search run on
+a shared thread pool, so reading one file overlaps with matching another. Small
+searches stay on the calling thread, where handing out batches costs more than it saves.
+
+Worker processes would also run the matching in parallel, but spawned workers import the
+caller's ``__main__`` again, and scripts that call ``chat()`` at module level, as the
+README does, would then start the app once per worker.
+
+Workers only report line numbers and the text of the lines around each match. The
+caps on matches per file and in total, and the formatting, are applied here, in the
+order of the walk, so the result does not depend on which batch finished first.
+"""
+
+import collections
+import itertools
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+# Files are checked for a NUL byte in this many leading bytes to tell binaries apart
+BINARY_CHECK_BYTES = 8192
+
+# A batch is closed once it holds this many bytes or files
+BATCH_BYTES = 1 << 20
+BATCH_FILES = 256
+
+# Less than this is searched on the calling thread
+PARALLEL_BYTES = 4 << 20
+
+# Files are read whole, so bigger ones (logs, data dumps)
+# are skipped and reported instead
+MAX_FILE_BYTES = 32 << 20
+
+MAX_WORKERS = 8
+
+# Longer lines are cut in the output, minified files would otherwise flood it
+MAX_LINE_CHARS = 300
+
+
+class FileMatches(NamedTuple):
+    path: str
+    # Line numbers (1-based) of the first matches, at most max_per_file of them
+    hits: List[int]
+    # All matches in the file, including those past max_per_file
+    total: int
+    # Text of the hit lines and their context lines
+    lines: Dict[int, str]
+
+
+class SearchResult(NamedTuple):
+    files: List[FileMatches]
+    searched: int
+    binaries: int
+    # Relative paths of the files skipped for being over max_file_bytes
+    too_large: List[str]
+
+
+def compile_pattern(
+    pattern: str, literal: bool = False, ignore_case: bool = False
+) -> "re.Pattern":
+    """Raises re.error for an invalid regular expression.
+
+    ^ and $ match at line boundaries, so the whole-file check in search_file finds
+    anchored matches anywhere in the file.
+    """
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(re.escape(pattern) if literal else pattern, flags)
+
+
+def search_file(
+    path: str,
+    relative: str,
+    regex: "re.Pattern",
+    needle: Optional[bytes],
+    context: int,
+    max_per_file: int,
+) -> Optional[FileMatches]:
+    """Matches of regex in one file, or None. Binary files raise ValueError."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"\0" in data[:BINARY_CHECK_BYTES]:
+        raise ValueError("binary file")
+    # A literal, case sensitive pattern can rule out most files before decoding
+    if needle is not None and needle not in data:
+        return None
+    text = data.decode("utf-8", errors="replace")
+    if regex.search(text) is None:
+        return None
+    all_lines = text.splitlines()
+    hits, total = [], 0
+    for number, line in enumerate(all_lines, 1):
+        if regex.search(line):
+            total += 1
+            if len(hits) < max_per_file:
+                hits.append(number)
+    if not hits:
+        # The pattern only matched across a line break
+        return None
+    lines = {}
+    for number in hits:
+        last = min(number + context, len(all_lines))
+        for n in range(max(number - context, 1), last + 1):
+            if n not in lines:
+                line = all_lines[n - 1]
+                if len(line) > MAX_LINE_CHARS:
+                    line = line[:MAX_LINE_CHARS] + " [...]"
+                lines[n] = line
+    return FileMatches(relative, hits, total, lines)
+
+
+def search_batch(
+    batch: List[Tuple[str, str]],
+    pattern: str,
+    literal: bool,
+    ignore_case: bool,
+    context: int,
+    max_per_file: int,
+) -> Tuple[List[FileMatches], int]:
+    """Search a batch of (path, relative path) files. Runs on the worker threads.
+
+    Returns the files with matches and the number of binaries skipped.
+    """
+    regex = compile_pattern(pattern, literal, ignore_case)
+    needle = pattern.encode("utf-8") if literal and not ignore_case else None
+    found, binaries = [], 0
+    for path, relative in batch:
+        try:
+            matches = search_file(path, relative, regex, needle, context, max_per_file)
+        except ValueError:
+            binaries += 1
+            continue
+        except OSError:
+            continue
+        if matches:
+            found.append(matches)
+    return found, binaries
+
+
+def batches(files: Iterable[Tuple[str, str, int]]) -> List[List[Tuple[str, str]]]:
+    """Cut (path, relative path, size) files into batches of about BATCH_BYTES."""
+    result, batch, size = [], [], 0
+    for path, relative, file_size in files:
+        batch.append((path, relative))
+        size += file_size
+        if size >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+            result.append(batch)
+            batch, size = [], 0
+    if batch:
+        result.append(batch)
+    return result
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ThreadPoolExecutor:
+    """The shared worker pool, started on first use and kept for the session."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(workers, thread_name_prefix="bespoken-search")
+            _pool_workers = workers
+        return _pool
+
+
+def default_workers() -> int:
+    return min(os.cpu_count() or 1, MAX_WORKERS)
+
+
+def search_contents(
+    files: Iterable[Tuple[str, str, int]],
+    pattern: str,
+    literal: bool = False,
+    ignore_case: bool = False,
+    context: int = 0,
+    max_per_file: int = 20,
+    max_results: int = 200,
+    workers: Optional[int] = None,
+    max_file_bytes: Optional[int] = MAX_FILE_BYTES,
+) -> SearchResult:
+    """Search (path, relative path, size) files, keeping the first max_results hits.
+
+    Files over max_file_bytes are not read, None searches files of any size. Raises
+    re.error for an invalid regular expression, before any file is read.
+    """
+    compile_pattern(pattern, literal, ignore_case)
+    files, too_large = list(files), []
+    if max_file_bytes is not None:
+        too_large = [relative for _, relative, size in files if size > max_file_bytes]
+        files = [file for file in files if file[2] <= max_file_bytes]
+    work = batches(files)
+    arguments = (pattern, literal, ignore_case, context, max_per_file)
+    workers = default_workers() if workers is None else workers
+    total_bytes = sum(size for _, _, size in files)
+    parallel = workers > 1 and len(work) > 1 and total_bytes >= PARALLEL_BYTES
+    futures = collections.deque()
+    if parallel:
+        pool = _get_pool(workers)
+
+        def run():
+            # A few batches per worker in flight,
+            # so stopping at max_results wastes little
+            pending = iter(work)
+            for batch in itertools.islice(pending, workers * 2):
+                futures.append(pool.submit(search_batch, batch, *arguments))
+            while futures:
+                result = futures.popleft().result()
+                for batch in itertools.islice(pending, 1):
+                    futures.append(pool.submit(search_batch, batch, *arguments))
+                yield result
+
+        results = run()
+    else:
+        results = (search_batch(batch, *arguments) for batch in work)
+
+    found, binaries, shown = [], 0, 0
+    try:
+        for matches, skipped in results:
+            binaries += skipped
+            for file in matches:
+                found.append(file)
+                shown += len(file.hits)
+                if shown >= max_results:
+                    return SearchResult(found, len(files), binaries, too_large)
+    finally:
+        for future in futures:
+            future.cancel()
+    return SearchResult(found, len(files), binaries, too_large)
+
+
+def format_matches(file: FileMatches, context: int, limit: int) -> List[str]:
+    """Output lines for the first `limit` hits of a file, grep style.
+
+    Hits read ``path:line: text`` and context lines ``path-line- text``, with ``--``
+    between groups of lines that are not adjacent.
+    """
+    hits = file.hits[:limit]
+    hit_set = set(hits)
+    numbers = sorted({
+        n
+        for number in hits
+        for n in range(number - context, number + context + 1)
+        if n in file.lines
+    })
+    out, previous = [], None
+    for n in numbers:
+        if previous is not None and n > previous + 1:
+            out.append("--")
+        separator = ":" if n in hit_set else "-"
+        out.append(f"{file.path}{separator}{n}{separator} {file.lines[n]}")
+        previous = n
+    return out
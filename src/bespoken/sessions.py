@@ -0,0 +1,155 @@
+"""SQLite-backed storage for chat sessions.
+
+Every message of a session is stored as its own row, keyed by session id and sequence
+number, so saving a turn is a single append and a resumed session can read back just
+the messages it needs instead of parsing the whole history up front.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Sequence
+from pathlib import Path
+from typing import List, Optional, Union
+
+from llm.parts import Message
+
+
+DEFAULT_DB = Path.home() / ".bespoken" / "sessions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    model TEXT,
+    created REAL,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+
+class SessionStore:
+    """Stores chat sessions in a SQLite database running in WAL mode."""
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        self.path = Path(path) if path else DEFAULT_DB
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Connections are shared with worker threads, so guard them with a lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def create(self, model: Optional[str] = None) -> str:
+        """Start a new session and return its id."""
+        session_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO sessions (id, model, created, updated) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, model, now, now),
+            )
+        return session_id
+
+    def exists(self, session_id: str) -> bool:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def count(self, session_id: str) -> int:
+        """Number of messages stored for a session."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return row[0]
+
+    def append(self, session_id: str, messages: List[Message]) -> None:
+        """Append the messages of a turn in a single transaction."""
+        if not messages:
+            return
+        with self.lock, self.db:
+            start = self.db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()[0]
+            self.db.executemany(
+                "INSERT INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [
+                    (session_id, start + i, json.dumps(message.to_dict(), default=str))
+                    for i, message in enumerate(messages)
+                ],
+            )
+            self.db.execute(
+                "UPDATE sessions SET updated = ? WHERE id = ?",
+                (time.time(), session_id),
+            )
+
+    def rows(self, session_id: str, start: int, stop: int) -> List[str]:
+        """Raw JSON of the messages with sequence numbers in [start, stop)."""
+        with self.lock:
+            return [
+                row[0]
+                for row in self.db.execute(
+                    "SELECT message FROM messages "
+                    "WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                    (session_id, start, stop),
+                )
+            ]
+
+    def load(self, session_id: str) -> "LazyMessages":
+        """The messages of a session, read from the database as they are accessed."""
+        return LazyMessages(self, session_id, self.count(session_id))
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+class LazyMessages(Sequence):
+    """A read-only list of stored messages, fetched and parsed a page at a time."""
+
+    def __init__(
+        self, store: SessionStore, session_id: str, length: int, page_size: int = 256
+    ):
+        self.store = store
+        self.session_id = session_id
+        self.length = length
+        self.page_size = page_size
+        self.pages = {}
+
+    def __len__(self):
+        return self.length
+
+    def _page(self, number: int) -> List[Message]:
+        if number not in self.pages:
+            start = number * self.page_size
+            stop = min(start + self.page_size, self.length)
+            rows = self.store.rows(self.session_id, start, stop)
+            self.pages[number] = [Message.from_dict(json.loads(row)) for row in rows]
+        return self.pages[number]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("message index out of range")
+        return self._page(index // self.page_size)[index % self.page_size]
+
+    def __iter__(self):
+        for number in range((self.length + self.page_size - 1) // self.page_size):
+            yield from self._page(number)
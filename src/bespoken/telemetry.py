@@ -0,0 +1,135 @@
+"""Per-turn latency and throughput numbers for chat sessions."""
+
+import json
+import math
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def covered(intervals: List[Tuple[float, float]]) -> float:
+    """Total length of the union of (start, end) intervals, overlaps counted once."""
+    total, reach = 0.0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+
+class Telemetry:
+    """Keeps a record per turn in a ring buffer, and optionally in a JSONL file.
+
+    A record holds the time to first token, total model time, output tokens, tokens per
+    second and the duration and output size of every tool call in the turn. Tool calls
+    also keep their start and end, in seconds from the start of the turn. Calls that ran
+    side by side count once towards the turn's tool time.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, capacity: int = 1000):
+        self.path = Path(path).expanduser() if path else None
+        self.records = deque(maxlen=capacity)
+        self.turn = None
+
+    def start_turn(self, started: Optional[float] = None) -> None:
+        """Begin a turn, started is the time.perf_counter() when the user hit enter."""
+        self.turn = {
+            "started": started or time.perf_counter(),
+            "first_token": None, "tools": [], "pending": {},
+        }
+
+    def first_token(self) -> None:
+        if self.turn and self.turn["first_token"] is None:
+            self.turn["first_token"] = time.perf_counter() - self.turn["started"]
+
+    def tool_started(self, tool_call_id) -> None:
+        if self.turn:
+            self.turn["pending"][tool_call_id] = time.perf_counter()
+
+    def tool_finished(
+        self,
+        tool_call_id,
+        name: str,
+        output,
+        span: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        """Record a finished call.
+
+        span is its (start, end) in time.perf_counter() values when it did not run
+        between tool_started and now, e.g. a call that was started ahead of time.
+        """
+        if not self.turn:
+            return
+        started = self.turn["pending"].pop(tool_call_id, None)
+        finished = time.perf_counter()
+        if span is not None:
+            started, finished = span
+        tool = {
+            "name": name,
+            "duration": finished - started if started is not None else None,
+            "output_chars": len(str(output or "")),
+        }
+        if started is not None:
+            tool["start"] = started - self.turn["started"]
+            tool["end"] = finished - self.turn["started"]
+        self.turn["tools"].append(tool)
+
+    def end_turn(self, output_tokens: int) -> Optional[dict]:
+        """Close the current turn and store its record."""
+        if not self.turn:
+            return None
+        turn, self.turn = self.turn, None
+        total = time.perf_counter() - turn["started"]
+        tool_time = covered(
+            [(tool["start"], tool["end"]) for tool in turn["tools"] if "start" in tool]
+        )
+        model_time = max(total - tool_time, 0)
+        record = {
+            "timestamp": time.time(),
+            "time_to_first_token": turn["first_token"],
+            "model_time": model_time,
+            "total_time": total,
+            "tool_time": tool_time,
+            "output_tokens": output_tokens,
+            "tokens_per_second": output_tokens / model_time if model_time else None,
+            "tools": turn["tools"],
+        }
+        self.records.append(record)
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """p50 and p95 of every metric over the recorded turns."""
+        tools = [tool for record in self.records for tool in record["tools"]]
+        series = {
+            "time_to_first_token": [r["time_to_first_token"] for r in self.records],
+            "tokens_per_second": [r["tokens_per_second"] for r in self.records],
+            "model_time": [r["model_time"] for r in self.records],
+            "tool_time": [tool["duration"] for tool in tools],
+            "tool_output_chars": [tool["output_chars"] for tool in tools],
+        }
+        summary = {}
+        for name, values in series.items():
+            values = [value for value in values if value is not None]
+            summary[name] = {
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "count": len(values),
+            }
+        return summary
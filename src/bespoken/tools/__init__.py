@@ -1,16 +1,40 @@
 """Tools for the bespoken assistant."""
 
-from .filesystem import FileSystem, FileTool
-from .todo import TodoTools
-from .webfetch import WebFetchTool
-from ..not_installed import NotInstalled
+import importlib
 
-try:
-    from .playwright_browser import PlaywrightTool
-except ImportError:
-    # Replace with NotInstalled proxy
-    PlaywrightTool = NotInstalled("PlaywrightTool", "browser")
+# Tools and the modules they live in. They are imported on first use (PEP 562),
+# so using FileSystem doesn't import requests and bs4 for the WebFetchTool.
+_LAZY = {
+    "FileSystem": ".filesystem",
+    "FileTool": ".filesystem",
+    "TodoTools": ".todo",
+    "WebFetchTool": ".webfetch",
+    "PlaywrightTool": ".playwright_browser",
+}
 
+# Tools that need an optional dependency, with the extra that installs it
+_EXTRAS = {
+    "PlaywrightTool": "browser",
+}
 
 
-__all__ = ["FileSystem", "FileTool", "TodoTools", "WebFetchTool", "PlaywrightTool"]
\ No newline at end of file
+__all__ = ["FileSystem", "FileTool", "TodoTools", "WebFetchTool", "PlaywrightTool"]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    except ImportError:
+        if name not in _EXTRAS:
+            raise
+        from ..not_installed import NotInstalled
+        # Replace with NotInstalled proxy
+        value = NotInstalled(name, _EXTRAS[name])
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -8,8 +8,13 @@ import llm
 
 from .. import config
 from .. import ui
+from ..output_budget import output_hint
 
 
+@output_hint(
+    "Run the command again with its output narrowed down, "
+    "e.g. piped through head, tail or grep."
+)
 def run_command(command: str, working_directory: Optional[str] = ".", timeout: int = 30) -> str:
     """Execute any shell command and return the output. Full access to the system."""
     config.tool_debug(f">>> LLM calling tool: run_command(command={repr(command)}, working_directory={repr(working_directory)}, timeout={timeout})")
@@ -124,11 +129,13 @@ class GitTool(llm.Toolbox):
         config.tool_debug(f">>> LLM calling tool: GitTool.status(working_directory={repr(working_directory)})")
         return self._run_git("status", working_directory)
     
+    @output_hint("Narrow it down with args, e.g. a path or a commit range.")
     def log(self, args: str = "--oneline -10", working_directory: Optional[str] = None) -> str:
         """Get git log. Default: last 10 commits in oneline format."""
         config.tool_debug(f">>> LLM calling tool: GitTool.log(args={repr(args)}, working_directory={repr(working_directory)})")
         return self._run_git(f"log {args}", working_directory)
     
+    @output_hint("Narrow it down with args, e.g. a path or a commit range.")
     def diff(self, args: str = "", working_directory: Optional[str] = None) -> str:
         """Get git diff."""
         config.tool_debug(f">>> LLM calling tool: GitTool.diff(args={repr(args)}, working_directory={repr(working_directory)})")
@@ -1,57 +1,375 @@
 """File tools for the bespoken assistant."""
 
-from typing import Optional
+from typing import Optional, Tuple
 from pathlib import Path
 import difflib
+import fnmatch
+import os
 import re
 import llm
-from rich import get_console
-from rich.prompt import Confirm, Prompt
 
-from .. import ui
+from .. import ignore, ui
+from ..file_cache import get_file_cache
+from ..ignore import IgnoreRules
+from ..line_index import line_count, read_bytes, read_lines
+from ..output_budget import TOOL_MAX_TOKENS, elide, output_hint
+from ..scheduling import read_only
+from ..search import MAX_FILE_BYTES, format_matches, search_contents
+from ..workspace_index import get_workspace_index
+
+
+# Files up to this size are read whole, larger ones in ranges
+WHOLE_FILE_BYTES = 1_000_000
+
+# How much of a large file is shown when no range is given
+HEAD_BYTES = 100_000
+
+# How long find_files waits for the first walk of a large tree
+INDEX_WAIT_SECONDS = 30
+
+READ_HINT = (
+    "Call read_file with start_line and end_line to read the lines that were left out."
+)
 
 
 class FileSystem(llm.Toolbox):
     """File system operations toolbox - can work with multiple files and directories."""
     
-    def __init__(self, working_directory: str = "."):
+    def __init__(
+        self,
+        working_directory: str = ".",
+        max_output_tokens: Optional[int] = TOOL_MAX_TOKENS,
+    ):
         self.working_directory = Path(working_directory).resolve()
+        self.max_output_tokens = max_output_tokens
     
     def _debug_return(self, value: str) -> str:
         """Helper to show what the LLM receives from tools"""
         ui.tool_debug(f"\n>>> Tool returning to LLM: {repr(value)}\n")
         return value
+    
+    def _cap(self, content: str) -> str:
+        """Keep the head and tail of content within max_output_tokens, if it is set."""
+        if self.max_output_tokens is None:
+            return content
+        return elide(content, self.max_output_tokens, READ_HINT)
         
     def _resolve_path(self, file_path: str) -> Path:
         if Path(file_path).is_absolute():
             return Path(file_path).resolve()
         return (self.working_directory / file_path).resolve()
     
-    def list_files(self, directory: Optional[str] = None) -> str:
-        """List files and directories."""
-        ui.tool_debug(f">>> LLM calling tool: list_files(directory={repr(directory)})")
+    def _ignore_rules(self, target_dir: Path) -> Tuple[IgnoreRules, str]:
+        """Ignore rules of target_dir, with those of its parents up to the working dir.
+        
+        Returns the rules and the path of target_dir that they expect, relative to the
+        working directory (or to target_dir when it lies outside of it).
+        """
+        try:
+            relative = target_dir.relative_to(self.working_directory).as_posix()
+        except ValueError:
+            return ignore.load(str(target_dir)), ""
+        relative = "" if relative == "." else relative
+        return ignore.load(str(self.working_directory), relative), relative
+    
+    @read_only
+    @output_hint(
+        "Call list_files on a subdirectory, or with a lower depth, "
+        "to see the entries that were left out."
+    )
+    def list_files(
+        self, directory: Optional[str] = None, depth: int = 3, max_entries: int = 500
+    ) -> str:
+        """List files and directories as a tree, skipping what .gitignore and .ignore files exclude. depth is how many directory levels are expanded, max_entries how many entries are shown."""
+        ui.tool_debug(
+            f">>> LLM calling tool: list_files(directory={repr(directory)}, "
+            f"depth={depth}, max_entries={max_entries})"
+        )
         ui.tool_status(f"Listing files in {directory or 'current directory'}...")
         target_dir = self._resolve_path(directory) if directory else self.working_directory
+        if not target_dir.is_dir():
+            return self._debug_return(f"Directory not found: {directory}")
         
-        items = []
-        for item in sorted(target_dir.iterdir()):
-            if item.is_dir():
-                items.append(f"{item.name}/ [DIR]")
-            else:
-                items.append(f"{item.name} ({item.stat().st_size} bytes)")
-                
-        return self._debug_return(f"Files in {target_dir}:\n" + "\n".join(items) if items else "No files found")
+        lines = []
+        counts = {"collapsed": 0, "ignored": 0, "truncated": False}
+        
+        def walk(
+            path: str, relative: str, rules: IgnoreRules, level: int, indent: str
+        ) -> None:
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                return
+            for entry in entries:
+                if counts["truncated"]:
+                    return
+                # DirEntry knows the type from the directory listing, no stat needed
+                is_dir = entry.is_dir()
+                entry_path = f"{relative}/{entry.name}" if relative else entry.name
+                if rules.ignored(entry_path, is_dir):
+                    counts["ignored"] += 1
+                    continue
+                if len(lines) >= max_entries:
+                    counts["truncated"] = True
+                    return
+                if not is_dir:
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        size = 0
+                    lines.append(f"{indent}{entry.name} ({size} bytes)")
+                elif level < depth and not entry.is_symlink():
+                    lines.append(f"{indent}{entry.name}/")
+                    below = rules.enter(entry.path, entry_path)
+                    walk(entry.path, entry_path, below, level + 1, indent + "  ")
+                else:
+                    try:
+                        with os.scandir(entry.path) as it:
+                            size = sum(1 for _ in it)
+                    except OSError:
+                        size = 0
+                    entries_word = "entry" if size == 1 else "entries"
+                    lines.append(f"{indent}{entry.name}/ [{size} {entries_word}]")
+                    counts["collapsed"] += 1
+        
+        rules, relative = self._ignore_rules(target_dir)
+        walk(str(target_dir), relative, rules, 1, "")
+        if not lines:
+            return self._debug_return("No files found")
+        
+        notes = []
+        if counts["collapsed"]:
+            collapsed = counts["collapsed"]
+            notes.append(f"{collapsed} directories not expanded (depth {depth}).")
+        if counts["ignored"]:
+            notes.append(f"{counts['ignored']} entries skipped by ignore rules.")
+        if counts["truncated"]:
+            notes.append(
+                f"Stopped at {max_entries} entries, "
+                "list a subdirectory or lower the depth to see the rest."
+            )
+        listing = f"Files in {target_dir}:\n" + "\n".join(lines)
+        if notes:
+            listing += "\n[" + " ".join(notes) + "]"
+        return self._debug_return(listing)
     
-    def read_file(self, file_path: str) -> str:
-        """Read content from a file."""
-        ui.tool_debug(f">>> LLM calling tool: read_file(file_path={repr(file_path)})")
+    @read_only
+    @output_hint(
+        "Search a subdirectory, narrow the pattern or pass include "
+        "to see the matches that were left out."
+    )
+    def search(
+        self,
+        pattern: str,
+        directory: Optional[str] = None,
+        literal: bool = False,
+        ignore_case: bool = False,
+        include: Optional[str] = None,
+        context: int = 0,
+        max_per_file: int = 20,
+        max_results: int = 200,
+    ) -> str:
+        """Search file contents for a regular expression (or plain text with literal=True), skipping binaries and what .gitignore and .ignore files exclude. include is a file name glob such as '*.py', context the number of lines shown around each match. Returns 'path:line: text' for each match."""
+        ui.tool_debug(
+            f">>> LLM calling tool: search(pattern={repr(pattern)}, "
+            f"directory={repr(directory)}, literal={literal}, "
+            f"ignore_case={ignore_case}, "
+            f"include={repr(include)}, context={context})"
+        )
+        where = directory or "current directory"
+        ui.tool_status(f"Searching for {pattern!r} in {where}...")
+        target_dir = self._resolve_path(directory) if directory else self.working_directory
+        if not target_dir.is_dir():
+            return self._debug_return(f"Directory not found: {directory}")
+        rules, relative = self._ignore_rules(target_dir)
+        # Paths in the output are relative to the working directory,
+        # unless the search is outside of it
+        if relative or target_dir == self.working_directory:
+            root = str(self.working_directory)
+        else:
+            root = str(target_dir)
+        
+        files = []
+        for path, entry in ignore.walk(root, relative, rules):
+            if include and not fnmatch.fnmatch(entry.name, include):
+                continue
+            try:
+                files.append((entry.path, path, entry.stat().st_size))
+            except OSError:
+                continue
+        
+        context = max(context, 0)
+        try:
+            result = search_contents(
+                files, pattern, literal, ignore_case, context,
+                max(max_per_file, 1), max(max_results, 1),
+                max_file_bytes=MAX_FILE_BYTES,
+            )
+        except re.error as e:
+            return self._debug_return(
+                f"Invalid regular expression {pattern!r}: {e}. "
+                "Pass literal=True to search for plain text."
+            )
+        
+        lines, shown, cut_files = [], 0, 0
+        for file in result.files:
+            limit = min(len(file.hits), max_results - shown)
+            if context and lines:
+                lines.append("--")
+            lines.extend(format_matches(file, context, limit))
+            shown += limit
+            if file.total > limit:
+                cut_files += 1
+        too_large = ""
+        if result.too_large:
+            names = ", ".join(result.too_large[:10])
+            if len(result.too_large) > 10:
+                names += ", ..."
+            too_large = (
+                f"{len(result.too_large)} files over {MAX_FILE_BYTES:,} bytes "
+                f"not searched, read them in ranges with read_file: {names}."
+            )
+        if not lines:
+            skipped = ""
+            if result.binaries:
+                skipped = f", {result.binaries} binary files skipped"
+            message = f"No matches for {pattern!r} in {result.searched} files{skipped}"
+            if too_large:
+                message += f" [{too_large}]"
+            return self._debug_return(message)
+        
+        notes = [f"{shown} matches in {len(result.files)} files."]
+        if shown >= max_results:
+            notes.append(f"Stopped at {max_results} matches.")
+        if cut_files:
+            notes.append(
+                f"{cut_files} files have more matches than shown "
+                f"(max_per_file={max_per_file})."
+            )
+        if result.binaries:
+            notes.append(f"{result.binaries} binary files skipped.")
+        if too_large:
+            notes.append(too_large)
+        return self._debug_return("\n".join(lines) + "\n[" + " ".join(notes) + "]")
+        
+    @read_only
+    @output_hint("Use a more specific pattern to see the files that were left out.")
+    def find_files(self, pattern: str, max_results: int = 100) -> str:
+        """Find files by name anywhere in the working directory, skipping what .gitignore and .ignore files exclude. A pattern with wildcards is a glob ('*.py' matches names at any depth, 'src/**/test_*.py' paths from the top), anything else is matched fuzzily against file names ('flsys' finds filesystem.py)."""
+        ui.tool_debug(
+            f">>> LLM calling tool: find_files(pattern={repr(pattern)}, "
+            f"max_results={max_results})"
+        )
+        ui.tool_status(f"Finding files matching {pattern!r}...")
+        index = get_workspace_index(self.working_directory)
+        if not index.wait(INDEX_WAIT_SECONDS):
+            return self._debug_return(
+                "The file index is still being built, "
+                "try again in a moment or use list_files."
+            )
+        # Pick up what changed since the last poll,
+        # e.g. files written by a tool just now
+        index.refresh()
+        
+        max_results = max(max_results, 1)
+        if any(c in pattern for c in "*?["):
+            files = index.glob(pattern, max_results + 1)
+        else:
+            files = index.fuzzy(pattern, max_results + 1)
+        # A walk of a huge tree stops early, what it left out cannot be found here
+        truncated = (
+            f"[The file index stops at {index.max_files:,} files, "
+            "use list_files for what it left out.]"
+        )
+        if not files:
+            message = f"No files match {pattern!r}"
+            if index.truncated:
+                message += f" {truncated}"
+            return self._debug_return(message)
+        
+        lines = [f"{file.path} ({file.size} bytes)" for file in files[:max_results]]
+        if len(files) > max_results:
+            lines.append(
+                f"[Stopped at {max_results} files, "
+                "use a more specific pattern to see the rest.]"
+            )
+        if index.truncated:
+            lines.append(truncated)
+        return self._debug_return("\n".join(lines))
+    
+    @read_only
+    @output_hint(READ_HINT)
+    def read_file(
+        self,
+        file_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        offset: Optional[int] = None,
+        length: Optional[int] = None,
+    ) -> str:
+        """Read content from a file. For large files pass start_line and end_line (1-based, inclusive) to read a range of lines, or a byte offset and length."""
+        ui.tool_debug(
+            f">>> LLM calling tool: read_file(file_path={repr(file_path)}, "
+            f"start_line={start_line}, end_line={end_line}, "
+            f"offset={offset}, length={length})"
+        )
         ui.tool_status(f"Reading file: {file_path}")
         full_path = self._resolve_path(file_path)
-        content = full_path.read_text(encoding='utf-8', errors='replace')
         
-        if len(content) > 50_000:
-            content = content[:50_000] + "\n... (truncated)"
+        size = full_path.stat().st_size
+        if offset is not None or length is not None:
+            start = max(offset or 0, 0)
+            if start > 0 and start >= size:
+                return self._debug_return(
+                    f"Offset {start:,} is past the end of the file ({size:,} bytes)"
+                )
+            length = HEAD_BYTES if length is None else length
+            content, end, more = read_bytes(
+                full_path, start, min(length, WHOLE_FILE_BYTES)
+            )
+            content = self._cap(content)
+            if more:
+                content += ("\n" if content else "") + (
+                    f"[Bytes {start:,}-{end:,} of {size:,}. "
+                    "Pass a later offset to read on.]"
+                )
+            return self._debug_return(content)
+        
+        if start_line is None and end_line is None and size <= WHOLE_FILE_BYTES:
+            cache = get_file_cache()
+            
+            def read() -> str:
+                text = full_path.read_text(encoding='utf-8', errors='replace')
+                return self._cap(text)
             
+            content = cache.read(full_path, read) if cache else read()
+            return self._debug_return(content)
+        
+        # Only the requested lines (or the head of a large file) are read and decoded
+        start = max(start_line or 1, 1)
+        if end_line is not None and end_line < start:
+            return self._debug_return(
+                f"Invalid range: end_line {end_line} is before start_line {start}"
+            )
+        max_bytes = WHOLE_FILE_BYTES if start_line or end_line else HEAD_BYTES
+        content, last, more = read_lines(full_path, start, end_line, max_bytes)
+        if not content:
+            total = line_count(full_path)
+            return self._debug_return(
+                f"No lines from line {start} on, the file has {total:,} lines"
+            )
+        content = self._cap(content)
+        if more or start > 1:
+            note = f"[Lines {start:,}-{last:,} of {full_path.name}"
+            if more:
+                note += (
+                    f" ({size:,} bytes). "
+                    "Pass start_line and end_line to read other lines.]"
+                )
+            else:
+                note += ", the end of the file.]"
+            content = content + ("" if content.endswith("\n") else "\n") + note
         return self._debug_return(content)
     
     def write_file(self, file_path: str, content: str) -> str:
@@ -61,6 +379,9 @@ class FileSystem(llm.Toolbox):
         full_path = self._resolve_path(file_path)
         full_path.parent.mkdir(parents=True, exist_ok=True)
         full_path.write_text(content, encoding='utf-8')
+        cache = get_file_cache()
+        if cache:
+            cache.update(full_path, content)
         
         return self._debug_return(f"Wrote {len(content):,} characters to '{file_path}'")
     
@@ -128,6 +449,9 @@ class FileSystem(llm.Toolbox):
             
             if confirm:
                 full_path.write_text(new_content, encoding='utf-8')
+                cache = get_file_cache()
+                if cache:
+                    cache.update(full_path, new_content)
                 return self._debug_return(f"Applied changes to '{file_path}'")
             else:
                 ui.tool_error("Changes cancelled. Please provide new instructions.")
@@ -136,7 +460,9 @@ class FileSystem(llm.Toolbox):
             return self._debug_return(f"No changes needed in '{file_path}'")
 
 
-def FileTool(file_path: Optional[str] = None):
+def FileTool(
+    file_path: Optional[str] = None, max_output_tokens: Optional[int] = TOOL_MAX_TOKENS
+):
     """Factory function to create a FileTool with file-specific docstring."""
     if file_path is None:
         file_path = ui.input("Enter the path to the file you want to edit: ")
@@ -150,28 +476,38 @@ def FileTool(file_path: Optional[str] = None):
         
         def __init__(self):
             self.file_path = file_path_obj
+            self.max_output_tokens = max_output_tokens
         
         def _debug_return(self, value: str) -> str:
             """Helper to show what the LLM receives from tools"""
             ui.tool_debug(f"\n>>> Tool returning to LLM: {value}\n")
             return value
         
+        @read_only
         def get_file_path(self) -> str:
             """Return the path to the file that this tool is allowed to edit."""
             ui.tool_debug(">>> LLM calling tool: get_file_path()")
             ui.tool_status(f"Getting file path for: {self.file_path.name}")
             return self._debug_return(f"This tool can only access one file: {self.file_path}. Other files exist but are not accessible through this tool.")
         
+        @read_only
         def read_file(self) -> str:
             f"""Read the content of {self.file_path.name}. This tool cannot be used to open or edit other files."""
             ui.tool_debug(">>> LLM calling tool: read_file()")
             ui.tool_status(f"Reading file: {self.file_path.name}")
             
-            content = self.file_path.read_text(encoding='utf-8', errors='replace')
+            cache = get_file_cache()
             
-            if len(content) > 50_000:
-                content = content[:50_000] + "\n... (truncated)"
-                
+            def read() -> str:
+                content = self.file_path.read_text(encoding='utf-8', errors='replace')
+                if self.max_output_tokens is None:
+                    return content
+                return elide(
+                    content, self.max_output_tokens,
+                    "This tool only reads the whole file, so it cannot show them.",
+                )
+            
+            content = cache.read(self.file_path, read) if cache else read()
             return self._debug_return(content)
         
         def replace_in_file(self, old_string: str, new_string: str) -> str:
@@ -238,6 +574,9 @@ def FileTool(file_path: Optional[str] = None):
                 
                 if confirm:
                     self.file_path.write_text(new_content, encoding='utf-8')
+                    cache = get_file_cache()
+                    if cache:
+                        cache.update(self.file_path, new_content)
                     return self._debug_return(f"Applied changes to '{self.file_path.name}'")
                 else:
                     ui.tool_error("Changes cancelled. Please provide new instructions.")
@@ -4,9 +4,13 @@ from typing import Optional
 import llm
 
 from .. import config
+from ..output_budget import TOOL_MAX_TOKENS, elide, output_hint
 from playwright.sync_api import sync_playwright, Browser, Page
 
 
+CONTENT_HINT = "Navigate to a more specific page to see the rest."
+
+
 class PlaywrightTool(llm.Toolbox):
     """Tool for browser automation using Playwright.
     
@@ -14,9 +18,15 @@ class PlaywrightTool(llm.Toolbox):
         pip install bespoken[browser]
     """
     
-    def __init__(self, headless: bool = False, browser_type: str = "chromium"):
+    def __init__(
+        self,
+        headless: bool = False,
+        browser_type: str = "chromium",
+        max_output_tokens: Optional[int] = TOOL_MAX_TOKENS,
+    ):
         self.headless = headless
         self.browser_type = browser_type
+        self.max_output_tokens = max_output_tokens
         self._playwright = None
         self._browser: Optional[Browser] = None
         self._page: Optional[Page] = None
@@ -111,6 +121,7 @@ class PlaywrightTool(llm.Toolbox):
             config.tool_error(error_msg)
             return self._debug_return(f"Error: {error_msg}")
     
+    @output_hint(CONTENT_HINT)
     def get_content(self) -> str:
         """Get the current page content as text.
         
@@ -125,11 +136,9 @@ class PlaywrightTool(llm.Toolbox):
             # Get all visible text
             content = self._page.inner_text("body")
             
-            # Truncate if too long
-            if len(content) > 50000:
-                content = content[:50000] + "\n... (truncated)"
-            
             config.tool_success(f"Retrieved {len(content):,} characters of content")
+            if self.max_output_tokens is not None:
+                content = elide(content, self.max_output_tokens, CONTENT_HINT)
             return self._debug_return(content)
         except Exception as e:
             error_msg = f"Failed to get content: {str(e)}"
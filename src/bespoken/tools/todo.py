@@ -5,6 +5,7 @@ import llm
 from rich import print
 
 from .. import config
+from ..scheduling import read_only
 
 
 class TodoTools(llm.Toolbox):
@@ -31,6 +32,7 @@ class TodoTools(llm.Toolbox):
         
         return self._debug_return(f"Added todo: '{task}'")
     
+    @read_only
     def list_todos(self) -> str:
         """List all todos with their status."""
         config.tool_debug(">>> LLM calling tool: list_todos()")
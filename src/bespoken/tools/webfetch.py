@@ -7,6 +7,7 @@ import llm
 from rich import print
 
 from .. import config
+from ..scheduling import read_only
 
 
 class WebFetchTool(llm.Toolbox):
@@ -24,6 +25,7 @@ class WebFetchTool(llm.Toolbox):
         config.tool_debug(f"\n>>> Tool returning to LLM: {repr(value[:200])}...\n")
         return value
     
+    @read_only
     def fetch_url(self, url: str) -> str:
         """Fetch content from a URL and convert to markdown.
         
@@ -1,17 +1,17 @@
 """User interface utilities for consistent formatting in bespoken."""
 
-from typing import List, Any, Optional
+import re
+import time
+from functools import lru_cache
+from typing import Iterable, List, Any, Optional
 from rich.console import Console
-from rich.prompt import Prompt, Confirm
+from rich.text import Text
+from rich.padding import Padding
+from rich.cells import cell_len
+from rich.markup import escape
 
-from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter, FuzzyCompleter
-from prompt_toolkit.styles import Style
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.history import InMemoryHistory
-from prompt_toolkit.formatted_text import HTML
-import questionary
-from .file_completer import create_completer
+# Markdown, Live, prompt_toolkit and questionary are imported where they are used,
+# they are slow to import and not every program needs them.
 
 
 # Global padding configuration
@@ -30,6 +30,7 @@ _DEFAULT_ASCII_ART = """██████╗ ███████╗███
 ╚═════╝ ╚══════╝╚══════╝╚═╝      ╚═════╝ ╚═╝  ╚═╝╚══════╝╚═╝  ╚═══╝"""
 
 # Get version dynamically to avoid circular import
+@lru_cache(maxsize=None)
 def _get_version():
     """Get version without circular import."""
     try:
@@ -38,7 +39,11 @@ def _get_version():
     except:
         return "unknown"
 
-_DEFAULT_SUBTITLE = f"""[dim]bespoken v{_get_version()} - A terminal chat experience that you can configure yourself.[/dim]"""
+# The version is filled in when the banner is shown, looking it up is slow
+_DEFAULT_SUBTITLE = (
+    "[dim]bespoken v{version} - "
+    "A terminal chat experience that you can configure yourself.[/dim]"
+)
 
 # Custom ASCII art storage
 _custom_ascii_art = None
@@ -47,51 +52,108 @@ _custom_subtitle = None
 # Trust settings for tools
 _trusted_tools = set()
 
-# Command history for prompt_toolkit
-_command_history = InMemoryHistory()
+# Approve every confirmation without asking (for headless runs such as batch mode)
+_auto_approve = False
 
-# Global streaming state
-_streaming_state = {
-    'current_position': 0,
-    'word_buffer': '',
-    'at_line_start': True,
-    'terminal_width': 0,
-    'max_line_width': 0
-}
+# One prompt_toolkit session (and completer) reused for every input
+_prompt_session = None
+_completer = None
+
+# Iterator of scripted answers for input(), None reads from the keyboard
+_scripted_input = None
+
+# Command history for prompt_toolkit, bounded and optionally saved to a file
+_history_file = None
+_max_history = 1000
+
+# Splits streamed text into words and the whitespace characters between them
+_STREAM_TOKENS = re.compile(r"([ \t\n])")
+
+# Rich markup tags such as [dim] or [/bold cyan], with any escaping backslashes
+_MARKUP_TAG = re.compile(r"(\\*)\[([a-z#/@][^\[]*?)]")
+
+# Plain text output: None picks it when the console isn't a terminal,
+# True/False force it
+_plain_output = None
+
+# Maximum number of streaming writes per second, None writes every chunk immediately
+_stream_fps = None
+
+# Writer used by the module-level start_streaming / stream_chunk / end_streaming
+_stream_writer = None
+
+
+def set_plain_output(enabled: Optional[bool]) -> None:
+    """Write plain text without Rich rendering.
+    
+    None picks it when the console isn't a terminal.
+    """
+    global _plain_output
+    _plain_output = enabled
+
+
+def _plain_file(console: Console):
+    """Return the file to write plain text to, or None when output goes through Rich."""
+    plain = _plain_output
+    if plain is None:
+        plain = not console.is_terminal
+    return console.file if plain else None
+
+
+def _strip_markup(text: str) -> str:
+    """Remove Rich markup tags from text, keeping escaped brackets."""
+    if '[' not in text:
+        return text
+    
+    def replace(match):
+        backslashes, tag = match.groups()
+        escaped = f"[{tag}]" if len(backslashes) % 2 else ""
+        return "\\" * (len(backslashes) // 2) + escaped
+    
+    return _MARKUP_TAG.sub(replace, text)
+
+
+def _emit(markup: str, plain: Optional[str] = None) -> None:
+    """Print a line of Rich markup, or its plain text when output isn't a terminal."""
+    file = _plain_file(_console)
+    if file is None:
+        _console.print(markup)
+    else:
+        file.write((_strip_markup(markup) if plain is None else plain) + "\n")
 
 
 def print(text: str, indent: int = LEFT_PADDING) -> None:
     """Print text with left padding."""
     # For single line text, just add padding
     if '\n' not in text:
-        _console.print(" " * indent + text)
+        _emit(" " * indent + text)
         return
     
     # For multi-line text, split and add padding to each line
     lines = text.split('\n')
     for line in lines:
-        _console.print(" " * indent + line)
+        _emit(" " * indent + line)
 
 
 def print_empty_line(indent: int = LEFT_PADDING) -> None:
     """Print an empty line with padding to maintain consistent left margin."""
-    _console.print(" " * indent)
+    _emit(" " * indent, " " * indent)
 
 
 def print_neutral(text: str, indent: int = LEFT_PADDING) -> None:
     """Print text in neutral gray color with proper padding and wrapping."""
     # Use the streaming infrastructure to handle padding correctly
-    start_streaming(indent)
-    stream_chunk(text, indent)
-    end_streaming(indent)
+    writer = StreamWriter(indent, fps=0)
+    writer.write(text)
+    writer.close()
     print_empty_line(indent)  # Add newline after the text with padding
 
 
 def tool_status(message: str, indent: int = LEFT_PADDING) -> None:
     """Print a tool status message in cyan."""
-    _console.print()  # Add extra whitespace before tool message
-    _console.print(f"{' ' * indent}[cyan]{message}[/cyan]")
-    _console.print()
+    _emit("", "")  # Add extra whitespace before tool message
+    _emit(f"{' ' * indent}[cyan]{message}[/cyan]", f"{' ' * indent}{message}")
+    _emit("", "")
 
 
 def tool_debug(message: str, indent: int = LEFT_PADDING) -> None:
@@ -101,183 +163,490 @@ def tool_debug(message: str, indent: int = LEFT_PADDING) -> None:
         # Handle multiline messages by adding padding to each line
         lines = message.split('\n')
         for line in lines:
-            _console.print(f"{' ' * indent}[magenta]{line}[/magenta]")
+            _emit(f"{' ' * indent}[magenta]{line}[/magenta]", f"{' ' * indent}{line}")
 
 
 def tool_error(message: str, indent: int = LEFT_PADDING) -> None:
     """Print an error message in red."""
-    _console.print(f"{' ' * indent}[red]{message}[/red]")
+    _emit(f"{' ' * indent}[red]{message}[/red]", f"{' ' * indent}{message}")
 
 
 def tool_success(message: str, indent: int = LEFT_PADDING) -> None:
     """Print a success message in green."""
-    _console.print(f"{' ' * indent}[green]{message}[/green]")
+    _emit(f"{' ' * indent}[green]{message}[/green]", f"{' ' * indent}{message}")
 
 
 def tool_warning(message: str, indent: int = LEFT_PADDING) -> None:
     """Print a warning message in yellow."""
-    _console.print(f"{' ' * indent}[yellow]{message}[/yellow]")
+    _emit(f"{' ' * indent}[yellow]{message}[/yellow]", f"{' ' * indent}{message}")
 
 
-def start_streaming(indent: int = LEFT_PADDING) -> None:
-    """Initialize streaming state."""
-    global _streaming_state
-    _streaming_state['current_position'] = 0
-    _streaming_state['word_buffer'] = ''
-    _streaming_state['at_line_start'] = True
-    _streaming_state['terminal_width'] = _console.width
-    _streaming_state['max_line_width'] = _streaming_state['terminal_width'] - indent - RIGHT_PADDING
+def set_stream_fps(fps: Optional[float]) -> None:
+    """Cap streamed output to `fps` writes per second. None or 0 writes every chunk."""
+    global _stream_fps
+    _stream_fps = fps or None
 
 
-def stream_chunk(chunk: str, indent: int = LEFT_PADDING, wrap: bool = True) -> None:
-    """Stream a single chunk while maintaining state."""
-    global _streaming_state
-    
-    # Process chunk character by character
-    for char in chunk:
-        if _streaming_state['at_line_start']:
-            # Add padding at start of line
-            _console.print(" " * indent, end="", highlight=False)
-            _streaming_state['at_line_start'] = False
-            _streaming_state['current_position'] = 0
-        
-        if char == '\n':
-            # Print any buffered word
-            if _streaming_state['word_buffer']:
-                _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
-                _streaming_state['word_buffer'] = ""
-            # New line
-            _console.print()
-            _streaming_state['at_line_start'] = True
-        elif char in ' \t' and wrap:
-            # End of word, check if it fits
-            if _streaming_state['word_buffer']:
-                word_length = len(_streaming_state['word_buffer'])
-                if _streaming_state['current_position'] + word_length > _streaming_state['max_line_width']:
-                    # Word doesn't fit, wrap to new line
-                    _console.print()
-                    _streaming_state['at_line_start'] = True
-                    _console.print(" " * indent, end="", highlight=False)
-                    _streaming_state['current_position'] = 0
-                    _streaming_state['at_line_start'] = False
-                # Print the word
-                _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
-                _streaming_state['current_position'] += word_length
-                _streaming_state['word_buffer'] = ""
-            # Print the space
-            _console.print(f"[dim]{char}[/dim]", end="", highlight=False)
-            _streaming_state['current_position'] += 1
-        else:
-            # Add to word buffer
-            _streaming_state['word_buffer'] += char
+@lru_cache(maxsize=4096)
+def _cell_width(text: str) -> int:
+    """Terminal cells needed for non-ASCII text (wide CJK and emoji count as 2)."""
+    # Rich's precomputed unicode range table, so wrapping agrees with rendering
+    return cell_len(text)
 
 
-def end_streaming(indent: int = LEFT_PADDING, wrap: bool = True) -> None:
-    """Finish streaming and print any remaining buffered word."""
-    global _streaming_state
-    
-    # Print any remaining buffered word
-    if _streaming_state['word_buffer']:
-        if wrap and _streaming_state['current_position'] + len(_streaming_state['word_buffer']) > _streaming_state['max_line_width']:
-            _console.print()
-            _streaming_state['at_line_start'] = True
-            _console.print(" " * indent, end="", highlight=False)
-        _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
+def _word_width(text: str) -> int:
+    """Display width of a word; ASCII text takes the fast path."""
+    return len(text) if text.isascii() else _cell_width(text)
 
 
-def stream(chunks, indent: int = LEFT_PADDING, wrap: bool = True) -> None:
-    """Stream text chunks with word-aware wrapping and padding."""
-    # State for word-aware wrapping
-    current_position = 0
-    word_buffer = ""
-    terminal_width = _console.width
-    max_line_width = terminal_width - indent - RIGHT_PADDING
-    at_line_start = True
+def _fragment(text: str, console: Console) -> str:
+    """Lay out a word the way a standalone console print would."""
+    # Only tabs and words wider than the console need the full wrap machinery
+    if '\t' in text or _word_width(text) > console.width:
+        lines = Text(text).wrap(console, console.width, tab_size=console.tab_size)
+        return "\n".join(line.plain for line in lines)
+    return text
+
+
+class StreamWriter:
+    """Word-wrapping, padded writer for one stream of text chunks.
     
-    for chunk in chunks:
-        # Process chunk character by character
-        for char in chunk:
+    Each writer keeps its own wrap state, so several streams can be written at
+    once, e.g. to different consoles. When `fps` is set, chunks are buffered and
+    written at most `fps` times per second; it defaults to `set_stream_fps`.
+    When the console isn't a terminal, text is written straight to its file.
+    
+    With `markdown=True` the chunks are rendered as markdown on a terminal: finished
+    blocks (paragraphs, lists, fenced code) are printed once and never touched again,
+    only the open block at the end is re-rendered as chunks arrive.
+    """
+    
+    __slots__ = (
+        "console", "file", "indent", "wrap", "fps", "max_line_width",
+        "current_position", "word_buffer", "at_line_start", "pending", "last_flush",
+        "markdown", "partial_line", "block_lines", "fence", "blocks_printed",
+        "live", "tail",
+    )
+    
+    def __init__(
+        self,
+        indent: int = LEFT_PADDING,
+        wrap: bool = True,
+        console: Optional[Console] = None,
+        fps: Optional[float] = None,
+        markdown: bool = False,
+    ):
+        self.console = console or _console
+        self.file = _plain_file(self.console)
+        self.indent = indent
+        self.wrap = wrap
+        self.fps = _stream_fps if fps is None else fps
+        self.max_line_width = self.console.width - indent - RIGHT_PADDING
+        self.current_position = 0
+        self.word_buffer = ''
+        self.at_line_start = True
+        self.pending = []
+        self.last_flush = 0.0
+        # Without a terminal there is nothing to render,
+        # so the raw markdown is written as is
+        self.markdown = markdown and self.file is None
+        self.partial_line = ''
+        self.block_lines = []
+        self.fence = None
+        self.blocks_printed = 0
+        self.live = None
+        self.tail = None
+    
+    def write(self, chunk: str) -> None:
+        """Stream a single chunk while maintaining state."""
+        if self.markdown:
+            self._write_markdown(chunk)
+            return
+        if self.fps:
+            pending = self.pending
+            pending.append(chunk)
+            now = time.monotonic()
+            if now - self.last_flush < 1.0 / self.fps:
+                return
+            self.last_flush = now
+            chunk = "".join(pending)
+            pending.clear()
+        
+        out = []
+        self._render(chunk, out)
+        self._print(out)
+    
+    def flush(self) -> None:
+        """Write everything held back so far, e.g. before a tool prints its own output.
+        
+        That is the chunks buffered by the frame rate cap and the unfinished last word,
+        or in markdown mode the open block, which is rendered as finished.
+        """
+        if self.markdown:
+            self._flush_markdown()
+            return
+        out = []
+        if self.pending:
+            self._render("".join(self.pending), out)
+            self.pending.clear()
+        self._write_word(out)
+        self._print(out)
+    
+    def close(self) -> None:
+        """Finish the stream and print any remaining buffered text."""
+        self.flush()
+    
+    def _write_word(self, out: List[str]) -> None:
+        """Append the buffered word to `out`, wrapping first if it doesn't fit."""
+        word_buffer = self.word_buffer
+        if word_buffer:
+            word_length = _word_width(word_buffer)
+            if self.wrap and self.current_position + word_length > self.max_line_width:
+                out.append("\n")
+                out.append(" " * self.indent)
+                self.current_position = 0
+            out.append(_fragment(word_buffer, self.console))
+            self.current_position += word_length
+            self.word_buffer = ""
+    
+    def _print_markdown_block(self, lines: List[str]) -> None:
+        """Render a finished markdown block once, above the live tail."""
+        from rich.markdown import Markdown
+        if self.blocks_printed:
+            self.console.print()
+        padding = (0, RIGHT_PADDING, 0, self.indent)
+        self.console.print(Padding(Markdown("\n".join(lines)), padding))
+        self.blocks_printed += 1
+    
+    def _add_markdown_line(self, line: str) -> None:
+        """Add a complete line to the open block, printing the block once it's done."""
+        block_lines = self.block_lines
+        fence = self.fence
+        
+        if fence:
+            # Inside a fenced code block, only the closing fence ends the block
+            block_lines.append(line)
+            closing = line.strip()
+            if closing.startswith(fence) and not closing.strip(fence[0]):
+                self.fence = None
+                self._print_markdown_block(block_lines)
+                self.block_lines = []
+            return
+        
+        marker = _fence_marker(line)
+        if marker:
+            # A fence opens a new block, even without a blank line before it
+            if block_lines:
+                self._print_markdown_block(block_lines)
+            self.block_lines = [line]
+            self.fence = marker
+        elif not line.strip():
+            # A blank line closes the paragraph or list that came before it
+            if block_lines:
+                self._print_markdown_block(block_lines)
+                self.block_lines = []
+        else:
+            block_lines.append(line)
+    
+    def _update_markdown_tail(self) -> None:
+        """Show the open block (plus the partial line) in the live region."""
+        lines = self.block_lines
+        partial = self.partial_line
+        text = "\n".join(lines + [partial] if partial else lines)
+        
+        if not text.strip():
+            if self.live is not None:
+                self.tail.text = ""
+                self.live.refresh()
+            return
+        
+        if self.live is None:
+            from rich.live import Live
+            self.tail = _MarkdownTail(self.indent)
+            if self.fps:
+                live = Live(
+                    self.tail, console=self.console,
+                    refresh_per_second=self.fps, transient=True,
+                )
+            else:
+                live = Live(
+                    self.tail, console=self.console,
+                    auto_refresh=False, transient=True,
+                )
+            live.start()
+            self.live = live
+        
+        self.tail.text = text
+        if not self.fps:
+            self.live.refresh()
+    
+    def stop_live(self) -> None:
+        """Remove the live tail region, if it is showing."""
+        if self.live is not None:
+            self.tail.text = ""
+            self.live.stop()
+            self.live = None
+            self.tail = None
+    
+    def _write_markdown(self, chunk: str) -> None:
+        partial_line = self.partial_line + chunk
+        if '\n' in chunk:
+            lines = partial_line.split('\n')
+            self.partial_line = lines.pop()
+            for line in lines:
+                self._add_markdown_line(line)
+        else:
+            self.partial_line = partial_line
+        self._update_markdown_tail()
+    
+    def _flush_markdown(self) -> None:
+        if self.partial_line:
+            self.block_lines.append(self.partial_line)
+            self.partial_line = ''
+        self.stop_live()
+        if any(line.strip() for line in self.block_lines):
+            self._print_markdown_block(self.block_lines)
+        self.block_lines = []
+        self.fence = None
+    
+    def _render(self, chunk: str, out: List[str]) -> None:
+        """Append the laid out pieces of a chunk to `out`, updating the wrap state."""
+        console = self.console
+        wrap = self.wrap
+        padding = " " * self.indent
+        max_line_width = self.max_line_width
+        current_position = self.current_position
+        word_buffer = self.word_buffer
+        at_line_start = self.at_line_start
+        
+        # Split into words and single whitespace separators in one pass
+        for token in _STREAM_TOKENS.split(chunk):
+            if not token:
+                continue
+            
             if at_line_start:
                 # Add padding at start of line
-                _console.print(" " * indent, end="", highlight=False)
+                out.append(padding)
                 at_line_start = False
                 current_position = 0
             
-            if char == '\n':
-                # Print any buffered word
+            if token == '\n':
+                # Flush any buffered word, then start a new line
                 if word_buffer:
-                    _console.print(f"[dim]{word_buffer}[/dim]", end="", highlight=False)
+                    out.append(_fragment(word_buffer, console))
                     word_buffer = ""
-                # New line
-                _console.print()
+                out.append("\n")
                 at_line_start = True
-            elif char in ' \t' and wrap:
+            elif wrap and (token == ' ' or token == '\t'):
                 # End of word, check if it fits
                 if word_buffer:
-                    word_length = len(word_buffer)
+                    word_length = _word_width(word_buffer)
                     if current_position + word_length > max_line_width:
                         # Word doesn't fit, wrap to new line
-                        _console.print()
-                        at_line_start = True
-                        _console.print(" " * indent, end="", highlight=False)
+                        out.append("\n")
+                        out.append(padding)
                         current_position = 0
-                        at_line_start = False
-                    # Print the word
-                    _console.print(f"[dim]{word_buffer}[/dim]", end="", highlight=False)
+                    out.append(_fragment(word_buffer, console))
                     current_position += word_length
                     word_buffer = ""
-                # Print the space
-                _console.print(f"[dim]{char}[/dim]", end="", highlight=False)
+                # Print the space (a lone tab expands to a full tab stop)
+                out.append(_fragment(token, console))
                 current_position += 1
             else:
                 # Add to word buffer
-                word_buffer += char
+                word_buffer += token
+        
+        self.current_position = current_position
+        self.word_buffer = word_buffer
+        self.at_line_start = at_line_start
     
-    # Print any remaining buffered word
-    if word_buffer:
-        if wrap and current_position + len(word_buffer) > max_line_width:
-            _console.print()
-            at_line_start = True
-            _console.print(" " * indent, end="", highlight=False)
-        _console.print(f"[dim]{word_buffer}[/dim]", end="", highlight=False)
+    def _print(self, out: List[str]) -> None:
+        """Send pre-wrapped text to the console in a single write."""
+        if out:
+            text = "".join(out)
+            if self.file is not None:
+                self.file.write(text)
+            else:
+                self.console.print(
+                    Text(text, style="dim"), end="", highlight=False, soft_wrap=True
+                )
 
 
-def input(prompt_text: str, indent: int = LEFT_PADDING, completions: Optional[List[str]] = None) -> str:
-    """Get input with left padding and optional completions."""
-    padded_prompt = " " * indent + prompt_text
+def start_streaming(indent: int = LEFT_PADDING) -> None:
+    """Initialize streaming state."""
+    global _stream_writer
+    _stream_writer = StreamWriter(indent)
+
+
+def stream_chunk(chunk: str, indent: int = LEFT_PADDING, wrap: bool = True) -> None:
+    """Stream a single chunk while maintaining state.
     
-    # Use combined completer for commands and file paths
-    completer = create_completer(completions) if completions else None
+    When a frame rate is set via `set_stream_fps`, chunks are buffered and written
+    at most once per frame. Call `flush_streaming` before printing anything else.
+    """
+    if _stream_writer is None:
+        start_streaming(indent)
+    _stream_writer.indent = indent
+    _stream_writer.wrap = wrap
+    _stream_writer.write(chunk)
+
+
+def flush_streaming() -> None:
+    """Write any chunks that are still buffered by the frame rate cap."""
+    if _stream_writer is not None:
+        _stream_writer.flush()
+
+
+def end_streaming(indent: int = LEFT_PADDING, wrap: bool = True) -> None:
+    """Finish streaming and print any remaining buffered text."""
+    if _stream_writer is not None:
+        _stream_writer.indent = indent
+        _stream_writer.wrap = wrap
+        _stream_writer.close()
+
+
+def stream(chunks, indent: int = LEFT_PADDING, wrap: bool = True) -> None:
+    """Stream text chunks with word-aware wrapping and padding."""
+    writer = StreamWriter(indent, wrap)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+
+
+class _MarkdownTail:
+    """Renderable for the unfinished markdown block, parsed only when it is drawn."""
     
-    # Create a style with auto-suggestion preview in gray
-    style = Style.from_dict({
-        # Default text style
-        '': '#ffffff',
-        # Auto-suggestions in gray
-        'auto-suggest': 'fg:#666666',
-        # Selected completion in menu
-        'completion-menu.completion.current': 'bg:#00aaaa #000000',
-        'completion-menu.completion': 'bg:#008888 #ffffff',
-    })
+    def __init__(self, indent: int):
+        self.indent = indent
+        self.text = ""
     
-    try:
-        # Use prompt_toolkit with completer and auto-suggestions
-        result = prompt(
-            padded_prompt,
-            completer=completer,
+    def __rich_console__(self, console, options):
+        from rich.markdown import Markdown
+        yield Padding(Markdown(self.text), (0, RIGHT_PADDING, 0, self.indent))
+
+
+def _fence_marker(line: str) -> Optional[str]:
+    """Return the fence characters if the line opens or closes a fenced code block."""
+    stripped = line.lstrip()
+    for char in "`~":
+        if stripped.startswith(char * 3):
+            return stripped[:len(stripped) - len(stripped.lstrip(char))]
+    return None
+
+
+def set_history_file(path: Optional[str], max_entries: int = 1000) -> None:
+    """Keep the input history in a file (None keeps it in memory), up to max_entries."""
+    global _history_file, _max_history, _prompt_session
+    _history_file = path
+    _max_history = max_entries
+    # The next input starts a session with the new history
+    _prompt_session = None
+
+
+def _get_session(completions: Optional[List[str]]):
+    """Return the shared PromptSession, pointed at the given completions."""
+    global _prompt_session, _completer
+    if _prompt_session is None:
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+        from prompt_toolkit.styles import Style
+        from .file_completer import create_completer
+        from .input_history import BoundedHistory
+        
+        # Use combined completer for commands and file paths
+        _completer = create_completer(list(completions or []))
+        
+        # Create a style with auto-suggestion preview in gray
+        style = Style.from_dict({
+            # Default text style
+            '': '#ffffff',
+            # Auto-suggestions in gray
+            'auto-suggest': 'fg:#666666',
+            # Selected completion in menu
+            'completion-menu.completion.current': 'bg:#00aaaa #000000',
+            'completion-menu.completion': 'bg:#008888 #ffffff',
+        })
+        
+        _prompt_session = PromptSession(
+            completer=_completer,
             style=style,
             complete_while_typing=True,  # Show completions as you type
+            # Fuzzy file matches in a large tree must not hold up typing
+            complete_in_thread=True,
             auto_suggest=AutoSuggestFromHistory(),  # Suggest from history
-            history=_command_history,  # Enable history with up/down arrows
+            # Enable history with up/down arrows
+            history=BoundedHistory(_history_file, _max_history),
             enable_history_search=False,  # Disable Ctrl+R search
         )
-        return result
+    elif completions and _completer.commands != completions:
+        # Slash commands changed, update the completer in place
+        _completer.commands = list(completions)
+    
+    # Inputs without completions (e.g. questions from a slash command) get no completer
+    _prompt_session.completer = _completer if completions else None
+    return _prompt_session
+
+
+def set_scripted_input(lines: Optional[Iterable[str]]) -> None:
+    """Answer input prompts from lines, None reads the keyboard again.
+    
+    Each prompt takes the next line and echoes it. Running out of lines ends the chat
+    like Ctrl+D would. Combine it with set_auto_approve(True) to run whole sessions
+    unattended.
+    """
+    global _scripted_input
+    _scripted_input = iter(lines) if lines is not None else None
+
+
+def _next_scripted(padded_prompt: str) -> str:
+    try:
+        line = next(_scripted_input)
+    except StopIteration:
+        raise KeyboardInterrupt() from None
+    _emit(escape(padded_prompt + line), padded_prompt + line)
+    return line
+
+
+def input(prompt_text: str, indent: int = LEFT_PADDING, completions: Optional[List[str]] = None) -> str:
+    """Get input with left padding and optional completions."""
+    padded_prompt = " " * indent + prompt_text
+    if _scripted_input is not None:
+        return _next_scripted(padded_prompt)
+    
+    try:
+        # Use prompt_toolkit with completer and auto-suggestions
+        return _get_session(completions).prompt(padded_prompt)
     except (KeyboardInterrupt, EOFError):
         raise KeyboardInterrupt()
 
 
+async def input_async(
+    prompt_text: str,
+    indent: int = LEFT_PADDING,
+    completions: Optional[List[str]] = None,
+) -> str:
+    """Get input without blocking the event loop, with optional completions."""
+    padded_prompt = " " * indent + prompt_text
+    if _scripted_input is not None:
+        return _next_scripted(padded_prompt)
+    
+    try:
+        return await _get_session(completions).prompt_async(padded_prompt)
+    except (KeyboardInterrupt, EOFError):
+        raise KeyboardInterrupt() from None
+
+
+def set_auto_approve(enabled: bool) -> None:
+    """Approve every confirmation without asking. Meant for headless runs."""
+    global _auto_approve
+    _auto_approve = enabled
+
+
 def confirm(prompt: str, indent: int = LEFT_PADDING, default: bool = True) -> bool:
     """Ask for confirmation with left padding."""
+    if _auto_approve:
+        return True
+    from rich.prompt import Confirm
     # Add padding to the prompt
     padded_prompt = " " * indent + prompt
     return Confirm.ask(padded_prompt, default=default, console=_console)
@@ -285,6 +654,12 @@ def confirm(prompt: str, indent: int = LEFT_PADDING, default: bool = True) -> bo
 
 def choice(prompt_text: str, choices: List[str], indent: int = LEFT_PADDING) -> str:
     """Present choices using questionary select."""
+    if _scripted_input is not None:
+        # A scripted answer has to be one of the choices, anything else picks the first
+        answer = _next_scripted(" " * indent + prompt_text + " ")
+        return answer if answer in choices else choices[0]
+    import questionary
+    
     # Add blank line before the choice
     print("")
     
@@ -314,7 +689,9 @@ def show_banner() -> None:
     """Display the ASCII art banner with padding."""
     # Determine which art and subtitle to use
     ascii_art = _custom_ascii_art if _custom_ascii_art is not None else _DEFAULT_ASCII_ART
-    subtitle = _custom_subtitle if _custom_subtitle is not None else _DEFAULT_SUBTITLE
+    subtitle = _custom_subtitle
+    if subtitle is None:
+        subtitle = _DEFAULT_SUBTITLE.format(version=_get_version())
     
     padding = " " * LEFT_PADDING
     
@@ -334,8 +711,8 @@ def show_banner() -> None:
         banner_lines.append(f"{padding}{line}")
     
     # Print the banner
-    _console.print()  # Add space before banner
-    _console.print('\n'.join(banner_lines))
+    _emit("", "")  # Add space before banner
+    _emit('\n'.join(banner_lines))
 
 
 def trust_tool(tool_name: str) -> None:
@@ -355,18 +732,30 @@ def is_tool_trusted(tool_name: str) -> bool:
 
 def confirm_tool_action(tool_name: str, action_description: str, details: dict = None, default: bool = True) -> bool:
     """Confirm a tool action, respecting trust settings."""
-    # If tool is trusted, auto-confirm
-    if is_tool_trusted(tool_name):
-        _console.print(f"{' ' * LEFT_PADDING}[dim]Auto-executing trusted tool: {tool_name}[/dim]")
+    padding = " " * LEFT_PADDING
+    # If tool is trusted (or everything is approved), auto-confirm
+    if is_tool_trusted(tool_name) or _auto_approve:
+        _emit(
+            f"{padding}[dim]Auto-executing trusted tool: {tool_name}[/dim]",
+            f"{padding}Auto-executing trusted tool: {tool_name}",
+        )
         return True
     
     # Otherwise, show details and ask for confirmation
-    _console.print(f"{' ' * LEFT_PADDING}[bold yellow]Tool: {tool_name}[/bold yellow]")
-    _console.print(f"{' ' * LEFT_PADDING}[bold]Action:[/bold] {action_description}")
+    _emit(
+        f"{padding}[bold yellow]Tool: {tool_name}[/bold yellow]",
+        f"{padding}Tool: {tool_name}",
+    )
+    _emit(
+        f"{padding}[bold]Action:[/bold] {action_description}",
+        f"{padding}Action: {action_description}",
+    )
     
     if details:
         for key, value in details.items():
             if value:  # Only show non-empty values
-                _console.print(f"{' ' * LEFT_PADDING}[bold]{key}:[/bold] {value}")
+                _emit(
+                    f"{padding}[bold]{key}:[/bold] {value}", f"{padding}{key}: {value}"
+                )
     
     return confirm(f"Execute this {tool_name} action?", default=default)
\ No newline at end of file
@@ -0,0 +1,438 @@
+"""An in-memory index of the files in a working directory.
+
+The @ completion and the find_files tool both need to know which files exist, and
+walking a large tree again for every keystroke or tool call takes seconds. A
+WorkspaceIndex walks the tree once on a background thread, skipping what the ignore
+rules exclude, and then polls the mtime of every directory it holds. Only directories
+whose mtime changed are scanned again (a changed ignore file rescans the subtree below
+it). Files whose content changes in place keep the size and mtime of their last scan
+until their directory changes. Symlinked directories that lead to a place under the root
+are walked like real ones, except where the link leads back to a directory above it.
+Links that lead out of the root are listed but not walked, and a walk stops at
+max_files files, so an index started in a home directory stays bounded.
+
+The files are kept as a table: all paths, and all file names, in one newline separated
+string each, with arrays of their offsets, sizes and mtimes. A glob or fuzzy query is a
+single regex search over one of those strings, so even trees with hundreds of thousands
+of files answer in milliseconds.
+"""
+
+import heapq
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+
+from . import ignore
+from .ignore import IgnoreRules
+
+
+POLL_SECONDS = 2.0
+
+# Polling never takes more than this share of the time
+MAX_POLL_SHARE = 0.1
+
+MAX_FILES = 500_000
+
+
+class IndexedFile(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class _Dir(NamedTuple):
+    """One scan of a directory: its kept entries and what tells a change."""
+    mtime_ns: int
+    # (st_dev, st_ino) of the directory,
+    # a symlink that leads back to an ancestor is not walked
+    ident: Tuple[int, int]
+    # mtimes of the directory's own ignore files, None where there is none
+    ignore_key: Tuple[Optional[int], ...]
+    # The rules for the directory's entries, including its own ignore files
+    rules: IgnoreRules
+    names: Tuple[str, ...]
+    sizes: array
+    mtimes: array
+    subdirs: Tuple[str, ...]
+    # Symlinked directories that lead out of the root, listed but not walked
+    links: Tuple[str, ...]
+
+
+def _ignore_key(directory: str) -> Tuple[Optional[int], ...]:
+    key = []
+    for name in ignore.IGNORE_FILES:
+        try:
+            key.append(os.stat(os.path.join(directory, name)).st_mtime_ns)
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+
+class _Table:
+    """The files of one version of the index, a directory's files before its subdirs.
+
+    Paths and file names each sit in one newline separated string, in the same row
+    order, with the offset of every row in an array.
+    """
+
+    def __init__(self, dirs: Dict[str, _Dir]):
+        paths, names = [], []
+        self.offsets, self.name_offsets = array("Q"), array("Q")
+        self.sizes, self.mtimes = array("Q"), array("q")
+        position = name_position = 0
+        for relative in sorted(dirs):
+            directory = dirs[relative]
+            prefix = f"{relative}/" if relative else ""
+            for name in directory.names:
+                self.offsets.append(position)
+                self.name_offsets.append(name_position)
+                paths.append(prefix + name)
+                names.append(name)
+                position += len(prefix) + len(name) + 1
+                name_position += len(name) + 1
+            self.sizes.extend(directory.sizes)
+            self.mtimes.extend(directory.mtimes)
+        self.offsets.append(position)
+        self.name_offsets.append(name_position)
+        self.paths = "\n".join(paths) + "\n" if paths else ""
+        self.names = "\n".join(names) + "\n" if names else ""
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def file(self, row: int) -> IndexedFile:
+        path = self.paths[self.offsets[row]:self.offsets[row + 1] - 1]
+        return IndexedFile(path, self.sizes[row], self.mtimes[row])
+
+    def rows(
+        self, regex: "re.Pattern", names: bool = False, limit: Optional[int] = None
+    ) -> List[int]:
+        """Rows where regex matches within the path (or file name), in table order."""
+        if names:
+            text, offsets = self.names, self.name_offsets
+        else:
+            text, offsets = self.paths, self.offsets
+        found = []
+        for match in regex.finditer(text):
+            row = bisect_right(offsets, match.start()) - 1
+            # An empty match after the last newline is not a row
+            if row >= len(self):
+                break
+            if found and found[-1] == row:
+                continue
+            found.append(row)
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+
+def _subsequence(query: str) -> str:
+    """Regex for the characters of query in order, all on one line.
+
+    Each gap excludes the next character, so there is one way to match and no
+    backtracking.
+    """
+    escaped = [re.escape(c) for c in query]
+    return escaped[0] + "".join(f"[^{c}\\n]*{c}" for c in escaped[1:])
+
+
+class WorkspaceIndex:
+    """Files under root that the ignore rules keep, refreshed by polling dir mtimes."""
+
+    def __init__(
+        self,
+        root: Union[str, Path] = ".",
+        poll_seconds: float = POLL_SECONDS,
+        max_files: int = MAX_FILES,
+    ):
+        self.root = str(Path(root).resolve())
+        self.poll_seconds = poll_seconds
+        self.max_files = max_files
+        # Whether a walk stopped at max_files, files past it are missing
+        self.truncated = False
+        self.dirs = {}
+        self.ready = threading.Event()
+        self.lock = threading.RLock()
+        self._table = _Table({})
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "WorkspaceIndex":
+        """Build the index on a background thread, which then polls for changes."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="bespoken-index", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the first build is done. Returns whether it is."""
+        return self.ready.wait(timeout)
+
+    def _run(self) -> None:
+        self.build()
+        interval = self.poll_seconds
+        while not self._stop.wait(interval):
+            started = time.monotonic()
+            self.refresh()
+            # Back off in trees where a poll is slow
+            elapsed = time.monotonic() - started
+            interval = max(self.poll_seconds, elapsed / MAX_POLL_SHARE)
+
+    def _path(self, relative: str) -> str:
+        return os.path.join(self.root, relative) if relative else self.root
+
+    def build(self) -> None:
+        """Walk the whole tree, replacing whatever the index held."""
+        dirs = {}
+        self.truncated = False
+        self._walk(dirs, "", IgnoreRules())
+        with self.lock:
+            self.dirs = dirs
+            self._table = _Table(dirs)
+            self._dirty = False
+        self.ready.set()
+
+    def _walk(
+        self, dirs: Dict[str, _Dir], relative: str, parent_rules: IgnoreRules
+    ) -> None:
+        # Symlinked directories are followed,
+        # but not into a directory that is already on the path
+        stack = [(relative, parent_rules, self._ancestors(dirs, relative))]
+        files = sum(len(directory.names) for directory in dirs.values())
+        while stack:
+            if files >= self.max_files:
+                self.truncated = True
+                return
+            relative, rules, ancestors = stack.pop()
+            directory = self._scan(relative, rules)
+            if directory is None or directory.ident in ancestors:
+                continue
+            dirs[relative] = directory
+            files += len(directory.names)
+            below = ancestors | {directory.ident}
+            for name in directory.subdirs:
+                path = f"{relative}/{name}" if relative else name
+                stack.append((path, directory.rules, below))
+
+    @staticmethod
+    def _ancestors(dirs: Dict[str, _Dir], relative: str) -> FrozenSet[Tuple[int, int]]:
+        """Identities of the scanned directories above relative."""
+        ancestors, parent = set(), relative
+        while parent:
+            parent = parent.rpartition("/")[0]
+            if parent in dirs:
+                ancestors.add(dirs[parent].ident)
+        return frozenset(ancestors)
+
+    def _inside(self, path: str) -> bool:
+        real = os.path.realpath(path)
+        return real == self.root or real.startswith(self.root + os.sep)
+
+    def _scan(self, relative: str, parent_rules: IgnoreRules) -> Optional[_Dir]:
+        path = self._path(relative)
+        try:
+            # Taken before the listing,
+            # so a change during the scan shows at the next poll
+            own = os.stat(path)
+            rules = parent_rules.enter(path, relative)
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return None
+        names, sizes, mtimes, subdirs, links = [], array("Q"), array("q"), [], []
+        for entry in entries:
+            # Paths are newline separated in the table
+            if "\n" in entry.name:
+                continue
+            entry_path = f"{relative}/{entry.name}" if relative else entry.name
+            try:
+                is_dir = entry.is_dir()
+                if rules.ignored(entry_path, is_dir):
+                    continue
+                if is_dir and entry.is_symlink() and not self._inside(entry.path):
+                    links.append(entry.name)
+                elif is_dir:
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    names.append(entry.name)
+                    sizes.append(stat.st_size)
+                    mtimes.append(stat.st_mtime_ns)
+            except OSError:
+                continue
+        return _Dir(
+            own.st_mtime_ns, (own.st_dev, own.st_ino), _ignore_key(path), rules,
+            tuple(names), sizes, mtimes, tuple(subdirs), tuple(links),
+        )
+
+    def _stale(self, relative: str, directory: _Dir) -> bool:
+        path = self._path(relative)
+        try:
+            if os.stat(path).st_mtime_ns != directory.mtime_ns:
+                return True
+        except OSError:
+            return True
+        # Editing an ignore file in place leaves the directory's mtime alone
+        if all(key is None for key in directory.ignore_key):
+            return False
+        return _ignore_key(path) != directory.ignore_key
+
+    def _parent_rules(self, relative: str) -> IgnoreRules:
+        if not relative:
+            return IgnoreRules()
+        parent = relative.rpartition("/")[0]
+        directory = self.dirs.get(parent)
+        return directory.rules if directory else ignore.load(self.root, parent)
+
+    def _drop(self, relative: str) -> None:
+        prefix = f"{relative}/" if relative else ""
+        gone = [key for key in self.dirs if key == relative or key.startswith(prefix)]
+        for key in gone:
+            del self.dirs[key]
+
+    def _rescan(self, relative: str) -> None:
+        """Rescan a changed directory, walking new subdirs and dropping gone ones."""
+        old = self.dirs.get(relative)
+        new = self._scan(relative, self._parent_rules(relative))
+        self._dirty = True
+        if new is None:
+            self._drop(relative)
+            return
+        if old is None or new.ignore_key != old.ignore_key:
+            # Different rules for everything below
+            self._drop(relative)
+            self._walk(self.dirs, relative, self._parent_rules(relative))
+            return
+        self.dirs[relative] = new
+        for name in set(old.subdirs) - set(new.subdirs):
+            self._drop(f"{relative}/{name}" if relative else name)
+        for name in new.subdirs:
+            child = f"{relative}/{name}" if relative else name
+            if child not in self.dirs:
+                self._walk(self.dirs, child, new.rules)
+
+    def refresh(self) -> bool:
+        """Rescan the directories that changed since their last scan.
+
+        Returns whether any did.
+        """
+        if not self.ready.is_set():
+            return False
+        # The stats run without the lock, only the rescans hold it
+        stale = [
+            relative
+            for relative, directory in list(self.dirs.items())
+            if self._stale(relative, directory)
+        ]
+        if not stale:
+            return False
+        with self.lock:
+            # Parents first, their rescan may already cover a child
+            for relative in sorted(stale):
+                directory = self.dirs.get(relative)
+                if directory is not None and self._stale(relative, directory):
+                    self._rescan(relative)
+        return True
+
+    def table(self) -> _Table:
+        with self.lock:
+            if self._dirty:
+                self._table = _Table(self.dirs)
+                self._dirty = False
+            return self._table
+
+    def list_dir(
+        self, relative: str = ""
+    ) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+        """(subdirectories, files) of a directory, checking its mtime first.
+
+        None for directories that do not exist or that the ignore rules exclude.
+        """
+        relative = relative.strip("/")
+        with self.lock:
+            directory = self.dirs.get(relative)
+            if directory is None and not self.ready.is_set():
+                # Still building, scan just this directory
+                directory = self._scan(relative, self._parent_rules(relative))
+                if directory is not None:
+                    self.dirs[relative] = directory
+            elif directory is None:
+                # A directory made since the last poll shows up
+                # once its parent is rescanned
+                parent = relative
+                while parent and parent not in self.dirs:
+                    parent = parent.rpartition("/")[0]
+                if parent in self.dirs and self._stale(parent, self.dirs[parent]):
+                    self._rescan(parent)
+                directory = self.dirs.get(relative)
+            elif self._stale(relative, directory):
+                self._rescan(relative)
+                directory = self.dirs.get(relative)
+        if directory is None:
+            return None
+        subdirs = directory.subdirs
+        if directory.links:
+            subdirs = tuple(sorted(subdirs + directory.links))
+        return subdirs, directory.names
+
+    def glob(self, pattern: str, limit: Optional[int] = None) -> List[IndexedFile]:
+        """Files matching a glob. Without a slash it matches file names at any depth."""
+        while pattern.startswith("./"):
+            pattern = pattern[2:]
+        pattern = pattern.strip("/")
+        regex = re.compile(f"^{ignore.translate(pattern, lines=True)}$", re.MULTILINE)
+        table = self.table()
+        rows = table.rows(regex, names="/" not in pattern, limit=limit)
+        return [table.file(row) for row in rows]
+
+    def fuzzy(self, query: str, limit: int = 20) -> List[IndexedFile]:
+        """Best files whose name holds the characters of query in order.
+
+        A query with a slash is matched against whole paths. Names that start with or
+        contain query come first, then shorter paths.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        by_path = "/" in query
+        table = self.table()
+        regex = re.compile(_subsequence(query), re.IGNORECASE)
+        rows = table.rows(regex, names=not by_path)
+        lowered = query.lower()
+        if by_path:
+            text, offsets = table.paths, table.offsets
+        else:
+            text, offsets = table.names, table.name_offsets
+
+        # Scored on the table itself, only the best rows become IndexedFiles
+        def score(row: int):
+            name = text[offsets[row]:offsets[row + 1] - 1].lower()
+            rank = 0 if name.startswith(lowered) else 1 if lowered in name else 2
+            return rank, table.offsets[row + 1] - table.offsets[row], row
+
+        return [table.file(row) for row in heapq.nsmallest(limit, rows, key=score)]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_workspace_index(root: Union[str, Path] = ".") -> WorkspaceIndex:
+    """The shared index of root, started on first use."""
+    root = str(Path(root).resolve())
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = WorkspaceIndex(root).start()
+    return index
@@ -0,0 +1,113 @@
+"""Tests for headless batch mode."""
+
+import asyncio
+import json
+
+import llm
+import pytest
+
+from bespoken import _batch, ui
+from bespoken.tools import TodoTools
+
+
+class EchoModel(llm.AsyncModel):
+    model_id = "echo"
+    can_stream = True
+    supports_tools = True
+
+    async def execute(self, prompt, stream, response, conversation):
+        response.response_json = {"id": f"resp_{id(response)}"}
+        if prompt.tool_results:
+            yield "tool: " + prompt.tool_results[0].output
+            return
+        if prompt.prompt.startswith("todo"):
+            response.add_tool_call(llm.ToolCall(
+                name="TodoTools_add_todo",
+                arguments={"task": prompt.prompt},
+                tool_call_id="t1",
+            ))
+            return
+        if prompt.prompt == "fail":
+            raise RuntimeError("model error")
+        await asyncio.sleep(0.05)
+        yield "echo: " + prompt.prompt
+
+
+@pytest.fixture
+def echo_model(monkeypatch):
+    monkeypatch.setattr(_batch, "_load_model", lambda name: (EchoModel(), True))
+
+
+def write_prompts(path, prompts):
+    path.write_text("\n".join(json.dumps(prompt) for prompt in prompts) + "\n")
+
+
+def read_results(path):
+    records = map(json.loads, path.read_text().splitlines())
+    return {record["id"]: record for record in records}
+
+
+def test_batch_writes_one_result_per_prompt(tmp_path, echo_model):
+    """Test that every prompt gets its own result line with output and history."""
+    prompts = [{"id": "a", "prompt": "hello"}, {"prompt": "world"}]
+    write_prompts(tmp_path / "in.jsonl", prompts)
+
+    failures = _batch.batch(tmp_path / "in.jsonl", tmp_path / "out.jsonl", workers=2)
+
+    results = read_results(tmp_path / "out.jsonl")
+    assert failures == 0
+    assert results["a"]["output"] == "echo: hello"
+    assert results["2"]["output"] == "echo: world"
+    assert results["a"]["history"][0]["content"][0]["text"] == "hello"
+    assert len(results["a"]["history"]) == 2
+
+
+def test_batch_runs_prompts_concurrently(tmp_path, echo_model):
+    """Test that the prompts run at the same time when there are enough workers."""
+    write_prompts(tmp_path / "in.jsonl", [{"prompt": f"p{i}"} for i in range(20)])
+
+    _batch.batch(tmp_path / "in.jsonl", tmp_path / "out.jsonl", workers=20)
+
+    results = read_results(tmp_path / "out.jsonl")
+    durations = [record["duration"] for record in results.values()]
+    assert len(durations) == 20
+    # 20 sequential prompts would take at least a second
+    assert max(durations) < 0.5
+
+
+def test_batch_records_errors_and_keeps_going(tmp_path, echo_model):
+    """Test that a failing prompt is recorded without stopping the others."""
+    write_prompts(tmp_path / "in.jsonl", [{"prompt": "fail"}, {"prompt": "ok"}])
+
+    failures = _batch.batch(tmp_path / "in.jsonl", tmp_path / "out.jsonl")
+
+    results = read_results(tmp_path / "out.jsonl")
+    assert failures == 1
+    assert "model error" in results["1"]["error"]
+    assert results["2"]["output"] == "echo: ok"
+
+
+def test_batch_gives_each_conversation_fresh_tools(tmp_path, echo_model):
+    """Test that a tools factory is called once per conversation."""
+    prompts = [{"prompt": "todo one"}, {"prompt": "todo two"}]
+    write_prompts(tmp_path / "in.jsonl", prompts)
+    created = []
+
+    def make_tools():
+        created.append(TodoTools())
+        return [created[-1]]
+
+    _batch.batch(tmp_path / "in.jsonl", tmp_path / "out.jsonl", tools=make_tools)
+
+    assert len(created) == 2
+    assert all(len(tools._todos) == 1 for tools in created)
+
+
+def test_auto_approve_skips_confirmation(monkeypatch):
+    """Test that confirmations are approved without prompting in auto-approve mode."""
+    monkeypatch.setattr(ui, "_auto_approve", True)
+    monkeypatch.setattr(
+        "rich.prompt.Confirm.ask", lambda *args, **kwargs: pytest.fail("prompted")
+    )
+    assert ui.confirm("Apply these changes?", default=False)
+    assert ui.confirm_tool_action("GitTool", "Execute: git status")
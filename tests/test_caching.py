@@ -0,0 +1,88 @@
+"""Tests for prompt caching helpers."""
+
+import llm
+from llm.parts import Message, TextPart
+
+from bespoken.caching import (
+    CACHE_CONTROL,
+    cache_options,
+    cache_usage,
+    with_cache_breakpoints,
+)
+
+
+def marked(messages):
+    return [
+        i for i, m in enumerate(messages)
+        if any(p.provider_metadata == CACHE_CONTROL for p in m.parts)
+    ]
+
+
+def test_breakpoints_cover_system_prompt_on_first_turn():
+    """Test that the first turn gets a cacheable system message."""
+    messages = with_cache_breakpoints([], system="You are helpful")
+    assert [m.role for m in messages] == ["system"]
+    assert marked(messages) == [0]
+
+
+def test_breakpoint_moves_forward():
+    """Test that only the system prompt and the end of the history stay marked."""
+    history = [Message(role="system", parts=[TextPart(text="sys")])]
+    for i in range(3):
+        history = with_cache_breakpoints(history)
+        history += [
+            Message(role="user", parts=[TextPart(text=f"q{i}")]),
+            Message(role="assistant", parts=[TextPart(text=f"a{i}")]),
+        ]
+    history = with_cache_breakpoints(history)
+    assert marked(history) == [0, len(history) - 1]
+
+
+def test_breakpoints_keep_other_metadata():
+    """Test that moving a breakpoint keeps unrelated provider metadata."""
+    metadata = {"openai": {"id": "x"}, **CACHE_CONTROL}
+    part = TextPart(text="a", provider_metadata=metadata)
+    messages = [
+        Message(role="assistant", parts=[part]),
+        Message(role="user", parts=[TextPart(text="b")]),
+    ]
+    result = with_cache_breakpoints(messages)
+    assert result[0].parts[0].provider_metadata == {"openai": {"id": "x"}}
+    assert marked(result) == [1]
+
+
+def test_cache_usage_reads_provider_details():
+    """Test that cache counts are found for both Anthropic and OpenAI style usage."""
+
+    class FakeResponse:
+        def __init__(self, input_tokens, token_details):
+            self.input_tokens = input_tokens
+            self.token_details = token_details
+
+    usage = cache_usage([
+        FakeResponse(
+            100, {"cache_read_input_tokens": 80, "cache_creation_input_tokens": 10}
+        ),
+        FakeResponse(50, {"prompt_tokens_details": {"cached_tokens": 40}}),
+        FakeResponse(None, None),
+    ])
+    assert (usage.cache_read, usage.cache_write, usage.input_tokens) == (120, 10, 150)
+
+
+def test_cache_options_only_for_models_with_a_cache_option():
+    """Test that the cache option is only passed to models that declare it."""
+
+    class PlainModel(llm.Model):
+        model_id = "plain"
+
+        def execute(self, prompt, stream, response, conversation):
+            yield ""
+
+    class CachingModel(PlainModel):
+        model_id = "caching"
+
+        class Options(llm.Options):
+            cache: bool = False
+
+    assert cache_options(PlainModel()) == {}
+    assert cache_options(CachingModel()) == {"cache": True}
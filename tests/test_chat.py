@@ -0,0 +1,183 @@
+"""Tests for the asyncio chat engine helpers."""
+
+import asyncio
+import json
+import threading
+
+import llm
+
+from bespoken import __main__ as chat_module
+from bespoken.__main__ import _HistoryCursor, _ThreadedChain, _async_tools, _warm_up
+from bespoken.mock_model import MockModel
+
+
+def test_threaded_chain_yields_items_in_order():
+    """Test that a blocking iterable is consumed on a worker thread, in order."""
+    threads = []
+
+    def produce():
+        for i in range(5):
+            threads.append(threading.current_thread())
+            yield i
+
+    async def consume():
+        return [item async for item in _ThreadedChain().iterate(produce())]
+
+    assert asyncio.run(consume()) == [0, 1, 2, 3, 4]
+    assert threading.main_thread() not in threads
+
+
+def test_threaded_chain_runs_callbacks_after_earlier_items():
+    """Test that in_order callbacks run on the loop after earlier items were handled."""
+    events = []
+
+    async def consume():
+        threaded = _ThreadedChain()
+        callback = threaded.in_order(lambda: events.append("callback"))
+
+        def produce():
+            yield "a"
+            yield "b"
+            callback()
+            yield "c"
+
+        async for item in threaded.iterate(produce()):
+            events.append(item)
+
+    asyncio.run(consume())
+    assert events == ["a", "b", "callback", "c"]
+
+
+def test_threaded_chain_reraises_worker_errors():
+    """Test that an error raised while iterating reaches the consumer."""
+    def produce():
+        yield 1
+        raise ValueError("boom")
+
+    async def consume():
+        return [item async for item in _ThreadedChain().iterate(produce())]
+
+    try:
+        asyncio.run(consume())
+    except ValueError as e:
+        assert str(e) == "boom"
+    else:
+        raise AssertionError("ValueError was not raised")
+
+
+def test_threaded_chain_stops_when_the_consumer_is_cancelled(tmp_path):
+    """Test that cancelling mid-stream releases a worker waiting on a tool call.
+
+    Otherwise asyncio.run never returns.
+    """
+    recording = tmp_path / "session.jsonl"
+    call = {
+        "name": "Greeter_greet", "arguments": {"name": "Ada"}, "tool_call_id": "call-1"
+    }
+    entries = [
+        {"chunks": ["Let me ", "greet."], "tool_calls": [call]},
+        {"chunks": ["Done."]},
+    ]
+    recording.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    calls = []
+
+    async def consume():
+        threaded = _ThreadedChain()
+        model = MockModel(recording=str(recording))
+        conversation = model.conversation(tools=[Greeter()])
+        before_call = threaded.in_order(lambda *args: calls.append(args))
+        chain = conversation.chain("Say hi to Ada", before_call=before_call)
+        async for _ in threaded.iterate(chain):
+            # The worker reaches the tool call while this chunk is being handled
+            await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.3)
+        task.cancel()
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert calls == []
+
+
+class Greeter(llm.Toolbox):
+    def greet(self, name: str) -> str:
+        """Greet someone."""
+        return f"Hello {name} from {threading.current_thread().name}"
+
+
+def test_async_tools_run_blocking_tools_off_the_loop():
+    """Test that toolbox methods keep their schema but run on a worker thread."""
+    async def run():
+        tools = _async_tools([Greeter()], asyncio.Lock())
+        assert [tool.name for tool in tools] == ["Greeter_greet"]
+        assert "name" in tools[0].input_schema["properties"]
+        return await tools[0].implementation(name="Ada")
+
+    result = asyncio.run(run())
+    assert result.startswith("Hello Ada from ")
+    assert threading.main_thread().name not in result
+
+
+class SyncModel(llm.Model):
+    model_id = "sync"
+    needs_key = "sync"
+    key_env_var = "BESPOKEN_TEST_KEY"
+
+    def execute(self, prompt, stream, response, conversation):
+        yield "hi"
+
+
+def test_warm_up_resolves_model_and_tool_schemas(monkeypatch):
+    """Test that the warm-up hands back a conversation with the toolboxes expanded."""
+    monkeypatch.setenv("BESPOKEN_TEST_KEY", "secret")
+    monkeypatch.setattr(chat_module, "_load_model", lambda name: (SyncModel(), False))
+
+    model, is_async, conversation = _warm_up("sync", [Greeter()], None)
+
+    assert not is_async
+    assert conversation.model is model
+    assert [tool.name for tool in conversation.tools] == ["Greeter_greet"]
+    assert "name" in conversation.tools[0].input_schema["properties"]
+
+
+class FakeResponse:
+    def __init__(self, response_id):
+        self.response_json = {"id": response_id}
+
+
+class FakeConversation:
+    def __init__(self):
+        self.responses = []
+
+
+def test_history_cursor_delivers_each_response_once():
+    """Test that only responses finished since the last delivery are sent."""
+    batches = []
+    cursor = _HistoryCursor(batches.append)
+    conversation = FakeConversation()
+
+    conversation.responses.append(FakeResponse("r1"))
+    cursor.deliver(conversation)
+    cursor.deliver(conversation)
+    conversation.responses.extend([FakeResponse("r2"), FakeResponse("r3")])
+    cursor.deliver(conversation)
+
+    assert batches == [[{"id": "r1"}], [{"id": "r2"}, {"id": "r3"}]]
+
+
+def test_history_cursor_restarts_for_a_new_conversation():
+    """Test that a swapped conversation is delivered from its first response."""
+    batches = []
+    cursor = _HistoryCursor(batches.append)
+    first, second = FakeConversation(), FakeConversation()
+    first.responses.extend([FakeResponse("a1"), FakeResponse("a2")])
+    second.responses.append(FakeResponse("b1"))
+
+    cursor.deliver(first)
+    cursor.deliver(second)
+
+    assert batches == [[{"id": "a1"}, {"id": "a2"}], [{"id": "b1"}]]
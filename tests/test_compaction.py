@@ -0,0 +1,79 @@
+"""Tests for context compaction."""
+
+from llm.parts import Message, TextPart, ToolCallPart, ToolResultPart
+
+from bespoken.compaction import (
+    SUMMARY_PREFIX,
+    ContextCompactor,
+    estimate_tokens,
+    summarize_turns,
+)
+
+
+def make_turn(question, tool_output=None):
+    """Build the messages of one turn, optionally with a tool call in between."""
+    messages = [Message(role="user", parts=[TextPart(text=question)])]
+    if tool_output is not None:
+        call = ToolCallPart(name="read_file", arguments={}, tool_call_id="t")
+        result = ToolResultPart(name="read_file", output=tool_output, tool_call_id="t")
+        messages.append(Message(role="assistant", parts=[call]))
+        messages.append(Message(role="tool", parts=[result]))
+    answer = TextPart(text=f"answer to {question}")
+    messages.append(Message(role="assistant", parts=[answer]))
+    return messages
+
+
+def test_compact_leaves_small_history_alone():
+    """Test that a chain under the budget is returned unchanged."""
+    messages = [Message(role="system", parts=[TextPart(text="sys")])] + make_turn("hi")
+    compactor = ContextCompactor(budget=1000)
+    assert compactor.compact(messages) is messages
+    assert compactor.stats.compactions == 0
+
+
+def test_compact_stubs_old_tool_outputs():
+    """Test that old tool outputs are stubbed while the recent turns stay verbatim."""
+    system = [Message(role="system", parts=[TextPart(text="sys")])]
+    messages = (
+        system
+        + make_turn("first", "x" * 4000)
+        + make_turn("second", "y" * 400)
+        + make_turn("third")
+    )
+    compactor = ContextCompactor(budget=500, keep_turns=2)
+
+    compacted = compactor.compact(messages)
+
+    assert compacted[0] is messages[0]
+    assert "removed to save context" in compacted[3].parts[0].output
+    assert compacted[3].parts[0].tool_call_id == "t"
+    # The last two turns are untouched
+    assert compacted[5:] == messages[5:]
+    assert estimate_tokens(compacted) <= 500
+    assert compactor.stats.compactions == 1
+    saved = estimate_tokens(messages) - estimate_tokens(compacted)
+    assert compactor.stats.tokens_saved == saved
+
+
+def test_compact_summarizes_older_turns():
+    """Test that older turns are folded into a summary when stubs are not enough."""
+    messages = []
+    for i in range(10):
+        messages += make_turn(f"question {i} " + "words " * 100)
+    compactor = ContextCompactor(budget=400, keep_turns=1)
+
+    compacted = compactor.compact(messages)
+
+    assert compacted[0].parts[0].text.startswith(SUMMARY_PREFIX)
+    assert "question 0" in compacted[0].parts[0].text
+    assert compacted[2:] == messages[-2:]
+    assert compactor.stats.tokens_saved > 0
+
+
+def test_summary_is_carried_into_the_next_summary():
+    """Test that an earlier summary survives being summarized again."""
+    earlier = TextPart(text=f"{SUMMARY_PREFIX}\nUser: the very first question")
+    messages = [Message(role="user", parts=[earlier])] + make_turn("next", "z" * 50)
+    summary = summarize_turns(messages)
+    assert "the very first question" in summary
+    assert "Tools used: read_file" in summary
@@ -0,0 +1,91 @@
+"""Tests for the session file content cache."""
+
+import os
+
+import pytest
+
+from bespoken.file_cache import FileCache, get_file_cache, set_file_cache
+from bespoken.output_budget import OutputBudget
+from bespoken.tools import FileSystem
+
+
+@pytest.fixture
+def cache():
+    cache = FileCache()
+    set_file_cache(cache)
+    yield cache
+    set_file_cache(None)
+
+
+def test_unchanged_file_is_not_sent_again(cache, tmp_path):
+    """Test that a second read of the same version returns the marker."""
+    (tmp_path / "notes.txt").write_text("hello")
+    fs = FileSystem(str(tmp_path))
+    cache.start_turn()
+    assert fs.read_file("notes.txt") == "hello"
+    cache.start_turn()
+
+    assert fs.read_file("notes.txt") == (
+        "[notes.txt is unchanged since you read it in turn 1, use that content.]"
+    )
+    assert cache.hits == 1
+
+
+def test_touched_file_with_the_same_content_is_unchanged(cache, tmp_path):
+    """Test that only the content counts once the mtime changed."""
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    fs = FileSystem(str(tmp_path))
+    fs.read_file("notes.txt")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    assert "unchanged" in fs.read_file("notes.txt")
+    path.write_text("changed")
+    assert fs.read_file("notes.txt") == "changed"
+
+
+def test_writes_update_the_cache(cache, tmp_path):
+    """Test that the model is not sent back what it just wrote."""
+    fs = FileSystem(str(tmp_path))
+    fs.write_file("new.txt", "written")
+    assert fs.read_file("new.txt") == (
+        "[new.txt is unchanged since you wrote it earlier in this turn, "
+        "use that content.]"
+    )
+
+
+def test_large_files_and_ranges_are_always_read(tmp_path):
+    """Test that reads that may have been cut down, or ranged reads, skip the marker."""
+    set_file_cache(FileCache(max_chars=10))
+    try:
+        (tmp_path / "long.txt").write_text("x" * 20)
+        fs = FileSystem(str(tmp_path))
+        assert fs.read_file("long.txt") == fs.read_file("long.txt") == "x" * 20
+        assert fs.read_file("long.txt", start_line=1, end_line=1).startswith("x" * 20)
+    finally:
+        set_file_cache(None)
+
+
+def test_no_cache_outside_a_chat(tmp_path):
+    """Test that the tools read the file every time when no cache is active."""
+    assert get_file_cache() is None
+    (tmp_path / "notes.txt").write_text("hello")
+    fs = FileSystem(str(tmp_path))
+    assert fs.read_file("notes.txt") == fs.read_file("notes.txt") == "hello"
+
+
+def test_read_cut_by_the_turn_budget_is_not_cached(cache, tmp_path):
+    """Test that a file whose read the output budget shortened is sent again."""
+    (tmp_path / "big.txt").write_text("line\n" * 2_000)
+    fs = FileSystem(str(tmp_path))
+    budget = OutputBudget(per_tool=10_000, per_turn=1_000)
+    read_file = budget.wrap(fs.read_file)
+    cache.start_turn()
+    budget.start_turn()
+    assert "left out" in read_file("big.txt")
+    assert "big.txt" not in [path.name for path in cache.entries]
+
+    budget.start_turn()
+    cache.start_turn()
+    assert "unchanged" not in read_file("big.txt")
@@ -2,12 +2,14 @@
 
 import tempfile
 import shutil
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import patch
 import pytest
 
 from bespoken.tools import FileSystem
-from bespoken import config
+from bespoken import config, search
 
 
 @pytest.fixture
@@ -104,4 +106,284 @@ def test_replace_in_file_with_debug_mode(mock_tool_status, mock_tool_debug, file
     # Check that debug messages were called
     debug_calls = [str(call[0][0]) for call in mock_tool_debug.call_args_list]
     assert any("LLM calling tool: replace_in_file(" in msg for msg in debug_calls)
-    assert any("Tool returning to LLM" in msg for msg in debug_calls)
\ No newline at end of file
+    assert any("Tool returning to LLM" in msg for msg in debug_calls)
+
+@pytest.fixture
+def big_file(temp_dir):
+    """A file with more lines than fit in one block of the line index."""
+    path = temp_dir / "big.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 50_001)))
+    return path
+
+
+def test_read_file_line_range(file_tools, big_file):
+    """Test reading a range of lines from deep inside a file."""
+    result = file_tools.read_file("big.log", start_line=40_000, end_line=40_002)
+
+    assert result.startswith(
+        "line 40000\nline 40001\nline 40002\n[Lines 40,000-40,002 of big.log"
+    )
+
+
+def test_read_file_range_to_the_end(file_tools, big_file):
+    """Test that an open-ended range stops at the last line and says so."""
+    result = file_tools.read_file("big.log", start_line=49_999)
+    assert result == (
+        "line 49999\nline 50000\n[Lines 49,999-50,000 of big.log, the end of the file.]"
+    )
+
+    result = file_tools.read_file("big.log", start_line=60_000)
+    assert result == "No lines from line 60000 on, the file has 50,000 lines"
+
+
+def test_read_file_odd_ranges(file_tools, temp_dir):
+    """Test a start before line 1, an end before the start, and an empty byte range."""
+    (temp_dir / "short.txt").write_text("one\ntwo\nthree\n")
+
+    result = file_tools.read_file("short.txt", start_line=-3, end_line=2)
+    assert result == (
+        "one\ntwo\n[Lines 1-2 of short.txt (14 bytes). "
+        "Pass start_line and end_line to read other lines.]"
+    )
+
+    result = file_tools.read_file("short.txt", start_line=3, end_line=1)
+    assert result == "Invalid range: end_line 1 is before start_line 3"
+
+    result = file_tools.read_file("short.txt", offset=4, length=0)
+    assert result == "[Bytes 4-4 of 14. Pass a later offset to read on.]"
+
+
+def test_read_file_byte_range(file_tools, big_file):
+    """Test reading from a byte offset."""
+    result = file_tools.read_file("big.log", offset=7, length=7)
+    assert result.startswith("line 2\n\n[Bytes 7-14 of")
+
+
+def test_read_file_byte_range_counts_bytes_of_the_file(file_tools, temp_dir):
+    """Test that a range ending inside a character reports the offset it ended at.
+
+    Reading past the end says so.
+    """
+    (temp_dir / "accents.txt").write_text("é" * 10, encoding="utf-8")
+
+    result = file_tools.read_file("accents.txt", offset=0, length=3)
+    assert result.endswith("\n[Bytes 0-3 of 20. Pass a later offset to read on.]")
+
+    result = file_tools.read_file("accents.txt", offset=25)
+    assert result == "Offset 25 is past the end of the file (20 bytes)"
+
+
+def test_line_index_is_rebuilt_when_the_file_changes(file_tools, big_file):
+    """Test that a changed file is not read with the offsets of its old version."""
+    file_tools.read_file("big.log", start_line=30_000, end_line=30_000)
+    big_file.write_text("".join(f"row {i}\n" for i in range(1, 50_001)))
+
+    result = file_tools.read_file("big.log", start_line=30_000, end_line=30_000)
+    assert result.startswith("row 30000\n")
+
+
+def test_read_file_large_file_without_range(file_tools, temp_dir):
+    """Test that only the head of a large file is read when no range is given."""
+    from bespoken.tools.filesystem import HEAD_BYTES, WHOLE_FILE_BYTES
+
+    path = temp_dir / "huge.log"
+    path.write_text("x" * 99 + "\n" + ("y" * 99 + "\n") * (WHOLE_FILE_BYTES // 100))
+
+    result = file_tools.read_file("huge.log")
+    assert len(result) < HEAD_BYTES + 200
+    assert result.startswith("x" * 99 + "\n")
+    assert "Pass start_line and end_line to read other lines." in result
+
+
+def test_read_file_is_capped_outside_of_a_chat(temp_dir, big_file):
+    """Test that the file tools elide long output on their own, unless asked not to."""
+    from bespoken.tools import FileTool
+
+    result = FileSystem(str(temp_dir)).read_file("big.log")
+    assert len(result) < 51_000
+    assert result.startswith("line 1\n") and result.endswith("line 50000\n")
+    assert "Call read_file with start_line and end_line" in result
+
+    assert len(FileTool(str(big_file)).read_file()) < 51_000
+    uncapped = FileSystem(str(temp_dir), max_output_tokens=None)
+    assert uncapped.read_file("big.log") == big_file.read_text()
+
+
+@pytest.fixture
+def project(temp_dir):
+    """A small project with ignore files at two levels."""
+    for path in [
+        "src/app/main.py", "src/app/deep/inner.py", "src/app/cache.pyc",
+        "node_modules/pkg/index.js", "build/out.txt", "README.md",
+    ]:
+        (temp_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (temp_dir / path).write_text("x")
+    (temp_dir / ".gitignore").write_text("node_modules/\n*.pyc\n/build\n")
+    (temp_dir / "src" / ".ignore").write_text("deep/\n")
+    return temp_dir
+
+
+def test_list_files_is_a_tree_without_ignored_entries(file_tools, project):
+    """Test the recursive listing honors .gitignore and .ignore files at every level."""
+    result = file_tools.list_files()
+
+    assert "src/\n  .ignore (6 bytes)\n  app/\n    main.py (1 bytes)" in result
+    for ignored in ["node_modules", "build", "cache.pyc", "deep"]:
+        assert ignored not in result
+    assert "4 entries skipped by ignore rules." in result
+
+
+def test_list_files_collapses_below_the_depth(file_tools, project):
+    """Test that directories past the depth are summarized with their entry count."""
+    result = file_tools.list_files(depth=1)
+
+    assert "src/ [2 entries]" in result
+    assert "main.py" not in result
+    assert "directories not expanded (depth 1)." in result
+
+
+def test_list_files_stops_at_max_entries(file_tools, project):
+    """Test that the listing stops at the entry cap and says how to see more."""
+    result = file_tools.list_files(max_entries=2)
+
+    assert len(result.splitlines()) == 4
+    assert "Stopped at 2 entries" in result
+
+
+def test_list_files_of_a_subdirectory_uses_parent_rules(file_tools, project):
+    """Test that listing a subdirectory still applies the ignore files above it."""
+    result = file_tools.list_files("src/app")
+    assert "main.py" in result and "cache.pyc" not in result and "deep" not in result
+
+
+def test_list_files_of_a_missing_directory(file_tools, project):
+    """Test that a missing directory is reported, not listed as empty."""
+    assert file_tools.list_files("src/missing") == "Directory not found: src/missing"
+    assert file_tools.list_files("README.md") == "Directory not found: README.md"
+
+
+@pytest.fixture
+def sources(project):
+    """The small project, with some content to search."""
+    (project / "src/app/main.py").write_text(
+        "import os\n\ndef main():\n    return os.getcwd()\n"
+    )
+    (project / "src/app/deep/inner.py").write_text("def main():\n    pass\n")
+    (project / "node_modules/pkg/index.js").write_text("function main() {}\n")
+    (project / "src/app/logo.png").write_bytes(b"\x89PNG\0\0def main")
+    return project
+
+
+def test_search_skips_ignored_and_binary_files(file_tools, sources):
+    """Test that search returns path:line hits only from files the ignore rules keep."""
+    result = file_tools.search(r"def \w+\(")
+
+    assert result.startswith("src/app/main.py:3: def main():\n")
+    assert "inner.py" not in result and "index.js" not in result
+    assert "1 matches in 1 files. 1 binary files skipped." in result
+
+
+def test_search_literal_with_context(file_tools, sources):
+    """Test literal patterns and the context lines around a hit."""
+    result = file_tools.search("os.getcwd()", literal=True, context=1)
+    assert result.splitlines()[:2] == [
+        "src/app/main.py-3- def main():",
+        "src/app/main.py:4:     return os.getcwd()",
+    ]
+
+    assert "Invalid regular expression" in file_tools.search("getcwd(")
+
+
+def test_search_anchored_patterns_match_within_the_file(file_tools, sources):
+    """Test that ^ and $ anchor to lines, not to the start and end of the file."""
+    assert file_tools.search("^def").startswith("src/app/main.py:3: def main():")
+    assert file_tools.search(r"getcwd\(\)$").startswith("src/app/main.py:4:")
+
+
+def test_search_caps_matches(file_tools, temp_dir):
+    """Test the per-file and total caps on matches."""
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (temp_dir / name).write_text("hit\n" * 5)
+
+    result = file_tools.search("hit", max_per_file=2, max_results=5)
+
+    names = [line.split(":")[0] for line in result.splitlines()[:-1]]
+    assert names == ["a.txt"] * 2 + ["b.txt"] * 2 + ["c.txt"]
+    assert "Stopped at 5 matches." in result
+    assert "3 files have more matches than shown (max_per_file=2)." in result
+
+
+def test_search_skips_files_over_the_size_cap(file_tools, temp_dir, monkeypatch):
+    """Test that files too big to read whole are not searched, and are named."""
+    from bespoken.tools import filesystem
+
+    monkeypatch.setattr(filesystem, "MAX_FILE_BYTES", 100)
+    (temp_dir / "small.txt").write_text("hit\n")
+    (temp_dir / "huge.log").write_text("hit\n" * 100)
+
+    result = file_tools.search("hit")
+    assert result.splitlines()[0] == "small.txt:1: hit"
+    too_large = (
+        "1 files over 100 bytes not searched, "
+        "read them in ranges with read_file: huge.log."
+    )
+    assert too_large in result
+
+    result = file_tools.search("miss")
+    assert result == f"No matches for 'miss' in 1 files [{too_large}]"
+
+
+def test_search_in_worker_threads(temp_dir, monkeypatch):
+    """Test that batches searched on worker threads keep the walk order."""
+    monkeypatch.setattr(search, "BATCH_FILES", 2)
+    monkeypatch.setattr(search, "PARALLEL_BYTES", 0)
+    files = []
+    for i in range(7):
+        (temp_dir / f"f{i}.txt").write_text(f"line\nneedle {i}\n")
+        files.append((str(temp_dir / f"f{i}.txt"), f"f{i}.txt", 20))
+
+    result = search.search_contents(files, "needle", workers=2)
+
+    assert [file.path for file in result.files] == [f"f{i}.txt" for i in range(7)]
+    assert result.files[3].hits == [2] and result.files[3].lines == {2: "needle 3"}
+
+
+def test_find_files_by_glob_and_fuzzy_name(file_tools, project):
+    """Test that find_files answers globs and fuzzy names from the workspace index."""
+    assert file_tools.find_files("*.py") == "src/app/main.py (1 bytes)"
+    assert file_tools.find_files("README") == "README.md (1 bytes)"
+
+    (project / "src/app/models.py").write_text("")
+    result = file_tools.find_files("*.py", max_results=1)
+    assert result.splitlines() == [
+        "src/app/main.py (1 bytes)",
+        "[Stopped at 1 files, use a more specific pattern to see the rest.]",
+    ]
+
+
+def test_search_in_parallel_from_a_script_without_main_guard(temp_dir):
+    """Test that a parallel search does not run the calling script again.
+
+    Spawned worker processes would import it as their __main__.
+    """
+    for i in range(6):
+        (temp_dir / f"f{i}.txt").write_text(f"needle {i}\n")
+    script = temp_dir / "app.py"
+    script.write_text(
+        "from bespoken import search\n"
+        "from bespoken.tools import FileSystem\n"
+        "search.BATCH_FILES = 2\n"
+        "search.PARALLEL_BYTES = 0\n"
+        "search.default_workers = lambda: 4\n"
+        "print('started', flush=True)\n"
+        "print(FileSystem('.').search('needle', include='*.txt').splitlines()[-1])\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, str(script)],
+        cwd=temp_dir, capture_output=True, text=True, timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.count("started") == 1
+    assert "[6 matches in 6 files.]" in result.stdout
@@ -0,0 +1,105 @@
+"""Tests for the prompt session, input history and file path completion."""
+
+import asyncio
+
+import pytest
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from bespoken import ui
+from bespoken.file_completer import FilePathCompleter
+from bespoken.input_history import BoundedHistory
+
+
+@pytest.fixture
+def pipe_input(monkeypatch):
+    """Feed keystrokes to a fresh prompt session."""
+    monkeypatch.setattr(ui, "_prompt_session", None)
+    monkeypatch.setattr(ui, "_completer", None)
+    monkeypatch.setattr(ui, "_history_file", None)
+    with create_pipe_input() as pipe:
+        with create_app_session(input=pipe, output=DummyOutput()):
+            yield pipe
+
+
+def test_input_reuses_one_session(pipe_input):
+    """Test that every input reuses one session and updates its completer in place."""
+    async def run():
+        pipe_input.send_text("first\r")
+        first = await ui.input_async("> ", completions=["/quit"])
+        session, completer = ui._prompt_session, ui._completer
+        pipe_input.send_text("second\r")
+        second = await ui.input_async("> ", completions=["/quit", "/new"])
+        assert ui._prompt_session is session
+        assert ui._completer is completer
+        return first, second
+
+    assert asyncio.run(run()) == ("first", "second")
+    assert ui._completer.commands == ["/quit", "/new"]
+    assert ui._prompt_session.history.get_strings() == ["first", "second"]
+
+
+def test_input_without_completions_has_no_completer(pipe_input):
+    """Test that a plain question does not offer the slash commands."""
+    pipe_input.send_text("answer\r")
+    ui._get_session(["/quit"])
+    assert ui.input("Name: ") == "answer"
+    assert ui._prompt_session.completer is None
+
+
+def test_bounded_history_persists_and_caps(tmp_path):
+    """Test that history survives a restart and keeps only the newest entries."""
+    path = tmp_path / "history"
+    history = BoundedHistory(path, max_entries=3)
+    list(history.load_history_strings())
+    for i in range(10):
+        history.append_string(f"line {i}\nwith a second line")
+
+    assert len(history.get_strings()) == 3
+    # The file is compacted before it grows past twice the cap
+    assert len(path.read_text().splitlines()) < 6
+
+    reloaded = BoundedHistory(path, max_entries=3)
+    expected = [f"line {i}\nwith a second line" for i in (9, 8, 7)]
+    assert list(reloaded.load_history_strings()) == expected
+
+
+def test_file_completer_uses_the_workspace_index(tmp_path):
+    """Test that listings come from the index, rescanned once a directory changes."""
+    (tmp_path / "alpha.py").write_text("")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "parser.py").write_text("")
+    completer = FilePathCompleter(str(tmp_path))
+    assert completer.index.wait(5)
+
+    def complete(text):
+        completions = completer.get_completions(Document(text), CompleteEvent())
+        return [c.display_text for c in completions]
+
+    assert complete("@") == ["src/", "alpha.py"]
+    assert complete("@al") == ["alpha.py"]
+
+    (tmp_path / "beta.py").write_text("")
+    assert complete("@") == ["src/", "alpha.py", "beta.py"]
+    # Files deeper in the tree match fuzzily, replacing what was typed
+    completions = list(completer.get_completions(Document("@prsr"), CompleteEvent()))
+    assert [(c.text, c.start_position) for c in completions] == [("src/parser.py", -4)]
+
+
+def test_file_completer_lists_symlinked_directories(tmp_path):
+    """Test that a symlinked directory completes like any other and can be browsed."""
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "notes.md").write_text("")
+    (tmp_path / "docs").symlink_to(tmp_path / "shared", target_is_directory=True)
+    completer = FilePathCompleter(str(tmp_path))
+    assert completer.index.wait(5)
+
+    def complete(text):
+        completions = completer.get_completions(Document(text), CompleteEvent())
+        return [c.display_text for c in completions]
+
+    assert complete("@") == ["docs/", "shared/"]
+    assert complete("@docs/") == ["docs/notes.md"]
@@ -0,0 +1,162 @@
+"""Tests for the offline mock model and scripted input."""
+
+import asyncio
+import json
+import time
+
+import llm
+import pytest
+import typer
+
+from bespoken import ui
+from bespoken.__main__ import chat_async
+from bespoken.mock_model import MockAsyncModel, MockModel, Recording, load_recording
+from bespoken.response_cache import cached_model
+from bespoken.sessions import SessionStore
+
+
+class Greeter(llm.Toolbox):
+    def greet(self, name: str) -> str:
+        """Greet someone."""
+        return f"Hello {name}"
+
+
+def write_recording(path):
+    entries = [
+        {"chunks": ["Let me ", "greet."], "tool_calls": [
+            {
+                "name": "Greeter_greet", "arguments": {"name": "Ada"},
+                "tool_call_id": "call-1",
+            },
+        ]},
+        {"chunks": ["Done."]},
+    ]
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    return path
+
+
+def test_mock_model_is_registered():
+    """Test that the plugin entry point makes the model available to llm."""
+    assert isinstance(llm.get_model("bespoken-mock"), MockModel)
+    assert isinstance(llm.get_async_model("bespoken-mock"), MockAsyncModel)
+
+
+def test_synthetic_stream_has_the_requested_shape():
+    """Test the length, chunk size and pacing of synthetic text."""
+    model = MockModel(tokens=20, chunk_size=5, tokens_per_second=400)
+    started = time.perf_counter()
+    response = model.prompt("hi")
+    chunks = list(response)
+
+    assert len(chunks) == 4
+    assert all(len(chunk.split()) == 5 for chunk in chunks)
+    assert time.perf_counter() - started >= 20 / 400
+    assert response.output_tokens == 20
+
+
+def test_recording_replays_tool_calls(tmp_path):
+    """Test that a recorded session replays its text and runs its tool calls."""
+    model = MockModel(recording=str(write_recording(tmp_path / "session.jsonl")))
+    conversation = model.conversation(tools=[Greeter()])
+    chain = conversation.chain("Say hi to Ada")
+
+    assert "".join(chain) == "Let me greet. Done."
+    tool_results = conversation.responses[1].prompt.tool_results
+    assert tool_results[0].output == "Hello Ada"
+
+
+def test_recording_captures_what_the_mock_replays(tmp_path):
+    """Test that recording a model writes one replayable line per response."""
+    source = MockModel(recording=str(write_recording(tmp_path / "source.jsonl")))
+    path = tmp_path / "recorded.jsonl"
+    conversation = cached_model(source, Recording(path)).conversation(tools=[Greeter()])
+    "".join(conversation.chain("Say hi to Ada"))
+
+    entries = load_recording(path)
+    assert [entry["chunks"] for entry in entries] == [["Let me ", "greet."], ["Done."]]
+    assert entries[0]["tool_calls"][0]["name"] == "Greeter_greet"
+
+
+def test_scripted_session_runs_unattended(tmp_path, monkeypatch):
+    """Test a whole chat session with the mock model and scripted input."""
+    recording = write_recording(tmp_path / "session.jsonl")
+    monkeypatch.setenv("BESPOKEN_MOCK_RECORDING", str(recording))
+    monkeypatch.setattr(ui, "_auto_approve", True)
+    monkeypatch.setattr(ui, "_scripted_input", None)
+    ui.set_scripted_input(["Say hi to Ada", "/stats"])
+    history = []
+
+    asyncio.run(chat_async(
+        model_name="bespoken-mock", tools=[Greeter()], show_banner=False,
+        save_session=False, history_callback=history.extend,
+    ))
+
+    roles = [message["role"] for message in history]
+    assert roles == ["user", "assistant", "assistant"]
+    assert history[2]["content"][0]["text"] == "Done."
+
+
+def test_unknown_model_ends_the_chat_at_the_first_prompt(monkeypatch):
+    """Test that a bad model id cancels the first prompt.
+
+    Input typed before the model failed is not used.
+    """
+    cancelled = []
+
+    async def wait_for_input(*args, **kwargs):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(ui, "input_async", wait_for_input)
+    with pytest.raises(typer.Exit):
+        chat = chat_async(model_name="no-such-model", show_banner=False)
+        asyncio.run(asyncio.wait_for(chat, 10))
+    assert cancelled == [True]
+
+    monkeypatch.undo()
+    monkeypatch.setattr(ui, "_scripted_input", None)
+    ui.set_scripted_input(["Say hi to Ada"])
+    history = []
+    with pytest.raises(typer.Exit):
+        asyncio.run(chat_async(
+            model_name="no-such-model", show_banner=False,
+            history_callback=history.extend,
+        ))
+    assert history == []
+
+
+def test_saved_session_is_resumed_and_saved_on(tmp_path, monkeypatch):
+    """Test that sessions are only saved when asked, and a resumed one stays saved."""
+    recording = write_recording(tmp_path / "session.jsonl")
+    monkeypatch.setenv("BESPOKEN_MOCK_RECORDING", str(recording))
+    monkeypatch.setattr(ui, "_auto_approve", True)
+    monkeypatch.setattr(ui, "_scripted_input", None)
+    db = tmp_path / "sessions.db"
+
+    ui.set_scripted_input(["Say hi to Ada"])
+    asyncio.run(chat_async(
+        model_name="bespoken-mock", tools=[Greeter()], show_banner=False,
+        session_db=str(db),
+    ))
+    assert not db.exists()
+
+    ui.set_scripted_input(["Say hi to Ada"])
+    asyncio.run(chat_async(
+        model_name="bespoken-mock", tools=[Greeter()], show_banner=False,
+        session_db=str(db), save_session=True,
+    ))
+    store = SessionStore(db)
+    [session_id] = [row[0] for row in store.db.execute("SELECT id FROM sessions")]
+    saved = store.count(session_id)
+
+    ui.set_scripted_input(["And to Grace"])
+    asyncio.run(chat_async(
+        model_name="bespoken-mock", tools=[Greeter()], show_banner=False,
+        session_db=str(db), resume=session_id,
+    ))
+    # The new prompt and its reply, appended after the resumed history
+    assert store.count(session_id) == saved + 2
+    assert store.load(session_id)[saved].parts[0].text == "And to Grace"
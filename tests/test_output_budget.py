@@ -0,0 +1,73 @@
+"""Tests for the token budget on tool output."""
+
+import llm
+
+from bespoken.__main__ import _expand_tools
+from bespoken.output_budget import OutputBudget, elide, output_hint
+from bespoken.scheduling import is_read_only, read_only
+
+
+LOG = "".join(f"line {i:05d}\n" for i in range(10_000))
+
+
+def test_short_output_is_untouched():
+    """Test that output within the budget comes back as is."""
+    assert elide("hello\n", 10) == "hello\n"
+
+
+def test_long_output_keeps_head_and_tail():
+    """Test that the middle is replaced by a marker on line boundaries, with a hint."""
+    text = elide(LOG, 500, hint="Ask for a range.")
+    lines = text.splitlines()
+
+    assert len(text) < 500 * 4 + 200
+    assert lines[0] == "line 00000"
+    assert lines[-1] == "line 09999"
+    marker = next(line for line in lines if line.startswith("[..."))
+    assert "lines (~" in marker and "Ask for a range." in marker
+    # No line is cut in half
+    assert all(line.startswith("[...") or len(line) == 10 for line in lines)
+
+
+def test_turn_budget_is_shared_by_calls():
+    """Test that later calls in a turn get what the earlier ones left over."""
+    budget = OutputBudget(per_tool=1_000, per_turn=1_500)
+    first = budget.fit(LOG)
+    second = budget.fit(LOG)
+
+    assert len(first) // 4 <= 1_100
+    assert len(second) < len(first)
+    assert "turn's tool output budget" in second
+
+    budget.start_turn()
+    assert len(budget.fit(LOG)) == len(first)
+
+
+def test_turn_hint_only_when_earlier_calls_used_the_budget():
+    """Test that a per-call cut, or one on a fresh turn, doesn't blame the turn."""
+    budget = OutputBudget(per_tool=1_000, per_turn=40_000)
+    assert "turn's tool output budget" not in budget.fit(LOG)
+
+    budget = OutputBudget(per_tool=None, per_turn=1_500)
+    first = budget.fit(LOG)
+    assert "[..." in first and "turn's tool output budget" not in first
+    assert "turn's tool output budget" in budget.fit(LOG)
+
+
+class Logs(llm.Toolbox):
+    @read_only
+    @output_hint("Pass a smaller count.")
+    def tail(self, count: int) -> str:
+        """Show the last lines of the log."""
+        return LOG
+
+
+def test_expanded_tools_go_through_the_budget():
+    """Test that toolbox tools are capped, keeping their schema and read-only mark."""
+    tool = _expand_tools([Logs()], OutputBudget(per_tool=200))[0]
+
+    assert "count" in tool.input_schema["properties"]
+    assert is_read_only(tool.implementation)
+    output = tool.implementation(count=5)
+    assert len(output) < 200 * 4 + 200
+    assert "Pass a smaller count." in output
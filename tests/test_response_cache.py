@@ -0,0 +1,97 @@
+"""Tests for the on-disk response cache."""
+
+import asyncio
+
+import llm
+
+from bespoken.response_cache import ResponseCache, cached_model
+
+
+class CountingModel(llm.Model):
+    model_id = "counting"
+    can_stream = True
+    supports_tools = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, prompt, stream, response, conversation):
+        self.calls += 1
+        if prompt.tool_results:
+            yield f"The answer is {prompt.tool_results[0].output}"
+            return
+        yield "Let me "
+        yield "check."
+        response.add_tool_call(llm.ToolCall(name="add", arguments={"a": 1, "b": 2}))
+
+
+class CountingAsyncModel(llm.AsyncModel):
+    model_id = "counting"
+    can_stream = True
+
+    def __init__(self):
+        self.calls = 0
+
+    async def execute(self, prompt, stream, response, conversation):
+        self.calls += 1
+        yield "async "
+        yield "reply"
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+def run_chain(model, prompt="What is 1 + 2?"):
+    conversation = model.conversation(tools=[add])
+    return "".join(conversation.chain(prompt, system="Be brief."))
+
+
+def test_second_run_is_replayed_from_the_cache(tmp_path):
+    """Test that an identical conversation, tool calls and all, skips the model."""
+    inner = CountingModel()
+    cache = ResponseCache(tmp_path / "cache.db")
+
+    first = run_chain(cached_model(inner, cache))
+    second = run_chain(cached_model(inner, cache))
+
+    assert first == second == "Let me check. The answer is 3"
+    assert inner.calls == 2
+    assert cache.hits == 2
+
+
+def test_different_history_misses(tmp_path):
+    """Test that a different prompt is a different key."""
+    inner = CountingModel()
+    cache = ResponseCache(tmp_path / "cache.db")
+    run_chain(cached_model(inner, cache), "What is 1 + 2?")
+    run_chain(cached_model(inner, cache), "And 2 + 1?")
+    assert inner.calls == 4
+    assert len(cache) == 4
+
+
+def test_async_models_are_cached(tmp_path):
+    """Test that async models record and replay too."""
+    inner = CountingAsyncModel()
+    model = cached_model(inner, ResponseCache(tmp_path / "cache.db"))
+
+    async def run():
+        return await model.prompt("hello").text()
+
+    assert asyncio.run(run()) == asyncio.run(run()) == "async reply"
+    assert inner.calls == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays under its size cap by dropping the oldest entries."""
+    cache = ResponseCache(tmp_path / "cache.db", max_bytes=250)
+    for key in ["a", "b", "c"]:
+        cache.put(key, {"chunks": ["x" * 50]})
+    # Touch "a" so "b" is now the least recently used
+    assert cache.get("a") is not None
+    cache.put("d", {"chunks": ["x" * 50]})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
@@ -0,0 +1,129 @@
+"""Tests for running independent tool calls side by side."""
+
+import asyncio
+import json
+import time
+
+import llm
+
+from bespoken.__main__ import _async_tools, _expand_tools
+from bespoken.mock_model import MockAsyncModel, MockModel
+from bespoken.scheduling import ToolLock, ToolScheduler, read_only
+from bespoken.telemetry import Telemetry
+
+
+class Slow(llm.Toolbox):
+    def __init__(self):
+        self.events = []
+
+    @read_only
+    def peek(self, name: str) -> str:
+        """Look at something slowly."""
+        time.sleep(0.2)
+        self.events.append(f"peek {name}")
+        return f"saw {name}"
+
+    def poke(self, name: str) -> str:
+        """Change something."""
+        time.sleep(0.1)
+        self.events.append(f"poke {name}")
+        return f"poked {name}"
+
+
+def write_recording(path, calls):
+    entries = [
+        {"chunks": ["Looking."], "tool_calls": [
+            {
+                "name": f"Slow_{tool}", "arguments": {"name": name},
+                "tool_call_id": f"call-{i}",
+            }
+            for i, (tool, name) in enumerate(calls)
+        ]},
+        {"chunks": ["Done."]},
+    ]
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    return str(path)
+
+
+PEEKS = [("peek", "a"), ("peek", "b"), ("peek", "c")]
+
+
+def tool_outputs(conversation):
+    return [result.output for result in conversation.responses[1].prompt.tool_results]
+
+
+def test_sync_read_only_calls_run_side_by_side(tmp_path):
+    """Test that three slow reads take about as long as one, with results in order."""
+    recording = write_recording(tmp_path / "session.jsonl", PEEKS)
+    scheduler = ToolScheduler()
+    tools = scheduler.wrap(_expand_tools([Slow()]))
+    conversation = MockModel(recording=recording).conversation(tools=tools)
+
+    started = time.perf_counter()
+    text = "".join(scheduler.stream(conversation.chain("look")))
+
+    assert time.perf_counter() - started < 0.5
+    assert text == "Looking. Done."
+    assert tool_outputs(conversation) == ["saw a", "saw b", "saw c"]
+
+
+def test_prefetched_calls_are_timed_from_their_submission(tmp_path):
+    """Test that calls that ran ahead report their own time, counted once per turn."""
+    recording = write_recording(tmp_path / "session.jsonl", PEEKS)
+    scheduler = ToolScheduler()
+    tools = scheduler.wrap(_expand_tools([Slow()]))
+    conversation = MockModel(recording=recording).conversation(tools=tools)
+    telemetry = Telemetry()
+    telemetry.start_turn()
+
+    chain = conversation.chain(
+        "look",
+        before_call=lambda tool, call: telemetry.tool_started(call.tool_call_id),
+        after_call=lambda tool, call, result: telemetry.tool_finished(
+            call.tool_call_id, call.name, result.output,
+            scheduler.span(call.tool_call_id),
+        ),
+    )
+    "".join(scheduler.stream(chain))
+    record = telemetry.end_turn(output_tokens=2)
+
+    assert all(tool["duration"] >= 0.2 for tool in record["tools"])
+    assert 0.2 <= record["tool_time"] < 0.5
+
+
+def test_sync_reads_after_a_change_wait_for_it(tmp_path):
+    """Test that only the reads in front of a changing call run ahead."""
+    recording = write_recording(
+        tmp_path / "session.jsonl", [("peek", "a"), ("poke", "b"), ("peek", "c")]
+    )
+    slow = Slow()
+    scheduler = ToolScheduler()
+    tools = scheduler.wrap(_expand_tools([slow]))
+    conversation = MockModel(recording=recording).conversation(tools=tools)
+
+    "".join(scheduler.stream(conversation.chain("look")))
+
+    assert slow.events == ["peek a", "poke b", "peek c"]
+    assert tool_outputs(conversation) == ["saw a", "poked b", "saw c"]
+
+
+def test_async_read_only_calls_share_the_lock(tmp_path):
+    """Test that async reads overlap, while a change runs on its own and in order."""
+    recording = write_recording(
+        tmp_path / "session.jsonl",
+        [("peek", "a"), ("peek", "b"), ("poke", "c"), ("peek", "d")],
+    )
+    slow = Slow()
+
+    async def run():
+        tools = _async_tools([slow], ToolLock())
+        conversation = MockAsyncModel(recording=recording).conversation(tools=tools)
+        started = time.perf_counter()
+        await conversation.chain("look").text()
+        return conversation, time.perf_counter() - started
+
+    conversation, elapsed = asyncio.run(run())
+    # a and b overlap (0.2s), then c (0.1s), then d (0.2s)
+    assert elapsed < 0.7
+    assert slow.events[2:] == ["poke c", "peek d"]
+    assert tool_outputs(conversation) == ["saw a", "saw b", "poked c", "saw d"]
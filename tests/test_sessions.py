@@ -0,0 +1,57 @@
+"""Tests for the SQLite session store."""
+
+from llm.parts import Message, TextPart
+
+from bespoken.sessions import SessionStore
+
+
+def make_messages(start, stop):
+    return [
+        Message(role="user", parts=[TextPart(text=f"message {i}")])
+        for i in range(start, stop)
+    ]
+
+
+def test_append_and_load_round_trip(tmp_path):
+    """Test that appended turns come back in order."""
+    store = SessionStore(tmp_path / "sessions.db")
+    session_id = store.create("some-model")
+    store.append(session_id, make_messages(0, 3))
+    store.append(session_id, make_messages(3, 5))
+
+    loaded = store.load(session_id)
+    assert len(loaded) == 5
+    assert [m.parts[0].text for m in loaded] == [f"message {i}" for i in range(5)]
+    assert loaded[-1].parts[0].text == "message 4"
+    assert [m.parts[0].text for m in loaded[1:3]] == ["message 1", "message 2"]
+
+
+def test_store_uses_wal_mode(tmp_path):
+    """Test that the database runs in write-ahead logging mode."""
+    store = SessionStore(tmp_path / "sessions.db")
+    assert store.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_load_only_reads_the_pages_it_needs(tmp_path):
+    """Test that resuming a long session does not parse every message up front."""
+    store = SessionStore(tmp_path / "sessions.db")
+    session_id = store.create()
+    store.append(session_id, make_messages(0, 1000))
+
+    loaded = store.load(session_id)
+    assert loaded.pages == {}
+    assert loaded[999].parts[0].text == "message 999"
+    assert list(loaded.pages) == [999 // loaded.page_size]
+
+
+def test_sessions_are_kept_apart(tmp_path):
+    """Test that sessions don't mix their messages and unknown ids are reported."""
+    store = SessionStore(tmp_path / "sessions.db")
+    first, second = store.create(), store.create()
+    store.append(first, make_messages(0, 2))
+    store.append(second, make_messages(5, 6))
+
+    assert store.count(first) == 2
+    assert [m.parts[0].text for m in store.load(second)] == ["message 5"]
+    assert store.exists(first)
+    assert not store.exists("missing")
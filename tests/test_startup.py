@@ -0,0 +1,59 @@
+"""Startup benchmark: imports must stay lazy and fast.
+
+Every check runs in a fresh interpreter, so modules imported by other tests don't
+hide a regression.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+# Seconds, generous enough for a slow CI machine but far below an eager import
+IMPORT_BUDGET = {
+    "import bespoken": 0.05,
+    "from bespoken.tools import FileSystem": 1.0,
+    "from bespoken import chat": 2.0,
+}
+
+# Heavy modules that must not be imported by the statement
+NOT_IMPORTED = {
+    "import bespoken": [
+        "llm", "typer", "rich", "prompt_toolkit", "questionary", "dotenv",
+    ],
+    "from bespoken.tools import FileSystem": [
+        "requests", "bs4", "markdownify", "prompt_toolkit", "questionary",
+        "rich.markdown", "rich.live",
+    ],
+}
+
+
+def measure(statement):
+    """Run an import in a new interpreter, return its duration and loaded modules."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "duration = time.perf_counter() - start\n"
+        "print(json.dumps({'duration': duration, 'modules': sorted(sys.modules)}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("statement", sorted(NOT_IMPORTED))
+def test_heavy_modules_are_not_imported(statement):
+    """Test that importing bespoken doesn't pull in dependencies it doesn't need yet."""
+    modules = measure(statement)["modules"]
+    assert [name for name in NOT_IMPORTED[statement] if name in modules] == []
+
+
+@pytest.mark.parametrize("statement", sorted(IMPORT_BUDGET))
+def test_import_time_within_budget(statement):
+    """Test that cold import time stays within its budget (best of three runs)."""
+    best = min(measure(statement)["duration"] for _ in range(3))
+    assert best < IMPORT_BUDGET[statement], f"{statement} took {best:.3f}s"
@@ -0,0 +1,70 @@
+"""Tests for per-turn telemetry."""
+
+import json
+import time
+
+from bespoken.telemetry import Telemetry, covered, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    """Test the p50/p95 picks on small samples."""
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile([], 50) is None
+
+
+def test_turn_record_covers_model_and_tools(tmp_path):
+    """Test that a turn records its tools and writes a JSONL line."""
+    path = tmp_path / "telemetry.jsonl"
+    telemetry = Telemetry(path)
+
+    telemetry.start_turn()
+    telemetry.first_token()
+    telemetry.tool_started("call-1")
+    telemetry.tool_finished("call-1", "read_file", "x" * 42)
+    record = telemetry.end_turn(output_tokens=100)
+
+    assert record["time_to_first_token"] is not None
+    assert record["output_tokens"] == 100
+    assert record["tools"][0]["name"] == "read_file"
+    assert record["tools"][0]["output_chars"] == 42
+    assert record["model_time"] <= record["total_time"]
+    assert json.loads(path.read_text())["output_tokens"] == 100
+
+
+def test_tool_calls_that_overlap_count_once():
+    """Test that calls running side by side add their shared time to the turn once."""
+    assert covered([(0, 2), (1, 3), (5, 6)]) == 4
+    assert covered([]) == 0
+
+    now = time.perf_counter()
+    telemetry = Telemetry()
+    telemetry.start_turn(now - 2.0)
+    for i in range(3):
+        telemetry.tool_finished(f"call-{i}", "read_file", "", span=(now - 1.0, now))
+    record = telemetry.end_turn(output_tokens=10)
+
+    assert [tool["duration"] for tool in record["tools"]] == [1.0, 1.0, 1.0]
+    assert record["tool_time"] == 1.0
+    assert record["model_time"] >= 1.0
+
+
+def test_ring_buffer_and_summary():
+    """Test that only the newest turns are kept and summarized."""
+    telemetry = Telemetry(capacity=3)
+    for tokens in range(5):
+        telemetry.start_turn()
+        telemetry.end_turn(output_tokens=tokens)
+
+    assert [r["output_tokens"] for r in telemetry.records] == [2, 3, 4]
+    summary = telemetry.summary()
+    assert summary["model_time"]["count"] == 3
+    assert summary["tool_time"] == {"p50": None, "p95": None, "count": 0}
+
+
+def test_end_turn_without_a_turn_is_ignored():
+    """Test that ending a turn that never started records nothing."""
+    telemetry = Telemetry()
+    assert telemetry.end_turn(output_tokens=1) is None
+    assert len(telemetry.records) == 0
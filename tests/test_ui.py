@@ -0,0 +1,265 @@
+"""Tests for the streaming output in the ui module."""
+
+from io import StringIO
+
+import pytest
+import rich.markdown
+from rich.console import Console
+
+from bespoken import ui
+
+# The sentence the wrapping tests stream, wrapped at width 20 with 2 spaces padding
+WRAPPED = "  the quick brown \n  fox jumps over the \n  lazy dog"
+
+
+@pytest.fixture
+def console(monkeypatch):
+    """Swap the ui console for one that writes plain text to a buffer."""
+    test_console = Console(file=StringIO(), width=20, color_system=None)
+    monkeypatch.setattr(ui, "_console", test_console)
+    return test_console
+
+
+def stream_chunks(chunks, indent=2):
+    ui.start_streaming(indent)
+    for chunk in chunks:
+        ui.stream_chunk(chunk, indent)
+    ui.end_streaming(indent)
+
+
+def test_stream_chunk_pads_first_line(console):
+    """Test that the first streamed line starts with the padding."""
+    stream_chunks(["Hello world"])
+    assert console.file.getvalue() == "  Hello world"
+
+
+def test_stream_chunk_wraps_on_word_boundaries(console):
+    """Test that words which do not fit move to a new padded line."""
+    stream_chunks(["the quick brown fox jumps over the lazy dog"])
+    assert console.file.getvalue() == WRAPPED
+
+
+def test_stream_chunk_split_mid_word(console):
+    """Test that chunk boundaries inside a word do not change the output."""
+    stream_chunks(["the qu", "ick brown f", "ox jumps ov", "er the lazy dog"])
+    assert console.file.getvalue() == WRAPPED
+
+
+def test_stream_chunk_newlines_are_padded(console):
+    """Test that explicit newlines start a new padded line."""
+    stream_chunks(["one\ntwo\n\nthree"])
+    assert console.file.getvalue() == "  one\n  two\n  \n  three"
+
+
+def test_stream_chunk_writes_once_per_chunk(console, monkeypatch):
+    """Test that each chunk results in a single console write."""
+    monkeypatch.setattr(ui, "_plain_output", False)
+    calls = []
+    monkeypatch.setattr(console, "print", lambda *args, **kwargs: calls.append(args))
+    ui.start_streaming(2)
+    ui.stream_chunk("a whole sentence with many words in it\nand a second line", 2)
+    assert len(calls) == 1
+
+
+def test_stream_matches_chunked_streaming(console):
+    """Test that ui.stream gives the same output as the chunk functions."""
+    chunks = ["the qu", "ick brown f", "ox\tjumps ov", "er the\nlazy dog"]
+    stream_chunks(chunks)
+    expected = console.file.getvalue()
+    console.file.truncate(0)
+    console.file.seek(0)
+    ui.stream(chunks, indent=2)
+    assert console.file.getvalue() == expected
+
+
+def test_stream_fps_buffers_until_end(console, monkeypatch):
+    """Test that chunks within one frame are held back and flushed at the end."""
+    monkeypatch.setattr(ui, "_stream_fps", 0.001)
+    ui.start_streaming(2)
+    ui.stream_chunk("Hello ", 2)
+    ui.stream_chunk("world ", 2)
+    ui.stream_chunk("again", 2)
+    assert console.file.getvalue() == "  Hello "
+    ui.end_streaming(2)
+    assert console.file.getvalue() == "  Hello world again"
+
+
+def test_flush_streaming_writes_pending_chunks(console, monkeypatch):
+    """Test that flush_streaming writes buffered chunks right away."""
+    monkeypatch.setattr(ui, "_stream_fps", 0.001)
+    ui.start_streaming(2)
+    ui.stream_chunk("Hello ", 2)
+    ui.stream_chunk("world ", 2)
+    ui.flush_streaming()
+    assert console.file.getvalue() == "  Hello world "
+
+
+def test_flush_streaming_writes_the_unfinished_word(console, monkeypatch):
+    """Test that a flush mid-word writes the word, so it comes before tool output."""
+    monkeypatch.setattr(ui, "_stream_fps", None)
+    ui.start_streaming(2)
+    ui.stream_chunk("Reading ", 2)
+    ui.stream_chunk("fil", 2)
+    ui.flush_streaming()
+    assert console.file.getvalue() == "  Reading fil"
+    ui.stream_chunk("es.", 2)
+    ui.end_streaming(2)
+    assert console.file.getvalue() == "  Reading files."
+
+
+def test_set_stream_fps_zero_disables_buffering(console, monkeypatch):
+    """Test that a frame rate of 0 writes every chunk immediately."""
+    monkeypatch.setattr(ui, "_stream_fps", None)
+    ui.set_stream_fps(0)
+    ui.start_streaming(2)
+    ui.stream_chunk("Hello ", 2)
+    ui.stream_chunk("world ", 2)
+    assert console.file.getvalue() == "  Hello world "
+
+
+@pytest.fixture
+def markdown_console(monkeypatch):
+    """Swap the ui console for a wide plain-text one and count markdown parses."""
+    test_console = Console(file=StringIO(), width=60, color_system=None)
+    monkeypatch.setattr(ui, "_console", test_console)
+    monkeypatch.setattr(ui, "_stream_fps", None)
+    monkeypatch.setattr(ui, "_plain_output", False)
+    parsed = []
+    original = rich.markdown.Markdown
+
+    def counting_markdown(text, *args, **kwargs):
+        parsed.append(text)
+        return original(text, *args, **kwargs)
+
+    # ui imports Markdown when it renders, so patch it where it is defined
+    monkeypatch.setattr(rich.markdown, "Markdown", counting_markdown)
+    test_console.parsed = parsed
+    return test_console
+
+
+def test_markdown_stream_prints_finished_blocks_once(markdown_console):
+    """Test that each finished block is rendered to the console exactly once."""
+    writer = ui.StreamWriter(0, markdown=True)
+    for chunk in ["# Ti", "tle\n\nSome **bold** te", "xt.\n\n- one\n- two\n", "\nlast"]:
+        writer.write(chunk)
+    writer.close()
+
+    output = markdown_console.file.getvalue()
+    assert output.count("Title") == 1
+    assert output.count("Some bold text.") == 1
+    assert output.count("one") == 1
+    assert "last" in output
+    assert "**" not in output
+
+
+def test_markdown_stream_keeps_fenced_code_together(markdown_console):
+    """Test that blank lines inside a fenced code block do not split it."""
+    writer = ui.StreamWriter(0, markdown=True)
+    writer.write("```python\nx = 1\n\n")
+    assert markdown_console.file.getvalue() == ""
+    writer.write("y = 2\n```\n")
+    output = markdown_console.file.getvalue()
+    assert "x = 1" in output and "y = 2" in output
+    writer.close()
+
+
+def test_markdown_stream_only_reparses_open_block(markdown_console, monkeypatch):
+    """Test that the tail re-render never includes finished blocks."""
+    # The live tail is only drawn on a terminal
+    monkeypatch.setattr(markdown_console, "_force_terminal", True)
+    monkeypatch.setattr(markdown_console, "is_interactive", True)
+    writer = ui.StreamWriter(0, markdown=True)
+    writer.write("First paragraph.\n\n")
+    markdown_console.parsed.clear()
+    for word in "second paragraph grows word by word".split():
+        writer.write(word + " ")
+    writer.close()
+    assert "second paragraph " in markdown_console.parsed
+    assert all("First" not in text for text in markdown_console.parsed)
+
+
+def test_markdown_writers_are_independent(markdown_console):
+    """Test that two markdown streams keep their own open blocks."""
+    other = Console(file=StringIO(), width=60, color_system=None)
+    left = ui.StreamWriter(0, markdown=True)
+    right = ui.StreamWriter(0, console=other, markdown=True)
+    left.write("Left paragraph.\n")
+    right.write("Right paragraph.\n\n")
+    assert "Right paragraph." in other.file.getvalue()
+    assert markdown_console.file.getvalue() == ""
+    left.close()
+    right.close()
+    assert "Left paragraph." in markdown_console.file.getvalue()
+    assert "Left" not in other.file.getvalue()
+
+
+def test_stream_writers_are_independent(console):
+    """Test that two writers keep their own wrap state and console."""
+    other = Console(file=StringIO(), width=20, color_system=None)
+    left = ui.StreamWriter(2, fps=0)
+    right = ui.StreamWriter(4, console=other, fps=0)
+    for word in "the quick brown fox jumps over the lazy dog".split():
+        left.write(word + " ")
+        right.write(word.upper() + " ")
+    left.close()
+    right.close()
+    assert console.file.getvalue() == WRAPPED + " "
+    assert other.file.getvalue() == (
+        "    THE QUICK BROWN \n    FOX JUMPS OVER \n    THE LAZY DOG "
+    )
+
+
+def test_stream_writer_uses_slots():
+    """Test that StreamWriter keeps its state in slots rather than a dict."""
+    writer = ui.StreamWriter(2)
+    assert not hasattr(writer, "__dict__")
+
+
+def test_plain_output_strips_markup_without_rich(console, monkeypatch):
+    """Test that plain output writes text directly, without markup or Rich rendering."""
+    monkeypatch.setattr(ui, "_plain_output", True)
+    def fail(*args, **kwargs):
+        pytest.fail("Rich was used")
+
+    monkeypatch.setattr(console, "print", fail)
+    ui.print("[cyan]Built-in commands:[/cyan] keep \\[this]", indent=2)
+    ui.tool_status("Reading file: data[0].txt", indent=2)
+    ui.tool_error("Failed", indent=2)
+    writer = ui.StreamWriter(2, fps=0)
+    writer.write("streamed [text]")
+    writer.close()
+    assert console.file.getvalue() == (
+        "  Built-in commands: keep [this]\n"
+        "\n  Reading file: data[0].txt\n\n"
+        "  Failed\n"
+        "  streamed [text]"
+    )
+
+
+def test_plain_output_is_picked_when_console_is_not_a_terminal(monkeypatch):
+    """Test that the plain backend is chosen automatically for non-terminal output."""
+    monkeypatch.setattr(ui, "_plain_output", None)
+    piped = Console(file=StringIO())
+    terminal = Console(file=StringIO(), force_terminal=True)
+    assert ui._plain_file(piped) is piped.file
+    assert ui._plain_file(terminal) is None
+    monkeypatch.setattr(ui, "_plain_output", True)
+    assert ui._plain_file(terminal) is terminal.file
+
+
+def test_stream_wraps_wide_characters_by_cell_width(console):
+    """Test that CJK and emoji words wrap on display width, not on character count."""
+    stream_chunks(["漢字漢字 漢字漢字 漢字漢字"])
+    assert console.file.getvalue() == "  漢字漢字 漢字漢字 \n  漢字漢字"
+    console.file.truncate(0)
+    console.file.seek(0)
+    stream_chunks(["🎉🎉🎉🎉 🎉🎉🎉🎉 🎉🎉🎉🎉"])
+    assert console.file.getvalue() == "  🎉🎉🎉🎉 🎉🎉🎉🎉 \n  🎉🎉🎉🎉"
+
+
+def test_word_width():
+    """Test the display width of ASCII, wide and combining text."""
+    assert ui._word_width("hello") == 5
+    assert ui._word_width("漢字") == 4
+    assert ui._word_width("🎉") == 2
+    assert ui._word_width("é") == 1
@@ -0,0 +1,124 @@
+"""Tests for the workspace file index."""
+
+import os
+
+import pytest
+
+from bespoken.workspace_index import WorkspaceIndex
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in [
+        "README.md", "src/app/main.py", "src/app/models.py", "src/lib/util.py",
+        "build/out.py", "docs/guide.md",
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    (tmp_path / ".gitignore").write_text("/build\n")
+    return tmp_path
+
+
+@pytest.fixture
+def index(tree):
+    index = WorkspaceIndex(tree)
+    index.build()
+    return index
+
+
+def paths(files):
+    """The paths of a list of IndexedFiles."""
+    return [file.path for file in files]
+
+
+def bump(path):
+    """Move a directory's mtime on, some file systems only keep whole seconds."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+def test_glob_matches_names_at_any_depth_and_paths_from_the_top(index):
+    """Test both kinds of glob, and that ignored files are not indexed."""
+    assert paths(index.glob("*.py")) == [
+        "src/app/main.py", "src/app/models.py", "src/lib/util.py"
+    ]
+    assert paths(index.glob("src/*/m*.py")) == ["src/app/main.py", "src/app/models.py"]
+    assert paths(index.glob("**/*.md")) == ["README.md", "docs/guide.md"]
+    assert index.glob("*.py")[0].size == len("src/app/main.py")
+
+
+def test_fuzzy_ranks_prefix_and_substring_matches_first(index):
+    """Test fuzzy file name matching and its order."""
+    assert paths(index.fuzzy("mod")) == ["src/app/models.py"]
+    assert paths(index.fuzzy("m")) == [
+        "src/app/main.py", "src/app/models.py", "README.md", "docs/guide.md"
+    ]
+    assert paths(index.fuzzy("app/mn")) == ["src/app/main.py"]
+
+
+def test_refresh_rescans_only_changed_directories(index, tree):
+    """Test that new, removed and newly ignored files show up after a refresh."""
+    assert not index.refresh()
+    lib = index.dirs["src/lib"]
+
+    (tree / "src/app/views.py").write_text("")
+    (tree / "docs/guide.md").unlink()
+    (tree / "docs/new").mkdir()
+    (tree / "docs/new/page.md").write_text("")
+    for path in ["src/app", "docs"]:
+        bump(tree / path)
+    assert index.refresh()
+
+    assert index.dirs["src/lib"] is lib
+    assert paths(index.glob("*.md")) == ["README.md", "docs/new/page.md"]
+    assert "src/app/views.py" in paths(index.glob("*.py"))
+
+    (tree / "src/.ignore").write_text("app/\n")
+    bump(tree / "src")
+    assert index.refresh()
+    assert paths(index.glob("*.py")) == ["src/lib/util.py"]
+
+
+def test_list_dir_checks_the_directory_first(index, tree):
+    """Test that a listing is current even before the next poll."""
+    assert index.list_dir("") == (("docs", "src"), (".gitignore", "README.md"))
+    assert index.list_dir("build") is None
+
+    (tree / "src/app/extra").mkdir()
+    bump(tree / "src/app")
+    assert index.list_dir("src/app/extra") == ((), ())
+    assert index.list_dir("src/app")[0] == ("extra",)
+
+
+def test_symlinked_directories_are_followed_inside_the_root(tmp_path):
+    """Test that links within the root are walked, links out of it or up only listed."""
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.py").write_text("")
+    root = tmp_path / "project"
+    (root / "libs" / "shared").mkdir(parents=True)
+    (root / "libs" / "shared" / "util.py").write_text("")
+    (root / "src").mkdir()
+    (root / "src" / "main.py").write_text("")
+    (root / "vendor").symlink_to(root / "libs" / "shared", target_is_directory=True)
+    (root / "external").symlink_to(outside, target_is_directory=True)
+    (root / "src" / "loop").symlink_to(root, target_is_directory=True)
+    index = WorkspaceIndex(root)
+    index.build()
+
+    assert paths(index.glob("*.py")) == [
+        "libs/shared/util.py", "src/main.py", "vendor/util.py"
+    ]
+    assert index.list_dir("") == (("external", "libs", "src", "vendor"), ())
+    assert index.list_dir("src") == (("loop",), ("main.py",))
+    assert index.list_dir("external") is None
+    assert not index.truncated
+
+
+def test_walk_stops_at_max_files(tree):
+    """Test that a walk stops once it holds max_files files, and says so."""
+    index = WorkspaceIndex(tree, max_files=2)
+    index.build()
+
+    assert index.truncated
+    assert 2 <= len(index.glob("*")) < 6